@@ -38,7 +38,8 @@ echo [3/4] Gerando executavel com PyInstaller...
 echo (Isso pode levar 3-4 minutos)
 echo.
 
-pyinstaller --name="PAK_Tool" --onefile --windowed --icon=NONE --clean --noconfirm --hidden-import=cryptography --hidden-import=cryptography.hazmat --hidden-import=cryptography.hazmat.primitives --hidden-import=cryptography.hazmat.backends --hidden-import=PIL --hidden-import=PIL.Image --hidden-import=PIL.ImageTk --collect-all=cryptography --collect-all=PIL pak_tool_gui.py
+REM --onedir: o executavel abre sem extrair tudo para uma pasta temporaria a cada execucao
+pyinstaller --name="PAK_Tool" --onedir --windowed --icon=NONE --clean --noconfirm --hidden-import=cryptography --hidden-import=cryptography.hazmat --hidden-import=cryptography.hazmat.primitives --hidden-import=cryptography.hazmat.backends --hidden-import=PIL --hidden-import=PIL.Image --hidden-import=PIL.ImageTk --collect-all=cryptography --collect-all=PIL pak_tool_gui.py
 
 if errorlevel 1 (
     echo.
@@ -50,8 +51,8 @@ if errorlevel 1 (
 echo.
 echo [4/4] Organizando arquivos...
 
-if not exist "PAK_Tool_EXE" mkdir PAK_Tool_EXE
-copy dist\PAK_Tool.exe PAK_Tool_EXE\ >nul
+if exist "PAK_Tool_EXE" rmdir /s /q PAK_Tool_EXE
+xcopy /e /i /q /y dist\PAK_Tool PAK_Tool_EXE >nul
 copy LEIA-ME.txt PAK_Tool_EXE\ >nul 2>&1
 
 echo.
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Benchmark das operações principais (abrir, listar, filtrar, extrair, salvar, criar)
+Gera paks sintéticos localmente e grava os resultados em JSON para comparar execuções
+Abrir e extrair também rodam sobre uma cópia comprimida com zlib (etapas *_zlib)
+
+Uso:
+    python pak_benchmark.py --sizes 1000,10000,200000 --output resultados.json
+"""
+
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from pyuepak import PakFile
+from pyuepak.utils import COMPRESSION
+
+from pak_entries import EntryTable
+from pak_io import PakSnapshot, atomic_write_pak, get_pak_entries, get_pak_version, parallel_map
+from pak_transcode import transcode_pak
+from pak_writer import PakWriter
+
+
+DEFAULT_SIZES = [1000, 10000, 50000, 200000]
+DEFAULT_SEED = 1234
+
+# Fração das entradas alteradas no teste "salvar com edições"
+EDIT_FRACTION = 0.01
+
+# Termo usado no teste de filtro (mesma lógica da caixa de busca da interface)
+FILTER_TERM = "mesh"
+
+# Perfis dos arquivos sintéticos: (peso, extensão, tamanho mínimo, máximo, compressível)
+FILE_PROFILES = [
+    (50, ".ini", 64, 2048, True),
+    (20, ".uasset", 512, 8192, True),
+    (20, ".uexp", 1024, 16384, False),
+    (9, ".ubulk", 16384, 65536, False),
+    (1, ".bnk", 65536, 262144, False),
+]
+
+FOLDERS = ["Content/Maps", "Content/Meshes", "Content/Textures", "Content/UI",
+           "Content/Audio", "Config", "Content/Blueprints/Characters"]
+
+
+def get_peak_rss():
+    """Pico de memória residente do processo em bytes (None se indisponível)
+
+    É acumulado desde o início do processo: nunca diminui entre uma etapa e a seguinte.
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB, macOS em bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD),
+                        ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t),
+                        ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+
+    return None
+
+
+def get_pyuepak_version():
+    """Versão instalada do pyuepak (para saber se uma atualização mudou o desempenho)"""
+    try:
+        from importlib.metadata import version
+        return version("pyuepak")
+    except Exception:
+        return None
+
+
+def make_payload(rng, min_size, max_size, compressible):
+    """Conteúdo sintético: texto repetitivo (compressível) ou bytes aleatórios"""
+    size = rng.randint(min_size, max_size)
+    if not compressible:
+        return rng.randbytes(size)
+    line = f"Key{rng.randint(0, 99)}=Value_{rng.randint(0, 9999)}\r\n".encode("ascii")
+    return (line * (size // len(line) + 1))[:size]
+
+
+def generate_folder(folder, count, seed=DEFAULT_SEED):
+    """Criar `count` arquivos sintéticos com tamanhos e compressibilidade variados"""
+    rng = random.Random(seed)
+    weights = [profile[0] for profile in FILE_PROFILES]
+    total_bytes = 0
+
+    for i in range(count):
+        _, ext, min_size, max_size, compressible = rng.choices(FILE_PROFILES, weights)[0]
+        folder_name = rng.choice(FOLDERS)
+        name = f"{'Mesh' if 'Meshes' in folder_name else 'Asset'}_{i:06d}{ext}"
+
+        file_path = Path(folder) / folder_name / f"Group{i % 100:02d}" / name
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        data = make_payload(rng, min_size, max_size, compressible)
+        with open(file_path, "wb") as f:
+            f.write(data)
+        total_bytes += len(data)
+
+    return total_bytes
+
+
+class BenchmarkResult:
+    """Tempo e vazão de uma etapa"""
+    def __init__(self, name, seconds, files=0, bytes_count=0):
+        self.name = name
+        self.seconds = seconds
+        self.files = files
+        self.bytes_count = bytes_count
+
+    def to_dict(self):
+        return {
+            "seconds": round(self.seconds, 6),
+            "files": self.files,
+            "bytes": self.bytes_count,
+            "files_per_second": round(self.files / self.seconds, 1) if self.seconds > 0 else None,
+            "mb_per_second": round(self.bytes_count / (1024 * 1024) / self.seconds, 2) if self.seconds > 0 else None,
+            # Pico do processo até o fim desta etapa (inclui as anteriores), não o da etapa isolada
+            "peak_rss_cumulative": get_peak_rss(),
+        }
+
+
+def bench_create_from_folder(folder, output_path):
+    """Mesmo caminho de do_create_pak_from_folder da interface"""
+    start = time.perf_counter()
+    pak = PakFile()
+    pak.mount_point = "../../../"
+    pak.version = 9
+
+    folder = Path(folder)
+    files_added = 0
+    bytes_done = 0
+    for file_path in folder.rglob('*'):
+        if file_path.is_file():
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            pak.add_file(file_path.relative_to(folder).as_posix(), data)
+            files_added += 1
+            bytes_done += len(data)
+
+    atomic_write_pak(pak, output_path)
+    return BenchmarkResult("create_from_folder", time.perf_counter() - start, files_added, bytes_done)
+
+
+def bench_compress(pak_path, output_path, compression=COMPRESSION.ZLIB):
+    """Gerar a cópia comprimida do pak (mesmo caminho da conversão da interface)"""
+    start = time.perf_counter()
+    stats = transcode_pak(pak_path, output_path, compression=compression)
+    return BenchmarkResult("compress_zlib", time.perf_counter() - start, stats.files, stats.bytes_in)
+
+
+def bench_open(pak_path, name="open"):
+    """Mesmo caminho de load_pak_file da interface"""
+    start = time.perf_counter()
+    pak = PakFile()
+    pak.read(pak_path)
+    return pak, BenchmarkResult(name, time.perf_counter() - start, pak.count, os.path.getsize(pak_path))
+
+
+def bench_list(pak):
+    """Montar a tabela de entradas e contar por extensão (como list_pak_contents/show_info)"""
+    start = time.perf_counter()
+    table = EntryTable.from_entries(get_pak_entries(pak))
+    table.count_by_extension()
+    return table, BenchmarkResult("list", time.perf_counter() - start, len(table))
+
+
+def bench_filter(table, term=FILTER_TERM):
+    """Filtrar por substring (como filter_files)"""
+    start = time.perf_counter()
+    table.filter(term)
+    return BenchmarkResult("filter", time.perf_counter() - start, len(table))
+
+
+def bench_extract_all(pak, pak_path, files, output_dir, name="extract_all"):
+    """Mesmo caminho de do_extract_all da interface"""
+    snapshot = PakSnapshot(pak, pak_path, files, {}, {}, set())
+    start = time.perf_counter()
+    bytes_done = 0
+
+    def extract_one(file_path):
+        data = snapshot.read(file_path)
+        output_path = Path(output_dir) / file_path.lstrip('/')
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+    try:
+        for file_path, size, error in parallel_map(extract_one, files):
+            if error is not None:
+                raise error
+            bytes_done += size
+    finally:
+        snapshot.close()
+    return BenchmarkResult(name, time.perf_counter() - start, len(files), bytes_done)
+
+
+def bench_save_with_edits(pak, pak_path, files, output_path, seed=DEFAULT_SEED):
+    """Mesmo caminho de do_save_pak com uma fração das entradas alterada"""
+    rng = random.Random(seed + 1)
+    edits = max(1, int(len(files) * EDIT_FRACTION))
+    sample = rng.sample(files, min(len(files), edits * 2))
+
+    modified = {f: b"modified=1\r\n" * 64 for f in sample[:edits]}
+    deleted = set(sample[edits:])
+    added = {f"Content/Added/New_{i:06d}.ini": b"added=1\r\n" * 64 for i in range(edits)}
+
+    snapshot = PakSnapshot(pak, pak_path, files, added, modified, deleted)
+    start = time.perf_counter()
+    bytes_done = 0
+    try:
+        with PakWriter(output_path, get_pak_version(pak), pak.mount_point) as writer:
+            all_files = sorted(snapshot.all_files())
+            for file_path in all_files:
+                data = snapshot.read(file_path)
+                writer.add_file(file_path, data)
+                bytes_done += len(data)
+            snapshot.close()
+    finally:
+        snapshot.close()
+    return BenchmarkResult("save_with_edits", time.perf_counter() - start, len(all_files), bytes_done)
+
+
+def run_size(count, work_dir, seed=DEFAULT_SEED):
+    """Executar todas as etapas para um tamanho (chamado em processo novo)"""
+    work_dir = Path(work_dir)
+    source_dir = work_dir / "source"
+    pak_path = work_dir / f"synthetic_{count}.pak"
+
+    start = time.perf_counter()
+    source_bytes = generate_folder(source_dir, count, seed)
+    generate_seconds = time.perf_counter() - start
+
+    results = []
+    results.append(bench_create_from_folder(source_dir, pak_path))
+    # Os arquivos de origem não são mais necessários: liberar espaço antes de extrair
+    shutil.rmtree(source_dir, ignore_errors=True)
+
+    pak, result = bench_open(str(pak_path))
+    results.append(result)
+    table, result = bench_list(pak)
+    files = list(table.iter_files())
+    results.append(result)
+    results.append(bench_filter(table))
+    results.append(bench_extract_all(pak, str(pak_path), files, work_dir / "extracted"))
+    shutil.rmtree(work_dir / "extracted", ignore_errors=True)
+    results.append(bench_save_with_edits(pak, str(pak_path), files, work_dir / f"edited_{count}.pak"))
+
+    # Mesmo conteúdo comprimido com zlib: abrir e extrair passam pela descompressão
+    zlib_path = work_dir / f"synthetic_{count}_zlib.pak"
+    results.append(bench_compress(str(pak_path), str(zlib_path)))
+    zlib_pak, result = bench_open(str(zlib_path), "open_zlib")
+    results.append(result)
+    results.append(bench_extract_all(zlib_pak, str(zlib_path), files, work_dir / "extracted", "extract_all_zlib"))
+    shutil.rmtree(work_dir / "extracted", ignore_errors=True)
+
+    return {
+        "entries": count,
+        "source_bytes": source_bytes,
+        "pak_bytes": os.path.getsize(pak_path),
+        "zlib_pak_bytes": os.path.getsize(zlib_path),
+        "generate_seconds": round(generate_seconds, 3),
+        "steps": {result.name: result.to_dict() for result in results},
+        "peak_rss": get_peak_rss(),
+    }
+
+
+def run_size_in_subprocess(count, seed, keep=False):
+    """Cada tamanho roda em processo novo para que o pico de memória não se acumule"""
+    work_dir = tempfile.mkdtemp(prefix=f"pak_bench_{count}_")
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-one", str(count),
+             "--work-dir", work_dir, "--seed", str(seed)],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            return {"entries": count, "error": completed.stderr.strip()[-2000:]}
+        return json.loads(completed.stdout)
+    finally:
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def print_summary(report):
+    """Tabela resumida no terminal"""
+    for run in report["runs"]:
+        if "error" in run:
+            print(f"{run['entries']:>8} entradas: ERRO {run['error'].splitlines()[-1] if run['error'] else ''}")
+            continue
+        print(f"{run['entries']:>8} entradas ({run['pak_bytes'] / (1024 * 1024):.1f} MB)")
+        for name, step in run["steps"].items():
+            mb_per_second = f"{step['mb_per_second']:.1f} MB/s" if step["mb_per_second"] and step["bytes"] else ""
+            print(f"    {name:<20} {step['seconds']:>9.3f}s  {step['files_per_second'] or 0:>10.0f} arq/s  {mb_per_second}")
+        if run["peak_rss"]:
+            print(f"    pico de memória: {run['peak_rss'] / (1024 * 1024):.0f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do PAK Tool com paks sintéticos")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Quantidades de entradas separadas por vírgula")
+    parser.add_argument("--output", default="pak_benchmark.json", help="Arquivo JSON de resultados")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--keep", action="store_true", help="Manter os arquivos temporários")
+    parser.add_argument("--run-one", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    # Processo filho: um único tamanho, resultado em JSON na saída padrão
+    if args.run_one:
+        json.dump(run_size(args.run_one, args.work_dir, args.seed), sys.stdout)
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "pyuepak_version": get_pyuepak_version(),
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "runs": [],
+    }
+
+    for count in sizes:
+        print(f"Executando benchmark com {count} entradas...", flush=True)
+        report["runs"].append(run_size_in_subprocess(count, args.seed, args.keep))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print_summary(report)
+    print(f"Resultados gravados em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Divisão da saída em vários paks com tamanho máximo (partes para distribuição)
+As entradas são distribuídas por pasta (first-fit decrescente) e as partes são gravadas
+em paralelo; um manifesto JSON indica em qual parte ficou cada caminho
+
+Uso:
+    python pak_chunks.py PastaOuJogo.pak -o Jogo.pak [--max-size 2048] [--key 0x...]
+"""
+
+from pathlib import Path
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+from pyuepak.utils import COMPRESSION
+from pyuepak.version import PakVersion
+
+from pak_crypto import align, parse_key
+from pak_entries import get_parent
+from pak_io import (AtomicFileWriter, PakEntryReader, get_pak_mount_point, get_pak_version,
+                    parallel_map, DEFAULT_WORKERS)
+from pak_writer import PakWriter, header_size
+
+
+CHUNKS_FORMAT = 1
+
+# Limite padrão de cada parte (canais de distribuição e retomada de download)
+DEFAULT_CHUNK_SIZE = 2 * 1024 * 1024 * 1024
+
+# Registro de cada entrada no índice além do caminho (estimativa pessimista)
+INDEX_ENTRY_OVERHEAD = 64
+# Mount point, footer e tabelas de hash do índice
+PAK_OVERHEAD = 64 * 1024
+
+ROOT_MOUNT_POINT = "../../../"
+
+
+class Chunk:
+    """Uma parte: arquivos em ordem de caminho e tamanho estimado em disco"""
+    def __init__(self, index):
+        self.index = index
+        self.files = []
+        self.size = PAK_OVERHEAD
+
+
+def chunk_path(output_path, index):
+    """Caminho da parte: Jogo.pak -> Jogo_000.pak (o sufixo _P continua no fim)"""
+    path = Path(output_path)
+    stem = path.stem
+    patch_suffix = ""
+    if stem.upper().endswith("_P"):
+        stem, patch_suffix = stem[:-2], stem[-2:]
+    return str(path.with_name(f"{stem}_{index:03d}{patch_suffix}{path.suffix or '.pak'}"))
+
+
+def chunks_manifest_path(output_path):
+    """Manifesto das partes ao lado delas: Jogo.pak -> Jogo.chunks.json"""
+    return str(Path(output_path).with_suffix(".chunks.json"))
+
+
+def estimate_entry_size(file_path, size, version, encrypt=False):
+    """Bytes que a entrada ocupa no pak (sem compressão), incluindo o registro no índice"""
+    stored = align(size) if encrypt else size
+    return (header_size(version, COMPRESSION.NONE, 0) + stored
+            + len(file_path.encode("utf-8")) + INDEX_ENTRY_OVERHEAD)
+
+
+def plan_chunks(file_sizes, max_size=DEFAULT_CHUNK_SIZE, version=PakVersion.V11, encrypt=False):
+    """Distribuir pares (caminho, tamanho) em partes de até max_size bytes
+
+    Os arquivos de uma pasta ficam na mesma parte quando a pasta cabe inteira; pastas
+    maiores são divididas em ordem de caminho. Um arquivo maior que o limite fica
+    sozinho em uma parte (que passa do limite).
+    """
+    budget = max_size - PAK_OVERHEAD
+    if budget <= 0:
+        raise ValueError(f"Tamanho máximo muito pequeno: {max_size} bytes")
+
+    folders = {}
+    for file_path, size in file_sizes:
+        folders.setdefault(get_parent(file_path), []).append(
+            (file_path, estimate_entry_size(file_path, size, version, encrypt)))
+
+    # Pedaços que precisam ficar juntos: a pasta inteira ou fatias dela
+    pieces = []
+    for folder, files in folders.items():
+        files.sort()
+        piece, piece_size = [], 0
+        for file_path, size in files:
+            if piece and piece_size + size > budget:
+                pieces.append((piece_size, folder, piece))
+                piece, piece_size = [], 0
+            piece.append(file_path)
+            piece_size += size
+        pieces.append((piece_size, folder, piece))
+
+    # First-fit decrescente: pedaços maiores primeiro, cada um na primeira parte onde couber
+    pieces.sort(key=lambda piece: (-piece[0], piece[1]))
+    chunks = []
+    for piece_size, folder, files in pieces:
+        for chunk in chunks:
+            if chunk.size + piece_size <= max_size:
+                break
+        else:
+            chunk = Chunk(len(chunks))
+            chunks.append(chunk)
+        chunk.files.extend(files)
+        chunk.size += piece_size
+
+    for chunk in chunks:
+        chunk.files.sort()
+    return chunks
+
+
+def write_chunks(chunks, output_path, read_file, version=PakVersion.V11, mount_point=ROOT_MOUNT_POINT,
+                 key=None, encrypt=False, guid=None, workers=None, cancel_event=None,
+                 on_progress=None, release_sources=None, backup=False):
+    """Gravar cada parte com seu próprio PakWriter, várias partes ao mesmo tempo
+
+    read_file(caminho) devolve o conteúdo e é chamado de várias threads; on_progress(arquivos,
+    bytes) também. release_sources() é chamado antes dos renames (a origem pode ser um destino).
+    Nenhum destino é alterado até todas as partes estarem gravadas.
+    Devolve os caminhos das partes ou None se cancelado.
+    """
+    writers = {}
+
+    def write_chunk(chunk):
+        # Executado nos workers: uma parte inteira por thread
+        writer = PakWriter(chunk_path(output_path, chunk.index), version, mount_point, key=key,
+                           encrypt=encrypt, guid=guid, backup=backup)
+        writers[chunk.index] = writer
+        for file_path in chunk.files:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            data = read_file(file_path)
+            writer.add_file(file_path, data)
+            if on_progress:
+                on_progress(1, len(data))
+
+    try:
+        workers = min(workers or DEFAULT_WORKERS, max(len(chunks), 1))
+        for chunk, _, error in parallel_map(write_chunk, chunks, workers, cancel_event):
+            if error is not None:
+                raise RuntimeError(f"{Path(chunk_path(output_path, chunk.index)).name}: {error}") from error
+
+        if release_sources:
+            release_sources()
+
+        if cancel_event is not None and cancel_event.is_set():
+            for writer in writers.values():
+                writer.discard()
+            return None
+
+        for index in sorted(writers):
+            writers[index].close()
+    except BaseException:
+        # Partes já renomeadas ficam; as demais voltam ao estado anterior
+        for writer in writers.values():
+            writer.discard()
+        raise
+    return [chunk_path(output_path, chunk.index) for chunk in chunks]
+
+
+def remove_stale_chunks(manifest_path, chunk_paths):
+    """Apagar partes de uma divisão anterior que não existem mais (ex: eram 5, agora são 3)"""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return []
+
+    directory = Path(manifest_path).parent
+    keep = {Path(path).name for path in chunk_paths}
+    removed = []
+    for chunk in previous.get("chunks", []):
+        name = Path(chunk.get("name", "")).name
+        if name and name not in keep and (directory / name).is_file():
+            os.remove(directory / name)
+            removed.append(name)
+    return removed
+
+
+def write_chunks_manifest(chunks, chunk_paths, manifest_path, max_size):
+    """Gravar o manifesto: partes (nome, arquivos, tamanho) e a parte de cada caminho"""
+    files = {}
+    described = []
+    for chunk, path in zip(chunks, chunk_paths):
+        name = Path(path).name
+        described.append({"name": name, "files": len(chunk.files), "size": os.path.getsize(path)})
+        for file_path in chunk.files:
+            files[file_path] = name
+
+    with AtomicFileWriter(manifest_path) as writer:
+        f = io.TextIOWrapper(writer.open(), encoding="utf-8")
+        json.dump({
+            "format": CHUNKS_FORMAT,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "max_size": max_size,
+            "chunks": described,
+            "files": dict(sorted(files.items())),
+        }, f, indent=2, ensure_ascii=False)
+        # O AtomicFileWriter faz flush/fsync no arquivo binário por baixo
+        f.flush()
+        f.detach()
+
+
+def split_output(file_sizes, output_path, read_file, max_size=DEFAULT_CHUNK_SIZE, **options):
+    """Planejar, gravar as partes e o manifesto; devolve (caminhos, manifesto) ou None se cancelado"""
+    version = PakVersion(options.get("version", PakVersion.V11))
+    chunks = plan_chunks(file_sizes, max_size, version, options.get("encrypt", False))
+    chunk_paths = write_chunks(chunks, output_path, read_file, **options)
+    if chunk_paths is None:
+        return None
+
+    manifest_path = chunks_manifest_path(output_path)
+    remove_stale_chunks(manifest_path, chunk_paths)
+    write_chunks_manifest(chunks, chunk_paths, manifest_path, max_size)
+    return chunk_paths, manifest_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gravar uma pasta ou um pak em partes com tamanho máximo")
+    parser.add_argument("source", help="Pasta com os arquivos ou .pak/.utoc de origem")
+    parser.add_argument("-o", "--output", required=True, help="Nome base das partes (ex: Jogo.pak)")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_CHUNK_SIZE // (1024 * 1024),
+                        help="Tamanho máximo de cada parte em MB (padrão: 2048)")
+    parser.add_argument("--key", help="Chave AES da origem (hex ou base64)")
+    parser.add_argument("--encrypt", action="store_true", help="Criptografar as partes com a mesma chave")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    key = parse_key(args.key) if args.key else None
+    options = dict(key=key if args.encrypt else None, encrypt=args.encrypt, workers=args.workers)
+    start = time.perf_counter()
+
+    source = Path(args.source)
+    if source.is_dir():
+        files = {path.relative_to(source).as_posix(): path for path in source.rglob("*") if path.is_file()}
+        file_sizes = [(file_path, path.stat().st_size) for file_path, path in files.items()]
+        result = split_output(file_sizes, args.output, lambda file_path: files[file_path].read_bytes(),
+                              args.max_size * 1024 * 1024, version=PakVersion.V11, **options)
+    else:
+        from pak_transcode import open_source
+
+        pak = open_source(source, key)
+        reader = PakEntryReader(pak, source)
+        file_sizes = [(file_path, entry.size) for file_path, entry in reader.entries.items()]
+        # Contêiner IoStore vira pak da versão mais recente
+        version = PakVersion.V11 if reader.is_iostore else get_pak_version(pak)
+        try:
+            result = split_output(file_sizes, args.output, reader.read, args.max_size * 1024 * 1024,
+                                  version=version, mount_point=get_pak_mount_point(pak),
+                                  release_sources=reader.close, **options)
+        finally:
+            reader.close()
+
+    chunk_paths, manifest_path = result
+    print(f"{len(file_sizes)} arquivos em {len(chunk_paths)} partes ({time.perf_counter() - start:.1f}s)")
+    for path in chunk_paths:
+        print(f"  {Path(path).name}: {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+    print(f"-> {manifest_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
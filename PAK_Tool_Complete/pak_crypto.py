@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Criptografia AES de paks do Unreal Engine
+Repositório de chaves por GUID, decriptação vetorizada das entradas e criptografia na gravação
+"""
+
+from pathlib import Path
+import base64
+import json
+import os
+import tempfile
+
+# cryptography e pyuepak são importados só quando usados: o cadastro de chaves
+# é criado na abertura da janela e não deve atrasar a primeira pintura
+
+
+AES_BLOCK_SIZE = 16
+KEY_SIZE = 32
+
+# GUID zerado: chave padrão do projeto (paks sem GUID próprio)
+DEFAULT_GUID = "0" * 32
+ZERO_KEY = bytes(KEY_SIZE)
+
+KEYS_PATH = Path.home() / ".pak_tool" / "keys.json"
+
+# Entradas grandes são decriptadas em fatias (menos memória temporária)
+DECRYPT_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def align(size):
+    """Arredondar para o tamanho de bloco AES"""
+    return (size + AES_BLOCK_SIZE - 1) & ~(AES_BLOCK_SIZE - 1)
+
+
+def parse_key(text):
+    """Converter chave em hex (com ou sem 0x) ou base64 para 32 bytes"""
+    if isinstance(text, bytes):
+        key = text
+    else:
+        text = text.strip()
+        hex_text = text[2:] if text.lower().startswith("0x") else text
+        try:
+            key = bytes.fromhex(hex_text)
+        except ValueError:
+            try:
+                key = base64.b64decode(text, validate=True)
+            except Exception:
+                raise ValueError("Chave inválida: use hexadecimal ou base64")
+
+    if len(key) != KEY_SIZE:
+        raise ValueError(f"Chave inválida: {len(key)} bytes (esperado {KEY_SIZE})")
+    return key
+
+
+def format_guid(guid_bytes):
+    """GUID do footer como texto hexadecimal"""
+    return guid_bytes.hex().upper() if guid_bytes else DEFAULT_GUID
+
+
+def pad_blocks(data):
+    """Completar até múltiplo de 16 repetindo o próprio conteúdo (como o UnrealPak)"""
+    remainder = len(data) % AES_BLOCK_SIZE
+    if not remainder or not data:
+        return bytes(data)
+    padding = AES_BLOCK_SIZE - remainder
+    repeated = (bytes(data) * (padding // len(data) + 1))[:padding]
+    return bytes(data) + repeated
+
+
+def decrypt_blocks(key, data):
+    """Decriptar AES-ECB em fatias grandes (uma chamada por fatia, não por bloco)"""
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    decryptor = Cipher(algorithms.AES(key), modes.ECB()).decryptor()
+    if len(data) <= DECRYPT_CHUNK_SIZE:
+        return decryptor.update(data) + decryptor.finalize()
+
+    view = memoryview(data)
+    output = bytearray()
+    for start in range(0, len(data), DECRYPT_CHUNK_SIZE):
+        output += decryptor.update(view[start:start + DECRYPT_CHUNK_SIZE])
+    output += decryptor.finalize()
+    return bytes(output)
+
+
+def encrypt_blocks(key, data):
+    """Criptografar AES-ECB (data já alinhado a 16 bytes)"""
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    encryptor = Cipher(algorithms.AES(key), modes.ECB()).encryptor()
+    return encryptor.update(data) + encryptor.finalize()
+
+
+class PakEncryptionInfo:
+    """Informações de criptografia lidas do footer"""
+    def __init__(self, guid, index_encrypted, version):
+        self.guid = guid
+        self.index_encrypted = index_encrypted
+        self.version = version
+
+
+def read_encryption_info(pak_path):
+    """Ler GUID da chave e se o índice é criptografado (sem precisar da chave)"""
+    from pyuepak.file_io import Reader
+    from pyuepak.footer import Footer
+    from pyuepak.version import PakVersion
+    reader = Reader(str(pak_path))
+    try:
+        footer = Footer()
+        footer.read(reader)
+    finally:
+        reader.close()
+    guid = format_guid(footer.encryption_key) if footer.version >= PakVersion.V7 else DEFAULT_GUID
+    return PakEncryptionInfo(guid, bool(footer.is_encrypted), footer.version)
+
+
+def count_encrypted_entries(pak):
+    """Quantidade de entradas criptografadas no índice"""
+    entries = getattr(getattr(pak, "_index", None), "entrys", None) or {}
+    return sum(1 for entry in entries.values() if entry.is_encrypted)
+
+
+def read_encrypted_entry(entry, reader, version, key):
+    """Ler uma entrada criptografada decriptando o payload de uma vez
+
+    O pyuepak decripta bloco a bloco de 16 bytes em Python; aqui a decriptação é
+    feita em poucas chamadas e a descompressão reaproveita o código do pyuepak.
+    """
+    from pyuepak.entry import Entry
+    from pyuepak.file_io import Reader
+    from pyuepak.utils import COMPRESSION
+    from pyuepak.version import PakVersion
+
+    if key is None or key == ZERO_KEY:
+        raise ValueError("Chave AES necessária para ler esta entrada")
+
+    reader.set_pos(entry.offset)
+    Entry.read(reader, version)
+    header_size = reader.get_pos() - entry.offset
+
+    reader.set_pos(entry.offset)
+    header = reader.read(header_size)
+    data = decrypt_blocks(key, reader.read(align(entry.compressed_size)))[:entry.compressed_size]
+
+    if entry.compression == COMPRESSION.NONE:
+        return data
+
+    if version < PakVersion.V5:
+        # Blocos com posição absoluta no arquivo: usar o caminho do pyuepak
+        return entry.read_file(reader, version, key)
+
+    # Entrada equivalente sem criptografia, lida de um buffer em memória
+    plain = Entry()
+    plain.offset = 0
+    plain.size = entry.size
+    plain.compressed_size = entry.compressed_size
+    plain.compression = entry.compression
+    plain.compression_block_size = entry.compression_block_size
+    plain.blocks = entry.blocks
+    with Reader(header + data) as memory_reader:
+        return plain.read_file(memory_reader, version, key)
+
+
+class KeyStore:
+    """Chaves AES por GUID de pak, gravadas em ~/.pak_tool/keys.json"""
+    def __init__(self, path=KEYS_PATH):
+        self.path = Path(path)
+        self.keys = {}  # GUID (hex maiúsculo) -> chave em hex
+
+    def load(self):
+        """Carregar as chaves salvas (arquivo ausente = vazio)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.keys = {guid.upper(): key for guid, key in json.load(f).items()}
+        except (OSError, ValueError):
+            self.keys = {}
+        return self
+
+    def save(self):
+        """Gravar as chaves (somente leitura para o usuário quando possível)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # mkstemp já cria o arquivo com 0o600: as chaves nunca ficam legíveis por outros usuários
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".keys-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.keys, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, guid):
+        """Chave do GUID (ou a chave padrão); None se nenhuma estiver cadastrada"""
+        for candidate in (guid.upper(), DEFAULT_GUID):
+            if candidate in self.keys:
+                return parse_key(self.keys[candidate])
+        return None
+
+    def set(self, guid, key):
+        self.keys[guid.upper()] = "0x" + parse_key(key).hex().upper()
+
+    def remove(self, guid):
+        self.keys.pop(guid.upper(), None)
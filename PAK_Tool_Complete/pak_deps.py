@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Índice de dependências entre pacotes (.uasset/.umap) de um pak
+Lê só o cabeçalho de cada pacote (tabelas de nomes e de imports), em paralelo, e monta o
+índice reverso: quem referencia cada pacote. O resultado fica em cache por fingerprint do pak.
+
+Uso:
+    python pak_deps.py Jogo.pak [Jogo/Content/Props/Cadeira.uasset ...] [--key 0x...]
+"""
+
+from pathlib import Path
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+from pak_inspect import UE_PACKAGE_TAG
+from pak_io import parallel_map, DEFAULT_WORKERS
+from pak_search import get_pak_fingerprint
+
+
+INDEX_FORMAT = 1
+INDEX_DIR = Path.home() / ".pak_tool" / "deps_index"
+
+ROOT_MOUNT_POINT = "../../../"
+
+# Extensões com cabeçalho de pacote e as que pertencem ao mesmo pacote
+HEADER_EXTENSIONS = (".uasset", ".umap")
+PACKAGE_EXTENSIONS = HEADER_EXTENSIONS + (".uexp", ".ubulk", ".uptnl")
+
+# O resumo do pacote cabe folgado aqui; o restante do cabeçalho só é lido se for maior
+HEAD_SIZE = 64 * 1024
+MAX_STRING_LENGTH = 4096
+
+# Flag de pacote cooked (sem dados de editor)
+PKG_FILTER_EDITOR_ONLY = 0x80000000
+
+# Versões de objeto que mudam o layout do resumo e dos imports
+VER_UE4_SERIALIZE_TEXT_IN_PACKAGES = 459
+VER_UE4_NAME_HASHES_SERIALIZED = 504
+VER_UE4_ADDED_PACKAGE_SUMMARY_LOCALIZATION_ID = 516
+VER_UE4_NON_OUTER_PACKAGE_IMPORT = 520
+VER_UE4_LATEST = 522
+VER_UE5_OPTIONAL_RESOURCES = 1003
+VER_UE5_ADD_SOFTOBJECTPATH_LIST = 1008
+VER_UE5_PACKAGE_SAVED_HASH = 1016
+
+# Pacotes cooked são "unversioned": as versões abaixo são tentadas da mais nova para a mais antiga
+UNVERSIONED_UE5 = (VER_UE5_PACKAGE_SAVED_HASH, VER_UE5_ADD_SOFTOBJECTPATH_LIST,
+                   VER_UE5_OPTIONAL_RESOURCES, 1000)
+
+KIND_HARD = "forte"  # Import: o pacote não carrega sem a dependência
+KIND_SOFT = "fraca"  # Caminho no nome (soft reference): carregado sob demanda
+
+
+class PackageFormatError(ValueError):
+    """Cabeçalho que não é de um pacote legado do Unreal ou com layout não suportado"""
+
+
+def is_package_header(file_path):
+    return file_path.lower().endswith(HEADER_EXTENSIONS)
+
+
+def package_name_for_path(file_path, mount_point=ROOT_MOUNT_POINT):
+    """Nome do pacote de uma entrada: Jogo/Content/Props/Cadeira.uasset -> /Game/Props/Cadeira
+
+    Plugins usam o nome do plugin (/MeuPlugin/...) e o Content do engine vira /Engine.
+    None se o arquivo não for de um pacote ou estiver fora de uma pasta Content.
+    """
+    if not file_path.lower().endswith(PACKAGE_EXTENSIONS):
+        return None
+    full_path = (mount_point or "").replace("\\", "/")
+    while full_path.startswith("../"):
+        full_path = full_path[3:]
+    full_path = (full_path.rstrip("/") + "/" + file_path.replace("\\", "/").lstrip("/")).lstrip("/")
+
+    parts = full_path.split("/")
+    lowered = [part.lower() for part in parts]
+    content = [i for i, part in enumerate(lowered[:-1]) if part == "content"]
+    if not content:
+        return None
+    root = lowered[:content[-1]]
+    if "plugins" in root:
+        prefix = parts[content[-1] - 1]
+    elif root[:1] == ["engine"]:
+        prefix = "Engine"
+    else:
+        prefix = "Game"
+    relative = parts[content[-1] + 1:]
+    relative[-1] = os.path.splitext(relative[-1])[0]
+    return "/" + prefix + "/" + "/".join(relative)
+
+
+def _package_key(object_path):
+    """/Game/Props/Cadeira.Cadeira:Sub -> /game/props/cadeira (comparação sem maiúsculas)"""
+    return object_path.split(":", 1)[0].split(".", 1)[0].lower()
+
+
+def _read_fstring(data, offset):
+    """FString do Unreal (tamanho negativo = UTF-16); levanta ValueError se implausível"""
+    (length,) = struct.unpack_from("<i", data, offset)
+    offset += 4
+    if abs(length) > MAX_STRING_LENGTH:
+        raise PackageFormatError(f"String com tamanho implausível: {length}")
+    if length < 0:
+        end = offset - length * 2
+        if end > len(data):
+            raise struct.error("String fora do trecho lido")
+        return data[offset:end].decode("utf-16-le").rstrip("\0"), end
+    end = offset + length
+    if end > len(data):
+        raise struct.error("String fora do trecho lido")
+    return data[offset:end].decode("latin-1").rstrip("\0"), end
+
+
+class PackageSummary:
+    """Campos do FPackageFileSummary necessários para achar as tabelas"""
+    def __init__(self, ue4_version, ue5_version):
+        self.ue4_version = ue4_version
+        self.ue5_version = ue5_version
+        self.header_size = 0
+        self.flags = 0
+        self.name_count = self.name_offset = 0
+        self.import_count = self.import_offset = 0
+
+    @property
+    def editor_only_filtered(self):
+        return bool(self.flags & PKG_FILTER_EDITOR_ONLY)
+
+    @property
+    def import_size(self):
+        size = 28  # ClassPackage, ClassName, OuterIndex, ObjectName
+        if self.ue4_version >= VER_UE4_NON_OUTER_PACKAGE_IMPORT and not self.editor_only_filtered:
+            size += 8  # PackageName
+        if self.ue5_version >= VER_UE5_OPTIONAL_RESOURCES:
+            size += 4  # bImportOptional
+        return size
+
+    def is_plausible(self, file_size, summary_end):
+        return (summary_end <= self.header_size <= file_size
+                and 0 <= self.name_count and 0 <= self.import_count
+                and summary_end <= self.name_offset <= self.header_size
+                and summary_end <= self.import_offset
+                and self.import_offset + self.import_count * self.import_size <= self.header_size)
+
+
+def _skip_custom_versions(data, offset, legacy_version):
+    (count,) = struct.unpack_from("<i", data, offset)
+    offset += 4
+    if count < 0 or count > 1024:
+        raise PackageFormatError(f"Versões customizadas implausíveis: {count}")
+    if legacy_version == -2:
+        return offset + count * 8  # Enum + versão
+    if legacy_version >= -5:
+        for _ in range(count):
+            _, offset = _read_fstring(data, offset + 20)  # GUID + versão + nome
+        return offset
+    return offset + count * 20  # GUID + versão
+
+
+def _read_summary(data, offset, ue4_version, ue5_version):
+    """Resumo a partir do fim das versões customizadas; devolve (resumo, posição final)"""
+    summary = PackageSummary(ue4_version, ue5_version)
+    if ue5_version >= VER_UE5_PACKAGE_SAVED_HASH:
+        offset += 20  # SavedHash
+    (summary.header_size,) = struct.unpack_from("<i", data, offset)
+    _, offset = _read_fstring(data, offset + 4)  # Nome da pasta/pacote
+    summary.flags, summary.name_count, summary.name_offset = struct.unpack_from("<Iii", data, offset)
+    offset += 12
+    if ue5_version >= VER_UE5_ADD_SOFTOBJECTPATH_LIST:
+        offset += 8
+    if ue4_version >= VER_UE4_ADDED_PACKAGE_SUMMARY_LOCALIZATION_ID and not summary.editor_only_filtered:
+        _, offset = _read_fstring(data, offset)
+    if ue4_version >= VER_UE4_SERIALIZE_TEXT_IN_PACKAGES:
+        offset += 8
+    offset += 8  # Exports
+    summary.import_count, summary.import_offset = struct.unpack_from("<ii", data, offset)
+    return summary, offset + 8
+
+
+def _read_names(data, summary):
+    names = []
+    offset = summary.name_offset
+    for _ in range(summary.name_count):
+        name, offset = _read_fstring(data, offset)
+        if summary.ue4_version >= VER_UE4_NAME_HASHES_SERIALIZED:
+            offset += 4
+        names.append(name)
+    if offset > summary.header_size:
+        raise PackageFormatError("Tabela de nomes passa do cabeçalho")
+    return names
+
+
+def _read_imports(data, summary, names):
+    """Imports como (pacote da classe, classe, outer, nome do objeto)"""
+    def fname(index, number):
+        if not 0 <= index < len(names):
+            raise PackageFormatError(f"Índice de nome inválido: {index}")
+        return names[index] + (f"_{number - 1}" if number else "")
+
+    imports = []
+    offset = summary.import_offset
+    for _ in range(summary.import_count):
+        values = struct.unpack_from("<iiiiiii", data, offset)
+        class_package = fname(values[0], values[1])
+        if not class_package.startswith("/"):
+            raise PackageFormatError(f"Pacote de classe inválido: {class_package}")
+        imports.append((class_package, fname(values[2], values[3]), values[4], fname(values[5], values[6])))
+        offset += summary.import_size
+    return imports
+
+
+def read_package_header(read, size):
+    """Tabelas de nomes e de imports de um pacote; read(início, tamanho) lê da entrada
+
+    Devolve (nomes, imports). Só o cabeçalho é lido (normalmente os primeiros KB).
+    """
+    data = read(0, min(size, HEAD_SIZE))
+    if len(data) < 32 or struct.unpack_from("<I", data)[0] != UE_PACKAGE_TAG:
+        raise PackageFormatError("Sem a tag de pacote do Unreal (IoStore/Zen ou outro formato)")
+
+    (legacy_version,) = struct.unpack_from("<i", data, 4)
+    if not -9 <= legacy_version <= -2:
+        raise PackageFormatError(f"Versão legada não suportada: {legacy_version}")
+    offset = 8 if legacy_version == -4 else 12  # -4 não grava a versão do UE3
+    (ue4_version,) = struct.unpack_from("<i", data, offset)
+    offset += 4
+    ue5_version = 0
+    if legacy_version <= -8:
+        (ue5_version,) = struct.unpack_from("<i", data, offset)
+        offset += 4
+    offset = _skip_custom_versions(data, offset + 4, legacy_version)  # Depois da versão do licenciado
+
+    if ue4_version or ue5_version:
+        candidates = [(ue4_version, ue5_version)]
+    elif legacy_version <= -8:
+        candidates = [(VER_UE4_LATEST, ue5) for ue5 in UNVERSIONED_UE5]
+    else:
+        candidates = [(VER_UE4_LATEST, 0)]
+
+    for ue4, ue5 in candidates:
+        try:
+            summary, summary_end = _read_summary(data, offset, ue4, ue5)
+            if not summary.is_plausible(size, summary_end):
+                continue
+            if summary.header_size > len(data):
+                data = read(0, summary.header_size)
+            names = _read_names(data, summary)
+            return names, _read_imports(data, summary, names)
+        except (struct.error, UnicodeDecodeError, PackageFormatError):
+            continue
+    raise PackageFormatError("Layout do cabeçalho não reconhecido")
+
+
+def read_package_dependencies(read, size, package_name=None):
+    """Pacotes referenciados: (fortes, fracas), listas ordenadas sem /Script (classes nativas)
+
+    Fortes são os imports de pacote; fracas são caminhos na tabela de nomes que não são
+    imports (FSoftObjectPath grava o caminho como nome).
+    """
+    names, imports = read_package_header(read, size)
+    own = package_name.lower() if package_name else None
+
+    hard = {}
+    for _, class_name, outer_index, object_name in imports:
+        if outer_index == 0 and class_name == "Package":
+            hard.setdefault(object_name.lower(), object_name)
+    soft = {}
+    for name in names:
+        if not name.startswith("/") or name.count("/") < 2 or " " in name:
+            continue
+        key = _package_key(name)
+        if key not in hard:
+            soft.setdefault(key, name.split(":", 1)[0].split(".", 1)[0])
+
+    def keep(found):
+        return sorted(name for key, name in found.items()
+                      if key != own and not key.startswith(("/script/", "/memory/")))
+    return keep(hard), keep(soft)
+
+
+class DependencyIndex:
+    """Dependências de cada pacote do pak e o índice reverso (quem referencia cada pacote)"""
+    def __init__(self, fingerprint, mount_point=ROOT_MOUNT_POINT):
+        self.fingerprint = fingerprint
+        self.mount_point = mount_point
+        self.dependencies = {}  # caminho -> (fortes, fracas) ou None se o cabeçalho não foi lido
+        self._referencers = None
+        self._package_names = {}
+
+    @property
+    def index_path(self):
+        return INDEX_DIR / f"{self.fingerprint}.json"
+
+    def package_name(self, file_path):
+        return package_name_for_path(file_path, self.mount_point)
+
+    def add(self, file_path, dependencies):
+        self.dependencies[file_path] = dependencies
+        self._referencers = None
+
+    def build(self, file_paths, read_range, get_size, workers=None, cancel_event=None, on_progress=None):
+        """Ler os cabeçalhos que ainda não estão no índice, em paralelo
+
+        read_range(caminho, início, tamanho) e get_size(caminho) são chamados de várias threads;
+        on_progress(arquivos, bytes) também. Devolve quantos cabeçalhos foram lidos.
+        """
+        pending = sorted(path for path in file_paths
+                         if is_package_header(path) and path not in self.dependencies)
+
+        def parse(file_path):
+            # Executado nos workers: só o cabeçalho sai do pak
+            return read_package_dependencies(lambda start, size: read_range(file_path, start, size),
+                                             get_size(file_path), self.package_name(file_path))
+
+        parsed = 0
+        for file_path, result, error in parallel_map(parse, pending, workers or DEFAULT_WORKERS, cancel_event):
+            # Cabeçalho ilegível (formato Zen, criptografado sem chave...) fica registrado como None
+            self.add(file_path, result if error is None else None)
+            parsed += 1
+            if on_progress:
+                on_progress(1, 0)
+        return parsed
+
+    @property
+    def referencers(self):
+        """Pacote (minúsculo) -> [(caminho que referencia, tipo)]"""
+        if self._referencers is None:
+            referencers = {}
+            package_names = {}
+            for file_path, dependencies in self.dependencies.items():
+                if dependencies is None:
+                    continue
+                hard, soft = dependencies
+                for kind, names in ((KIND_HARD, hard), (KIND_SOFT, soft)):
+                    for name in names:
+                        referencers.setdefault(name.lower(), []).append((file_path, kind))
+                        package_names.setdefault(name.lower(), name)
+            self._referencers = referencers
+            self._package_names = package_names
+        return self._referencers
+
+    def most_referenced(self, limit=10):
+        """Pacotes com mais referenciadores: [(nome, quantidade)]"""
+        ranking = sorted(self.referencers.items(), key=lambda item: (-len(item[1]), item[0]))[:limit]
+        return [(self._package_names[key], len(referencers)) for key, referencers in ranking]
+
+    def find_referencers(self, file_paths, overrides=None, ignored=()):
+        """Quem referencia os pacotes dos arquivos: {pacote: [(caminho, tipo)]}
+
+        overrides substitui as dependências indexadas de alguns caminhos (alterações pendentes;
+        None mantém as indexadas); caminhos em ignored não contam (ex: também serão deletados).
+        """
+        overrides = overrides or {}
+        ignored = set(ignored)
+        targets = {}
+        for file_path in file_paths:
+            package = self.package_name(file_path)
+            if package:
+                targets.setdefault(package.lower(), package)
+
+        found = {}
+        for key, package in targets.items():
+            for referencer, kind in self.referencers.get(key, ()):
+                if referencer not in ignored and overrides.get(referencer) is None:
+                    found.setdefault(package, []).append((referencer, kind))
+        for referencer, dependencies in overrides.items():
+            if referencer in ignored or dependencies is None:
+                continue
+            hard, soft = dependencies
+            for kind, names in ((KIND_HARD, hard), (KIND_SOFT, soft)):
+                for name in names:
+                    if name.lower() in targets:
+                        found.setdefault(targets[name.lower()], []).append((referencer, kind))
+        for referencers in found.values():
+            referencers.sort()
+        return found
+
+    @property
+    def unreadable(self):
+        return sum(1 for dependencies in self.dependencies.values() if dependencies is None)
+
+    def save(self):
+        """Gravar o índice em disco"""
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "format": INDEX_FORMAT,
+                "mount_point": self.mount_point,
+                "files": {path: list(deps) if deps is not None else None
+                          for path, deps in self.dependencies.items()},
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    @classmethod
+    def load(cls, fingerprint, mount_point=ROOT_MOUNT_POINT):
+        """Carregar o índice do pak (None se não existir, estiver inválido ou for de outro mount point)"""
+        index = cls(fingerprint, mount_point)
+        try:
+            with open(index.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("format") != INDEX_FORMAT or data.get("mount_point") != mount_point:
+            return None
+        for file_path, dependencies in data.get("files", {}).items():
+            index.dependencies[file_path] = (tuple(dependencies[0]), tuple(dependencies[1])) \
+                if dependencies else None
+        return index
+
+
+def open_dependency_index(pak, pak_path):
+    """Índice em cache do pak ou um índice vazio para ser construído; devolve (índice, leitor)"""
+    from pak_io import PakEntryReader, get_pak_mount_point
+
+    mount_point = get_pak_mount_point(pak)
+    fingerprint = get_pak_fingerprint(pak_path)
+    index = DependencyIndex.load(fingerprint, mount_point) or DependencyIndex(fingerprint, mount_point)
+    return index, PakEntryReader(pak, pak_path)
+
+
+def format_referencers(found, limit=10):
+    """Texto para confirmações e log: um referenciador por linha"""
+    lines = []
+    for package in sorted(found):
+        for referencer, kind in found[package]:
+            lines.append(f"{referencer} -> {package} ({kind})")
+    text = "\n".join(lines[:limit])
+    if len(lines) > limit:
+        text += f"\n... e mais {len(lines) - limit}"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mostrar quem referencia os pacotes de um pak")
+    parser.add_argument("pak", help="Arquivo .pak")
+    parser.add_argument("paths", nargs="*", help="Entradas a verificar (vazio = resumo do índice)")
+    parser.add_argument("--key", help="Chave AES (hex ou base64)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    from pak_crypto import parse_key
+    from pak_transcode import open_source
+
+    start = time.perf_counter()
+    pak = open_source(Path(args.pak), parse_key(args.key) if args.key else None)
+    index, reader = open_dependency_index(pak, args.pak)
+    try:
+        if reader.is_iostore:
+            print("Contêiner IoStore: pacotes no formato Zen não são suportados", file=sys.stderr)
+            return 1
+        parsed = index.build(reader.entries, reader.read_range, reader.get_size, args.workers)
+    finally:
+        reader.close()
+    if parsed:
+        index.save()
+
+    packages = len(index.dependencies) - index.unreadable
+    print(f"{packages} pacotes ({parsed} lidos agora, {index.unreadable} ilegíveis) "
+          f"em {time.perf_counter() - start:.1f}s")
+
+    if not args.paths:
+        for package, count in index.most_referenced():
+            print(f"  {count:5d}  {package}")
+        return 0
+
+    found = index.find_referencers(args.paths)
+    if not found:
+        print("Nenhum pacote do pak referencia os arquivos informados")
+        return 0
+    print(format_referencers(found, limit=sys.maxsize))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Tabela compacta dos arquivos do pak aberto
+Calculada uma vez ao carregar: caminhos em ordem, tamanhos em array e extensões
+internadas por id. Listagem, contagem e filtro leem daqui sem criar objetos Path.
+"""
+
+from array import array
+from bisect import bisect_right
+
+
+NO_EXTENSION = ""
+
+
+def get_extension(file_path):
+    """Extensão como em Path(file_path).suffix, sem criar o Path"""
+    name_start = file_path.rfind("/") + 1
+    dot = file_path.rfind(".")
+    if dot <= name_start or dot == len(file_path) - 1:
+        return NO_EXTENSION
+    return file_path[dot:]
+
+
+def get_parent(file_path):
+    """Pasta do arquivo ('' na raiz)"""
+    slash = file_path.rfind("/")
+    return file_path[:slash] if slash > 0 else ""
+
+
+class EntryTable:
+    """Colunas paralelas (caminho, tamanho, extensão) + marcação de deletados"""
+    def __init__(self):
+        self.paths = []
+        self.sizes = array("Q")
+        self.ext_ids = array("H")
+        self.deleted = bytearray()  # 1 = marcado para deleção
+        self.extensions = []  # id -> extensão
+        self.rows = {}  # caminho -> linha
+
+        self._ext_index = {}
+        self._live_count = 0
+        self._order = None  # Linhas em ordem de caminho (None = recalcular)
+        self._search_text = None  # Caminhos em minúsculas unidos por \n (filtro)
+        self._search_offsets = None
+
+    @classmethod
+    def build(cls, file_sizes):
+        """Criar a tabela a partir de pares (caminho, tamanho)"""
+        table = cls()
+        rows = sorted(file_sizes)
+        table.paths = [file_path for file_path, size in rows]
+        table.sizes = array("Q", [size for file_path, size in rows])
+        table.rows = {file_path: row for row, file_path in enumerate(table.paths)}
+
+        # Internar em lote: um dict.setdefault por caminho em vez de chamadas de método
+        ext_index = table._ext_index
+        table.ext_ids = array("H", [ext_index.setdefault(ext, len(ext_index))
+                                    for ext in map(get_extension, table.paths)])
+        table.extensions = list(ext_index)
+
+        table.deleted = bytearray(len(table.paths))
+        table._live_count = len(table.paths)
+        table._order = array("I", range(len(table.paths)))
+        return table
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Criar a partir do índice do pak (caminho -> Entry)"""
+        return cls.build((file_path, entry.size) for file_path, entry in entries.items())
+
+    def _intern(self, value, index, values):
+        value_id = index.get(value)
+        if value_id is None:
+            value_id = index[value] = len(values)
+            values.append(value)
+        return value_id
+
+    def _append(self, file_path, size):
+        self.rows[file_path] = len(self.paths)
+        self.paths.append(file_path)
+        self.sizes.append(size)
+        self.ext_ids.append(self._intern(get_extension(file_path), self._ext_index, self.extensions))
+        self.deleted.append(0)
+        self._live_count += 1
+
+    def _changed(self):
+        self._order = None
+        self._search_text = None
+        self._search_offsets = None
+
+    def __len__(self):
+        return self._live_count
+
+    def __contains__(self, file_path):
+        row = self.rows.get(file_path)
+        return row is not None and not self.deleted[row]
+
+    def set_file(self, file_path, size):
+        """Incluir um arquivo ou atualizar o tamanho (também desfaz a deleção)"""
+        row = self.rows.get(file_path)
+        if row is None:
+            self._append(file_path, size)
+            self._changed()
+            return
+        self.sizes[row] = size
+        if self.deleted[row]:
+            self.deleted[row] = 0
+            self._live_count += 1
+
+    def remove(self, file_path):
+        """Marcar como deletado (a linha continua para poder ser restaurada)"""
+        row = self.rows.get(file_path)
+        if row is None or self.deleted[row]:
+            return False
+        self.deleted[row] = 1
+        self._live_count -= 1
+        return True
+
+    def apply_changes(self, added_files, modified_files, deleted_files):
+        """Aplicar as alterações pendentes (conteúdos em memória ou StagedBlob)"""
+        for files in (added_files, modified_files):
+            for file_path, content in files.items():
+                self.set_file(file_path, len(content))
+        for file_path in deleted_files:
+            self.remove(file_path)
+
+    def get_size(self, file_path):
+        row = self.rows.get(file_path)
+        return self.sizes[row] if row is not None else 0
+
+    def get_extension(self, file_path):
+        row = self.rows.get(file_path)
+        return self.extensions[self.ext_ids[row]] if row is not None else get_extension(file_path)
+
+    def _sorted_rows(self):
+        if self._order is None:
+            self._order = array("I", sorted(range(len(self.paths)), key=self.paths.__getitem__))
+        return self._order
+
+    def iter_files(self):
+        """Caminhos não deletados em ordem"""
+        paths = self.paths
+        deleted = self.deleted
+        return (paths[row] for row in self._sorted_rows() if not deleted[row])
+
+    def iter_sizes(self, file_paths=None):
+        """Pares (caminho, tamanho) de todos os arquivos ou dos caminhos informados"""
+        if file_paths is None:
+            sizes = self.sizes
+            deleted = self.deleted
+            paths = self.paths
+            return ((paths[row], sizes[row]) for row in self._sorted_rows() if not deleted[row])
+        return ((file_path, self.get_size(file_path)) for file_path in file_paths)
+
+    def total_size(self):
+        return sum(size for row, size in enumerate(self.sizes) if not self.deleted[row])
+
+    def count_by_extension(self):
+        """Quantidade de arquivos por extensão (sem extensão = '')"""
+        counts = [0] * len(self.extensions)
+        deleted = self.deleted
+        for row, ext_id in enumerate(self.ext_ids):
+            if not deleted[row]:
+                counts[ext_id] += 1
+        return {self.extensions[ext_id]: count for ext_id, count in enumerate(counts) if count}
+
+    def _build_search_text(self):
+        # Um único texto em minúsculas: str.find varre tudo em C em vez de um "in" por caminho
+        # (minúsculas por caminho: lower() pode mudar o tamanho de alguns caracteres Unicode)
+        lowered = [file_path.lower() for file_path in self.paths]
+        offsets = array("Q")
+        position = 0
+        for file_path in lowered:
+            offsets.append(position)
+            position += len(file_path) + 1
+        self._search_offsets = offsets
+        self._search_text = "\n".join(lowered)
+
+    def filter(self, term):
+        """Caminhos não deletados que contêm o termo (sem diferenciar maiúsculas), em ordem"""
+        term = term.lower()
+        if not term:
+            return list(self.iter_files())
+        if "\n" in term:
+            return []
+        if self._search_text is None:
+            self._build_search_text()
+
+        text = self._search_text
+        offsets = self._search_offsets
+        deleted = self.deleted
+        matches = []
+        position = text.find(term)
+        while position != -1:
+            row = bisect_right(offsets, position) - 1
+            if not deleted[row]:
+                matches.append(row)
+            # Pular para o próximo caminho: um resultado por arquivo
+            next_row = row + 1
+            if next_row >= len(offsets):
+                break
+            position = text.find(term, offsets[next_row])
+        paths = self.paths
+        return [paths[row] for row in sorted(matches, key=paths.__getitem__)]
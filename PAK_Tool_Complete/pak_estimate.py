@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Estimativa de compressão antes de empacotar
+Amostra blocos de cada extensão (de uma pasta ou de um pak existente), comprime as amostras
+com cada método/nível em paralelo e projeta o tamanho do pak, o tempo de compressão e a
+velocidade de descompressão por extensão
+
+Uso:
+    python pak_estimate.py PastaOuJogo.pak [--files 12] [--blocks 4] [--json estimativa.json]
+"""
+
+from pathlib import Path
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+
+from pyuepak.utils import COMPRESSION
+from pyuepak.version import PakVersion
+
+from pak_crypto import parse_key
+from pak_entries import get_extension
+from pak_io import AtomicFileWriter, PakEntryReader, decompress_block, parallel_map, DEFAULT_WORKERS
+from pak_writer import compress_block, header_size, DEFAULT_BLOCK_SIZE
+
+
+ESTIMATE_FORMAT = 1
+
+# Amostras do tamanho do bloco de compressão do pak: a razão medida é a de cada bloco gravado
+SAMPLE_BLOCK_SIZE = DEFAULT_BLOCK_SIZE
+FILES_PER_EXTENSION = 12
+BLOCKS_PER_FILE = 4
+
+# Extensões listadas individualmente no resumo em texto (as demais entram em "outras")
+MAX_LISTED_EXTENSIONS = 15
+
+
+class Codec:
+    """Método de compressão do pak com um nível"""
+    def __init__(self, name, compression, level=None):
+        self.name = name
+        self.compression = compression
+        self.level = level
+
+    def compress(self, data):
+        return compress_block(data, self.compression, self.level)
+
+
+CODECS = (
+    Codec("zlib-1", COMPRESSION.ZLIB, 1),
+    Codec("zlib-6", COMPRESSION.ZLIB, 6),
+    Codec("zlib-9", COMPRESSION.ZLIB, 9),
+    Codec("gzip-6", COMPRESSION.GZIP, 6),
+    Codec("oodle-4", COMPRESSION.OODLE, 4),  # Kraken Normal (padrão do UnrealPak)
+    Codec("oodle-7", COMPRESSION.OODLE, 7),  # Kraken Optimal3
+)
+
+
+def available_codecs(codecs=CODECS):
+    """Separar os métodos utilizáveis (Oodle depende da biblioteca nativa); devolve (ok, indisponíveis)"""
+    probe = bytes(range(256)) * 64
+    usable, unavailable = [], []
+    for codec in codecs:
+        try:
+            if decompress_block(codec.compress(probe), codec.compression, len(probe)) != probe:
+                raise ValueError("resultado diferente da entrada")
+            usable.append(codec)
+        except Exception as e:
+            unavailable.append((codec.name, str(e) or type(e).__name__))
+    return usable, unavailable
+
+
+def open_folder_source(folder):
+    """Arquivos de uma pasta: devolve ([(caminho, tamanho)], read_range, close)"""
+    folder = Path(folder)
+    files = {path.relative_to(folder).as_posix(): path for path in folder.rglob("*") if path.is_file()}
+
+    def read_range(file_path, start, size):
+        with open(files[file_path], "rb") as f:
+            f.seek(start)
+            return f.read(size)
+
+    return [(file_path, path.stat().st_size) for file_path, path in files.items()], read_range, lambda: None
+
+
+def open_pak_source(pak, pak_path):
+    """Entradas de um pak já aberto (lê só os blocos amostrados)"""
+    reader = PakEntryReader(pak, pak_path)
+    return ([(file_path, entry.size) for file_path, entry in reader.entries.items()],
+            reader.read_range, reader.close)
+
+
+def pick_samples(file_sizes, files_per_extension=FILES_PER_EXTENSION, blocks_per_file=BLOCKS_PER_FILE,
+                 block_size=SAMPLE_BLOCK_SIZE, seed=0):
+    """Blocos a testar: (extensão, caminho, início, tamanho) espalhados pelos arquivos
+
+    Até files_per_extension arquivos sorteados por extensão e blocks_per_file blocos
+    alinhados ao bloco do pak, distribuídos do início ao fim de cada arquivo.
+    """
+    by_extension = {}
+    for file_path, size in file_sizes:
+        if size > 0:
+            by_extension.setdefault(get_extension(file_path).lower(), []).append((file_path, size))
+
+    rng = random.Random(seed)
+    samples = []
+    for extension, files in sorted(by_extension.items()):
+        files.sort()
+        chosen = files if len(files) <= files_per_extension else rng.sample(files, files_per_extension)
+        for file_path, size in chosen:
+            block_count = (size + block_size - 1) // block_size
+            count = min(blocks_per_file, block_count)
+            for block in sorted({block_count * i // count for i in range(count)}):
+                start = block * block_size
+                samples.append((extension, file_path, start, min(block_size, size - start)))
+    return samples
+
+
+class CodecTrial:
+    """Soma das amostras de uma extensão com um método"""
+    __slots__ = ("raw_bytes", "stored_bytes", "compress_seconds", "decompress_seconds")
+
+    def __init__(self):
+        self.raw_bytes = 0
+        self.stored_bytes = 0  # Comprimido, ou o bloco original quando a compressão não reduz
+        self.compress_seconds = 0.0
+        self.decompress_seconds = 0.0
+
+    @property
+    def ratio(self):
+        return self.stored_bytes / self.raw_bytes if self.raw_bytes else 1.0
+
+    @property
+    def compress_mb_per_second(self):
+        return self.raw_bytes / (1024 * 1024) / self.compress_seconds if self.compress_seconds > 0 else 0.0
+
+    @property
+    def decompress_mb_per_second(self):
+        return self.raw_bytes / (1024 * 1024) / self.decompress_seconds if self.decompress_seconds > 0 else 0.0
+
+
+class CompressionEstimate:
+    """Resultado da análise: tamanhos por extensão e medições de cada método"""
+    def __init__(self, codecs, unavailable):
+        self.codecs = [codec.name for codec in codecs]
+        self.unavailable = unavailable  # [(método, motivo)]
+        self.extensions = {}  # extensão -> [arquivos, bytes]
+        self.trials = {}  # (extensão, método) -> CodecTrial
+        self.samples = 0
+        self.sampled_bytes = 0
+        self.entry_overhead = header_size(PakVersion.V11, COMPRESSION.ZLIB, 1)  # Cabeçalho típico por entrada
+        self.seconds = 0.0
+
+    @property
+    def total_bytes(self):
+        return sum(size for _, size in self.extensions.values())
+
+    @property
+    def total_files(self):
+        return sum(files for files, _ in self.extensions.values())
+
+    def projected(self, extension, codec_name):
+        """Bytes estimados da extensão no pak com o método (sem amostra = sem compressão)"""
+        files, size = self.extensions[extension]
+        trial = self.trials.get((extension, codec_name))
+        ratio = trial.ratio if trial is not None else 1.0
+        return int(size * ratio)
+
+    def totals(self, codec_name):
+        """(tamanho projetado, segundos de CPU para comprimir, MB/s de descompressão) do pak inteiro"""
+        size = 0
+        compress_seconds = 0.0
+        decompress_seconds = 0.0
+        for extension, (files, ext_bytes) in self.extensions.items():
+            size += self.projected(extension, codec_name) + files * self.entry_overhead
+            trial = self.trials.get((extension, codec_name))
+            if trial is not None and trial.raw_bytes:
+                compress_seconds += ext_bytes * trial.compress_seconds / trial.raw_bytes
+                decompress_seconds += ext_bytes * trial.decompress_seconds / trial.raw_bytes
+        mb = self.total_bytes / (1024 * 1024)
+        return size, compress_seconds, (mb / decompress_seconds if decompress_seconds > 0 else 0.0)
+
+    def format(self, workers=DEFAULT_WORKERS):
+        """Resumo em texto para a aba de log / terminal"""
+        total = self.total_bytes
+        lines = [f"📊 Estimativa de compressão: {self.total_files} arquivos, {_mb(total)} sem compressão "
+                 f"({self.samples} amostras, {_mb(self.sampled_bytes)} testados em {self.seconds:.1f}s)"]
+
+        by_size = sorted(self.extensions.items(), key=lambda item: -item[1][1])
+        listed = by_size[:MAX_LISTED_EXTENSIONS]
+        for extension, (files, size) in listed:
+            lines.append(f"   {extension or '(sem extensão)':<14} {files:>7} arquivos  {_mb(size):>10}")
+            for codec_name in self.codecs:
+                trial = self.trials.get((extension, codec_name))
+                if trial is None:
+                    continue
+                lines.append(f"      {codec_name:<9} {trial.ratio * 100:>5.1f}%  -> {_mb(self.projected(extension, codec_name)):>10}"
+                             f"  comp {trial.compress_mb_per_second:>7.1f} MB/s"
+                             f"  descomp {trial.decompress_mb_per_second:>8.1f} MB/s")
+        if len(by_size) > len(listed):
+            rest = by_size[len(listed):]
+            lines.append(f"   (outras {len(rest)} extensões: {sum(files for _, (files, _) in rest)} arquivos, "
+                         f"{_mb(sum(size for _, (_, size) in rest))})")
+
+        lines.append(f"   Pak estimado (compressão com {workers} threads):")
+        lines.append(f"      {'nenhuma':<9} {_mb(total + self.total_files * self.entry_overhead):>10}")
+        results = []
+        for codec_name in self.codecs:
+            size, compress_seconds, decompress_speed = self.totals(codec_name)
+            results.append((size, codec_name))
+            lines.append(f"      {codec_name:<9} {_mb(size):>10} ({size / total * 100 if total else 100:>5.1f}%)"
+                         f"  ~{_duration(compress_seconds / max(workers, 1))} para comprimir"
+                         f"  descomp {decompress_speed:>8.1f} MB/s")
+        if results:
+            lines.append(f"   Menor pak: {min(results)[1]}")
+        for codec_name, reason in self.unavailable:
+            lines.append(f"   {codec_name}: indisponível ({reason})")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        extensions = {}
+        for extension, (files, size) in sorted(self.extensions.items()):
+            codecs = {}
+            for codec_name in self.codecs:
+                trial = self.trials.get((extension, codec_name))
+                if trial is None:
+                    continue
+                codecs[codec_name] = {
+                    "ratio": round(trial.ratio, 4),
+                    "projected_bytes": self.projected(extension, codec_name),
+                    "compress_mb_per_second": round(trial.compress_mb_per_second, 1),
+                    "decompress_mb_per_second": round(trial.decompress_mb_per_second, 1),
+                }
+            extensions[extension] = {"files": files, "bytes": size, "codecs": codecs}
+
+        totals = {}
+        for codec_name in self.codecs:
+            size, compress_seconds, decompress_speed = self.totals(codec_name)
+            totals[codec_name] = {"projected_bytes": size, "compress_cpu_seconds": round(compress_seconds, 1),
+                                  "decompress_mb_per_second": round(decompress_speed, 1)}
+        return {
+            "format": ESTIMATE_FORMAT,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "files": self.total_files,
+            "bytes": self.total_bytes,
+            "samples": self.samples,
+            "sampled_bytes": self.sampled_bytes,
+            "extensions": extensions,
+            "totals": totals,
+            "unavailable": dict(self.unavailable),
+        }
+
+
+def _mb(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def _duration(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def estimate_compression(file_sizes, read_range, codecs=None, files_per_extension=FILES_PER_EXTENSION,
+                         blocks_per_file=BLOCKS_PER_FILE, workers=None, cancel_event=None, on_progress=None):
+    """Testar os métodos nas amostras em paralelo e projetar o resultado
+
+    read_range(caminho, início, tamanho) é chamado de várias threads.
+    on_progress(amostras, bytes) é chamado na thread da análise.
+    Devolve CompressionEstimate ou None se cancelado.
+    """
+    start = time.perf_counter()
+    if codecs is None:
+        codecs, unavailable = available_codecs()
+    else:
+        unavailable = []
+    estimate = CompressionEstimate(codecs, unavailable)
+    for file_path, size in file_sizes:
+        counts = estimate.extensions.setdefault(get_extension(file_path).lower(), [0, 0])
+        counts[0] += 1
+        counts[1] += size
+
+    def trial(sample):
+        # Executado nos workers: zlib e Oodle liberam o GIL, o tempo de CPU é o da própria thread
+        _, file_path, offset, length = sample
+        data = read_range(file_path, offset, length)
+        results = []
+        for codec in codecs:
+            cpu = time.thread_time()
+            compressed = codec.compress(data)
+            compress_seconds = time.thread_time() - cpu
+            cpu = time.thread_time()
+            decompress_block(compressed, codec.compression, len(data))
+            results.append((codec.name, len(compressed), compress_seconds, time.thread_time() - cpu))
+        return len(data), results
+
+    samples = pick_samples(file_sizes, files_per_extension, blocks_per_file)
+    for sample, result, error in parallel_map(trial, samples, workers or DEFAULT_WORKERS, cancel_event):
+        if error is not None:
+            raise RuntimeError(f"{sample[1]}: {error}") from error
+        size, results = result
+        for codec_name, compressed_size, compress_seconds, decompress_seconds in results:
+            codec_trial = estimate.trials.get((sample[0], codec_name))
+            if codec_trial is None:
+                codec_trial = estimate.trials[(sample[0], codec_name)] = CodecTrial()
+            codec_trial.raw_bytes += size
+            codec_trial.stored_bytes += min(compressed_size, size)
+            codec_trial.compress_seconds += compress_seconds
+            codec_trial.decompress_seconds += decompress_seconds
+        estimate.samples += 1
+        estimate.sampled_bytes += size
+        if on_progress:
+            on_progress(1, size)
+
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    estimate.seconds = time.perf_counter() - start
+    return estimate
+
+
+def write_estimate(estimate, output_path):
+    """Gravar a estimativa em JSON de forma atômica"""
+    with AtomicFileWriter(output_path) as writer:
+        f = io.TextIOWrapper(writer.open(), encoding="utf-8")
+        json.dump(estimate.to_dict(), f, indent=2, ensure_ascii=False)
+        # O AtomicFileWriter faz flush/fsync no arquivo binário por baixo
+        f.flush()
+        f.detach()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimar tamanho e tempo de cada compressão antes de empacotar")
+    parser.add_argument("source", help="Pasta com os arquivos ou .pak/.utoc existente")
+    parser.add_argument("--files", type=int, default=FILES_PER_EXTENSION, help="Arquivos amostrados por extensão")
+    parser.add_argument("--blocks", type=int, default=BLOCKS_PER_FILE, help="Blocos de 64 KB por arquivo")
+    parser.add_argument("--key", help="Chave AES do pak (hex ou base64)")
+    parser.add_argument("--json", help="Gravar o resultado em JSON")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.source):
+        file_sizes, read_range, close = open_folder_source(args.source)
+    else:
+        from pak_transcode import open_source
+
+        pak = open_source(args.source, parse_key(args.key) if args.key else None)
+        file_sizes, read_range, close = open_pak_source(pak, args.source)
+    try:
+        estimate = estimate_compression(file_sizes, read_range, files_per_extension=args.files,
+                                        blocks_per_file=args.blocks, workers=args.workers)
+    finally:
+        close()
+
+    print(estimate.format(args.workers))
+    if args.json:
+        write_estimate(estimate, args.json)
+        print(f"-> {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Inspeção de arquivos binários do pak sem carregar o conteúdo inteiro
+Páginas lidas sob demanda (só os blocos comprimidos da janela visível), busca de
+sequência de bytes em fatias e identificação da estrutura pelo cabeçalho
+"""
+
+from collections import OrderedDict
+import struct
+import threading
+
+
+# Páginas do mesmo tamanho do bloco de compressão padrão dos paks
+PAGE_SIZE = 64 * 1024
+MAX_CACHED_PAGES = 32
+
+# Busca em fatias grandes: poucas chamadas a bytes.find e memória limitada
+SEARCH_CHUNK_SIZE = 4 * 1024 * 1024
+
+BYTES_PER_ROW = 16
+
+UE_PACKAGE_TAG = 0x9E2A83C1
+STRUCTURE_HEAD_SIZE = 1024
+
+# Bytes imprimíveis na coluna de texto; o resto vira "."
+_PRINTABLE = bytes(b if 0x20 <= b < 0x7F else ord(".") for b in range(256))
+
+# Assinaturas reconhecidas no início do arquivo
+SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "Imagem PNG"),
+    (b"DDS ", "Textura DDS"),
+    (b"\xff\xd8\xff", "Imagem JPEG"),
+    (b"GIF8", "Imagem GIF"),
+    (b"OggS", "Áudio Ogg"),
+    (b"RIFF", "Contêiner RIFF"),
+    (b"BKHD", "SoundBank do Wwise (.bnk)"),
+    (b"AKPK", "Pacote do Wwise (.pck)"),
+    (b"FSB5", "Banco de sons do FMOD"),
+    (b"PK\x03\x04", "Arquivo ZIP"),
+    (b"\x1f\x8b", "Dados gzip"),
+    (b"\xef\xbb\xbf", "Texto UTF-8 (com BOM)"),
+    (b"\xff\xfe", "Texto UTF-16 LE (com BOM)"),
+)
+
+
+class PagedSource:
+    """Conteúdo lido por páginas sob demanda, mantendo as últimas páginas em cache"""
+    def __init__(self, read_range, size, page_size=PAGE_SIZE, max_pages=MAX_CACHED_PAGES):
+        self.read_range = read_range  # read_range(início, tamanho) -> bytes
+        self.size = size
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _page(self, index):
+        with self._lock:
+            page = self._pages.get(index)
+            if page is not None:
+                self._pages.move_to_end(index)
+                return page
+
+        page = self.read_range(index * self.page_size, self.page_size)
+        with self._lock:
+            self._pages[index] = page
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return page
+
+    def read(self, start, size):
+        """Ler [start, start + size) usando as páginas em cache"""
+        size = max(0, min(size, self.size - start))
+        if size <= 0:
+            return b""
+        first = start // self.page_size
+        last = (start + size - 1) // self.page_size
+        data = b"".join(self._page(index) for index in range(first, last + 1))
+        skip = start - first * self.page_size
+        return data[skip:skip + size]
+
+
+def offset_width(size):
+    """Dígitos hexadecimais da coluna de posição (mínimo 8)"""
+    return max(8, len(f"{max(size - 1, 0):X}"))
+
+
+def format_hex_rows(data, base_offset, width=8, bytes_per_row=BYTES_PER_ROW):
+    """Linhas no formato posição | bytes em hex | texto"""
+    half = bytes_per_row // 2
+    lines = []
+    for row_start in range(0, len(data), bytes_per_row):
+        row = data[row_start:row_start + bytes_per_row]
+        hex_part = row[:half].hex(" ").upper()
+        if len(row) > half:
+            hex_part += "  " + row[half:].hex(" ").upper()
+        lines.append(f"{base_offset + row_start:0{width}X}  {hex_part:<{bytes_per_row * 3}}  "
+                     f"{row.translate(_PRINTABLE).decode('ascii')}")
+    return lines
+
+
+def parse_pattern(text, as_hex=True):
+    """Converter o texto da busca em bytes (hex como 'DE AD BE EF' ou texto UTF-8)"""
+    if not as_hex:
+        return text.encode("utf-8")
+    digits = "".join(text.split()).replace("0x", "").replace(",", "")
+    try:
+        return bytes.fromhex(digits)
+    except ValueError:
+        raise ValueError(f"Sequência hexadecimal inválida: {text}")
+
+
+def find_pattern(read_range, total_size, pattern, start=0, end=None,
+                 chunk_size=SEARCH_CHUNK_SIZE, cancel_event=None, on_progress=None):
+    """Primeira posição de pattern em [start, end) ou -1
+
+    As fatias se sobrepõem em len(pattern) - 1 bytes para achar ocorrências na divisa.
+    on_progress(bytes_varridos) é chamado a cada fatia.
+    """
+    end = total_size if end is None else min(end, total_size)
+    if not pattern or end - start < len(pattern):
+        return -1
+
+    overlap = len(pattern) - 1
+    position = start
+    while position < end:
+        if cancel_event is not None and cancel_event.is_set():
+            return -1
+        size = min(chunk_size + overlap, end - position)
+        data = read_range(position, size)
+        found = data.find(pattern)
+        if found != -1:
+            return position + found
+        if on_progress:
+            on_progress(size - overlap)
+        if position + size >= end:
+            break
+        position += size - overlap
+    return -1
+
+
+def _read_fstring(data, offset):
+    """FString do Unreal (tamanho negativo = UTF-16)"""
+    (length,) = struct.unpack_from("<i", data, offset)
+    offset += 4
+    if length < 0:
+        raw = data[offset:offset - length * 2]
+        return raw.decode("utf-16-le", "replace").rstrip("\0"), offset - length * 2
+    raw = data[offset:offset + length]
+    return raw.decode("latin-1").rstrip("\0"), offset + length
+
+
+def describe_package_summary(data):
+    """Campos iniciais do FPackageFileSummary (.uasset/.umap)"""
+    fields = []
+    try:
+        tag, legacy_version = struct.unpack_from("<Ii", data, 0)
+        fields.append(("Tag", f"0x{tag:08X}"))
+        fields.append(("Versão legada", str(legacy_version)))
+        offset = 8
+        if legacy_version != -4:
+            offset += 4  # Versão do UE3
+        (ue4_version,) = struct.unpack_from("<i", data, offset)
+        offset += 4
+        fields.append(("Versão UE4", str(ue4_version) if ue4_version else "0 (sem versão / cooked)"))
+        if legacy_version <= -8:
+            (ue5_version,) = struct.unpack_from("<i", data, offset)
+            offset += 4
+            fields.append(("Versão UE5", str(ue5_version) if ue5_version else "0 (sem versão / cooked)"))
+        licensee_version, custom_count = struct.unpack_from("<ii", data, offset)
+        offset += 8
+        fields.append(("Versão do licenciado", str(licensee_version)))
+        fields.append(("Versões customizadas", str(custom_count)))
+        offset += custom_count * 20  # GUID + versão
+        (header_size,) = struct.unpack_from("<i", data, offset)
+        fields.append(("Tamanho do cabeçalho", f"{header_size} bytes"))
+        package_name, offset = _read_fstring(data, offset + 4)
+        fields.append(("Pacote", package_name or "(vazio)"))
+        (package_flags,) = struct.unpack_from("<I", data, offset)
+        fields.append(("Flags do pacote", f"0x{package_flags:08X}"))
+    except (struct.error, UnicodeDecodeError):
+        # Cabeçalho maior que o trecho lido ou formato diferente: mostrar o que deu
+        pass
+    return fields
+
+
+def describe_structure(source):
+    """Tipo do arquivo e campos do cabeçalho, lidos só do início (e do fim)"""
+    head = source.read(0, STRUCTURE_HEAD_SIZE)
+    fields = [("Tamanho", f"{source.size:,} bytes".replace(",", "."))]
+
+    if len(head) >= 4 and struct.unpack_from("<I", head)[0] == UE_PACKAGE_TAG:
+        fields.append(("Tipo", "Pacote do Unreal (.uasset/.umap)"))
+        fields.extend(describe_package_summary(head))
+        return fields
+
+    if source.size >= 4 and struct.unpack("<I", source.read(source.size - 4, 4))[0] == UE_PACKAGE_TAG:
+        fields.append(("Tipo", "Exportações de pacote do Unreal (.uexp, termina com a tag)"))
+        return fields
+
+    for signature, description in SIGNATURES:
+        if head.startswith(signature):
+            fields.append(("Tipo", description))
+            break
+    else:
+        if head[:1] == b"\x78" and len(head) >= 2 and (head[0] << 8 | head[1]) % 31 == 0:
+            fields.append(("Tipo", "Dados zlib"))
+        else:
+            fields.append(("Tipo", "Desconhecido (dados brutos)"))
+        return fields
+
+    try:
+        if head.startswith(b"DDS "):
+            height, width = struct.unpack_from("<II", head, 12)
+            (mipmaps,) = struct.unpack_from("<I", head, 28)
+            fourcc = head[84:88].decode("ascii", "replace").strip("\0") or "-"
+            fields.append(("Dimensões", f"{width}x{height}"))
+            fields.append(("Mipmaps", str(mipmaps)))
+            fields.append(("Formato", fourcc))
+        elif head.startswith(b"\x89PNG"):
+            width, height = struct.unpack_from(">II", head, 16)
+            fields.append(("Dimensões", f"{width}x{height}"))
+        elif head.startswith(b"RIFF"):
+            fields.append(("Formato", head[8:12].decode("ascii", "replace")))
+    except struct.error:
+        pass
+    return fields
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Utilitários de leitura e gravação de arquivos .pak
+Leitura segura para várias threads (um Reader por thread, igual ao pyuepak)
+Gravação atômica: arquivo temporário + fsync + rename sobre o destino
+"""
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import os
+import zlib
+import shutil
+import tempfile
+import threading
+
+from pyuepak.file_io import Reader
+from pyuepak.entry import Entry
+from pyuepak.utils import COMPRESSION
+from pyuepak.version import PakVersion
+
+from pak_crypto import align, decrypt_blocks, read_encrypted_entry, ZERO_KEY, AES_BLOCK_SIZE
+from pak_journal import load_content, read_content_range
+from pak_profiling import profiler, CATEGORY_READ, CATEGORY_COMPRESS, CATEGORY_WRITE
+
+
+# Buffer de escrita grande: menos syscalls sob carga de disco
+WRITE_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Cópia dos bytes gravados (mesclagem) em fatias
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Workers para leituras em paralelo (E/S + descompressão liberam o GIL)
+DEFAULT_WORKERS = min(16, (os.cpu_count() or 4) + 4)
+
+
+def get_pak_entries(pak):
+    """Obter o dicionário caminho -> Entry do pak (ou {} se indisponível)"""
+    index = getattr(pak, "_index", None)
+    return getattr(index, "entrys", None) or {}
+
+
+def decompress_block(data, compression, size):
+    """Descomprimir um bloco (size = tamanho descomprimido esperado)"""
+    if compression == COMPRESSION.NONE:
+        return data[:size]
+    if compression == COMPRESSION.ZLIB:
+        return zlib.decompress(data)
+    if compression == COMPRESSION.GZIP:
+        return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+    if compression == COMPRESSION.OODLE:
+        from pyuepak.entry import oodle_comp
+        return oodle_comp.decompress(data, size)
+    raise NotImplementedError(f"Compressão {compression} não suportada")
+
+
+def get_pak_version(pak):
+    """Versão real do pak lido (a do footer, quando existir)"""
+    footer = getattr(pak, "_footer", None)
+    return getattr(footer, "version", None) or pak.version
+
+
+def get_pak_mount_point(pak):
+    """Mount point real do pak lido (o atributo do PakFile fica sempre no padrão)"""
+    return getattr(getattr(pak, "_index", None), "mount_point", None) or pak.mount_point
+
+
+class PakEntryReader:
+    """Leitor de entradas de um pak que pode ser usado por várias threads"""
+    def __init__(self, pak, pak_path):
+        self.pak = pak
+        self.pak_path = str(pak_path) if pak_path else None
+        self.entries = get_pak_entries(pak)
+        self.version = get_pak_version(pak)
+        # Contêiner IoStore: as entradas leem seus próprios blocos do .ucas
+        self.is_iostore = getattr(pak, "is_iostore", False)
+
+        self._local = threading.local()
+        self._readers = []
+        self._lock = threading.Lock()
+        self._data_offsets = {}  # Posição da entrada -> início dos dados
+
+    def _get_reader(self):
+        """Reader exclusivo da thread atual"""
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = Reader(self.pak_path)
+            self._local.reader = reader
+            with self._lock:
+                self._readers.append(reader)
+        return reader
+
+    def get_size(self, file_path):
+        """Tamanho descomprimido da entrada (0 se desconhecido)"""
+        entry = self.entries.get(file_path)
+        return entry.size if entry is not None else 0
+
+    def read(self, file_path):
+        """Ler a entrada completa (descomprimida)"""
+        entry = self.entries.get(file_path)
+        if entry is None or self.pak_path is None:
+            # Sem acesso ao índice: usar a API pública de forma serializada
+            with self._lock:
+                data = self.pak.read_file(file_path)
+            profiler.count("bytes_read", len(data))
+            return data
+
+        if self.is_iostore:
+            with profiler.span("read_chunk", CATEGORY_COMPRESS):
+                return entry.read_range(0, entry.size)
+
+        if entry.is_encrypted:
+            # Decriptação em poucas chamadas grandes (o pyuepak faz uma por bloco de 16 bytes)
+            with profiler.span("read_decrypt", CATEGORY_COMPRESS):
+                data = read_encrypted_entry(entry, self._get_reader(), self.version, self.pak.key)
+            profiler.count("bytes_read", entry.compressed_size)
+        elif entry.compression != COMPRESSION.NONE:
+            with profiler.span("read_decompress", CATEGORY_COMPRESS):
+                data = entry.read_file(self._get_reader(), self.version, self.pak.key)
+            profiler.count("bytes_read", entry.compressed_size)
+        else:
+            with profiler.span("read_entry", CATEGORY_READ):
+                data = entry.read_file(self._get_reader(), self.version, self.pak.key)
+            profiler.count("bytes_read", entry.size)
+        return data
+
+    def read_head(self, file_path, size):
+        """Ler apenas os primeiros bytes (None se a entrada for comprimida ou criptografada)"""
+        entry = self.entries.get(file_path)
+        if entry is not None and self.is_iostore:
+            # Só os blocos do início são descomprimidos
+            return entry.read_range(0, size)
+        if (entry is None or self.pak_path is None
+                or entry.compression != COMPRESSION.NONE
+                or entry.is_encrypted):
+            return None
+
+        reader = self._get_reader()
+        reader.set_pos(self._data_offset(entry))
+        profiler.count("bytes_read", min(size, entry.size))
+        return reader.read(min(size, entry.size))
+
+    def get_stored_hash(self, file_path):
+        """SHA-1 dos dados gravados no pak, sem ler o conteúdo (None se indisponível)
+
+        Vem do índice; nos índices compactos (V10+) o hash só existe no cabeçalho
+        que precede cada entrada, que é lido sozinho.
+        """
+        entry = self.entries.get(file_path)
+        if entry is None or self.is_iostore:
+            return None
+        if entry.hash and any(entry.hash):
+            return bytes(entry.hash)
+        if self.pak_path is None:
+            return None
+        reader = self._get_reader()
+        reader.set_pos(entry.offset)
+        header = Entry.read(reader, self.version)
+        profiler.count("bytes_read", reader.get_pos() - entry.offset)
+        return bytes(header.hash) if header.hash and any(header.hash) else None
+
+    def get_data_offset(self, file_path):
+        """Posição no arquivo onde começam os dados gravados (após o cabeçalho da entrada)"""
+        return self._data_offset(self.entries[file_path])
+
+    def _data_offset(self, entry):
+        # O tamanho do cabeçalho vem dele mesmo: V1/V2 não têm o byte de flags que
+        # Entry.get_serialized_size conta
+        offset = self._data_offsets.get(entry.offset)
+        if offset is None:
+            reader = self._get_reader()
+            reader.set_pos(entry.offset)
+            Entry.read(reader, self.version)
+            offset = self._data_offsets[entry.offset] = reader.get_pos()
+        return offset
+
+    def iter_stored(self, file_path, chunk_size=COPY_CHUNK_SIZE):
+        """Gerar os bytes exatamente como estão no pak (comprimidos/criptografados), em fatias"""
+        entry = self.entries[file_path]
+        position = self.get_data_offset(file_path)
+        remaining = align(entry.compressed_size) if entry.is_encrypted else entry.compressed_size
+        reader = self._get_reader()
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            reader.set_pos(position)
+            data = reader.read(size)
+            profiler.count("bytes_read", len(data))
+            position += size
+            remaining -= size
+            yield data
+
+    def read_range(self, file_path, start, size):
+        """Ler [start, start + size) da entrada decriptando/descomprimindo só os blocos necessários"""
+        entry = self.entries.get(file_path)
+        if entry is None or self.pak_path is None:
+            return self.read(file_path)[start:start + size]
+
+        size = max(0, min(size, entry.size - start))
+        if size <= 0:
+            return b""
+        if self.is_iostore:
+            with profiler.span("read_chunk", CATEGORY_COMPRESS):
+                return entry.read_range(start, size)
+
+        if entry.is_encrypted and (self.pak.key is None or self.pak.key == ZERO_KEY):
+            raise ValueError("Chave AES necessária para ler esta entrada")
+
+        reader = self._get_reader()
+        if entry.compression == COMPRESSION.NONE:
+            data_start = self._data_offset(entry)
+            if not entry.is_encrypted:
+                reader.set_pos(data_start + start)
+                profiler.count("bytes_read", size)
+                return reader.read(size)
+            # AES-ECB: cada bloco de 16 bytes é decriptado sozinho
+            first = start - start % AES_BLOCK_SIZE
+            reader.set_pos(data_start + first)
+            data = reader.read(align(start + size) - first)
+            profiler.count("bytes_read", len(data))
+            skip = start - first
+            return decrypt_blocks(self.pak.key, data)[skip:skip + size]
+
+        if not entry.blocks:
+            return self.read(file_path)[start:start + size]
+
+        # Um único bloco cobre a entrada inteira (mesma regra do pyuepak)
+        block_size = entry.compression_block_size if len(entry.blocks) > 1 else entry.size
+        first = start // block_size
+        last = (start + size - 1) // block_size
+        # A partir da V5 as posições dos blocos são relativas ao início da entrada
+        base = entry.offset if self.version >= PakVersion.V5 else 0
+
+        parts = []
+        with profiler.span("read_blocks", CATEGORY_COMPRESS, blocks=last - first + 1):
+            for index in range(first, last + 1):
+                block = entry.blocks[index]
+                length = block.end - block.start
+                reader.set_pos(base + block.start)
+                data = reader.read(align(length) if entry.is_encrypted else length)
+                profiler.count("bytes_read", len(data))
+                if entry.is_encrypted:
+                    data = decrypt_blocks(self.pak.key, data)[:length]
+                expected = min(block_size, entry.size - index * block_size)
+                parts.append(decompress_block(data, entry.compression, expected))
+        skip = start - first * block_size
+        return b"".join(parts)[skip:skip + size]
+
+    def close(self):
+        """Fechar os Readers abertos por este leitor (em todas as threads)
+
+        Os .ucas de um contêiner IoStore pertencem ao IoStoreFile, que é compartilhado com
+        outras tarefas (PAK aberto, paks montados): eles não são fechados aqui.
+        """
+        with self._lock:
+            for reader in self._readers:
+                reader.close()
+            self._readers = []
+        self._local = threading.local()
+
+
+def parallel_map(func, items, workers=None, cancel_event=None):
+    """Executar func(item) em paralelo e gerar (item, resultado, erro) na ordem de conclusão
+
+    Limita os itens em trânsito para não acumular payloads na memória.
+    """
+    workers = workers or DEFAULT_WORKERS
+    max_in_flight = workers * 4
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        items = iter(items)
+
+        while True:
+            while len(pending) < max_in_flight and not (cancel_event and cancel_event.is_set()):
+                item = next(items, None)
+                if item is None:
+                    break
+                pending[executor.submit(func, item)] = item
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+
+
+class PakSnapshot:
+    """Estado do PAK aberto + alterações pendentes, capturado na thread principal
+
+    Tarefas em segundo plano usam o snapshot em vez de ler self.* da interface,
+    que pode mudar enquanto a tarefa roda.
+    """
+    def __init__(self, pak, pak_path, pak_files_list, added_files, modified_files, deleted_files):
+        self.pak = pak
+        self.pak_path = pak_path
+        self.pak_files_list = list(pak_files_list)
+        self.added_files = dict(added_files)
+        self.modified_files = dict(modified_files)
+        self.deleted_files = set(deleted_files)
+        self.entry_reader = PakEntryReader(pak, pak_path) if pak is not None else None
+
+    def all_files(self):
+        """Lista final de arquivos (incluindo adicionados, excluindo deletados)"""
+        all_files = set(self.pak_files_list) | set(self.added_files.keys())
+        all_files -= self.deleted_files
+        return all_files
+
+    def read(self, file_path):
+        """Ler arquivo usando a versão modificada/adicionada se existir"""
+        if file_path in self.added_files:
+            profiler.count("memory_hits")
+            return load_content(self.added_files[file_path])
+        if file_path in self.modified_files:
+            profiler.count("memory_hits")
+            return load_content(self.modified_files[file_path])
+        return self.entry_reader.read(file_path)
+
+    def read_range(self, file_path, start, size):
+        """Ler um trecho do arquivo sem carregar o conteúdo inteiro"""
+        if file_path in self.added_files:
+            return read_content_range(self.added_files[file_path], start, size)
+        if file_path in self.modified_files:
+            return read_content_range(self.modified_files[file_path], start, size)
+        return self.entry_reader.read_range(file_path, start, size)
+
+    def get_size(self, file_path):
+        """Tamanho descomprimido sem ler o conteúdo (0 se desconhecido)"""
+        if file_path in self.added_files:
+            return len(self.added_files[file_path])
+        if file_path in self.modified_files:
+            return len(self.modified_files[file_path])
+        if self.entry_reader is None:
+            return 0
+        return self.entry_reader.get_size(file_path)
+
+    def close(self):
+        if self.entry_reader is not None:
+            self.entry_reader.close()
+
+
+def fsync_directory(directory):
+    """Garantir que o rename foi persistido (sem efeito no Windows)"""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def backup_file(path):
+    """Preservar a versão anterior do arquivo como <arquivo>.bak"""
+    backup_path = f"{path}.bak"
+    tmp_backup = f"{backup_path}.tmp"
+    if os.path.exists(tmp_backup):
+        os.remove(tmp_backup)
+    try:
+        # Hard link: instantâneo e não duplica o conteúdo no disco
+        os.link(path, tmp_backup)
+    except OSError:
+        shutil.copy2(path, tmp_backup)
+    os.replace(tmp_backup, backup_path)
+    return backup_path
+
+
+class AtomicFileWriter:
+    """Gravar em um temporário na mesma pasta e renomear sobre o destino ao final
+
+    Em caso de erro ou cancelamento o destino original fica intacto.
+    """
+    def __init__(self, output_path, backup=False, buffer_size=WRITE_BUFFER_SIZE):
+        self.output_path = os.path.abspath(output_path)
+        self.directory = os.path.dirname(self.output_path)
+        self.backup = backup
+        self.buffer_size = buffer_size
+        self.backup_path = None
+
+        fd, self.temp_path = tempfile.mkstemp(
+            dir=self.directory,
+            prefix=f".{os.path.basename(self.output_path)}.",
+            suffix=".tmp"
+        )
+        os.close(fd)
+        self.file = None
+
+    def open(self):
+        """Abrir o temporário para escrita com buffer grande"""
+        self.file = open(self.temp_path, "wb", buffering=self.buffer_size)
+        return self.file
+
+    def commit(self):
+        """fsync do temporário e rename atômico sobre o destino"""
+        with profiler.span("fsync_rename", CATEGORY_WRITE):
+            if self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
+            else:
+                # Conteúdo gravado por outra API (ex: PakFile.write)
+                with open(self.temp_path, "rb+") as f:
+                    os.fsync(f.fileno())
+            profiler.count("bytes_written", os.path.getsize(self.temp_path))
+
+            if self.backup and os.path.exists(self.output_path):
+                self.backup_path = backup_file(self.output_path)
+
+            os.replace(self.temp_path, self.output_path)
+            fsync_directory(self.directory)
+
+    def discard(self):
+        """Descartar o temporário (destino não é alterado)"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+
+def atomic_write_pak(pak, output_path, backup=False, cancel_token=None):
+    """Gravar um PakFile de forma atômica (temporário + fsync + rename)"""
+    with AtomicFileWriter(output_path, backup=backup) as writer:
+        with profiler.span("write_pak", CATEGORY_WRITE):
+            pak.write(writer.temp_path)
+
+        # Cancelado durante a gravação: descartar o temporário
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+
+    return writer.backup_path
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Leitura de contêineres IoStore do UE5 (.utoc + .ucas)
+O índice é convertido para o mesmo modelo dos paks (caminho -> entrada)
+Blocos comprimidos são lidos sob demanda e descomprimidos em paralelo
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import os
+import struct
+import threading
+
+from pyuepak.file_io import Reader
+from pyuepak.utils import COMPRESSION
+from pyuepak.version import PakVersion
+
+from pak_crypto import (PakEncryptionInfo, align, decrypt_blocks, format_guid, parse_key,
+                        ZERO_KEY)
+from pak_io import decompress_block
+from pak_profiling import profiler, CATEGORY_READ, CATEGORY_COMPRESS
+
+
+TOC_MAGIC = b"-==--==--==--==-"
+TOC_HEADER_SIZE = 144
+
+# EIoStoreTocVersion
+TOC_VERSION_DIRECTORY_INDEX = 2
+TOC_VERSION_PARTITION_SIZE = 3
+TOC_VERSION_PERFECT_HASH = 4
+TOC_VERSION_PERFECT_HASH_WITH_OVERFLOW = 5
+TOC_VERSION_REPLACE_CHUNK_HASH = 8
+
+# EIoContainerFlags
+CONTAINER_COMPRESSED = 0x01
+CONTAINER_ENCRYPTED = 0x02
+CONTAINER_SIGNED = 0x04
+CONTAINER_INDEXED = 0x08
+
+INVALID_INDEX = 0xFFFFFFFF
+
+# EIoChunkType (UE5): usado para nomear chunks sem caminho no índice de diretórios
+CHUNK_TYPE_NAMES = {
+    1: "ExportBundleData", 2: "BulkData", 3: "OptionalBulkData", 4: "MemoryMappedBulkData",
+    5: "ScriptObjects", 6: "ContainerHeader", 7: "ExternalFile", 8: "ShaderCodeLibrary",
+    9: "ShaderCode", 10: "PackageStoreEntry", 11: "DerivedData", 12: "EditorDerivedData",
+    13: "PackageResource",
+}
+UNNAMED_CHUNKS_DIR = "_chunks"
+
+COMPRESSION_BY_NAME = {"zlib": COMPRESSION.ZLIB, "gzip": COMPRESSION.GZIP, "oodle": COMPRESSION.OODLE}
+
+# Chunks com muitos blocos são descomprimidos em paralelo
+PARALLEL_BLOCK_THRESHOLD = 4
+BLOCK_WORKERS = min(8, (os.cpu_count() or 4))
+
+_block_executor = None
+_block_executor_lock = threading.Lock()
+
+
+def is_iostore_path(path):
+    """Verificar se o caminho é um .utoc (ou .ucas) de IoStore"""
+    return Path(path).suffix.lower() in (".utoc", ".ucas")
+
+
+def get_block_executor():
+    """Pool compartilhado para descompressão de blocos"""
+    global _block_executor
+    with _block_executor_lock:
+        if _block_executor is None:
+            _block_executor = ThreadPoolExecutor(max_workers=BLOCK_WORKERS,
+                                                 thread_name_prefix="iostore-block")
+        return _block_executor
+
+
+def _read_toc_header(data):
+    if len(data) < TOC_HEADER_SIZE or data[:16] != TOC_MAGIC:
+        raise ValueError("Arquivo .utoc inválido")
+
+    header = {}
+    header["version"] = data[16]
+    (header["header_size"], header["entry_count"], header["block_count"],
+     header["block_entry_size"], header["method_count"], header["method_length"],
+     header["block_size"], header["directory_index_size"], header["partition_count"],
+     header["container_id"]) = struct.unpack_from("<IIIIIIIIIQ", data, 20)
+    header["guid"] = data[64:80]
+    header["flags"] = data[80]
+    (header["perfect_hash_seeds"],) = struct.unpack_from("<I", data, 84)
+    (header["partition_size"],) = struct.unpack_from("<Q", data, 88)
+    (header["chunks_without_perfect_hash"],) = struct.unpack_from("<I", data, 96)
+
+    if header["version"] < TOC_VERSION_PARTITION_SIZE:
+        header["partition_count"] = 1
+        header["partition_size"] = (1 << 64) - 1
+    return header
+
+
+def read_toc_encryption_info(toc_path):
+    """Criptografia do contêiner (sem precisar da chave)"""
+    toc_path = Path(toc_path).with_suffix(".utoc")
+    with open(toc_path, "rb") as f:
+        header = _read_toc_header(f.read(TOC_HEADER_SIZE))
+    encrypted = bool(header["flags"] & CONTAINER_ENCRYPTED)
+    return PakEncryptionInfo(format_guid(header["guid"]), encrypted, header["version"])
+
+
+class IoStoreBlock:
+    """Bloco comprimido no .ucas"""
+    __slots__ = ("offset", "compressed_size", "uncompressed_size", "method")
+
+    def __init__(self, offset, compressed_size, uncompressed_size, method):
+        self.offset = offset
+        self.compressed_size = compressed_size
+        self.uncompressed_size = uncompressed_size
+        self.method = method
+
+
+class IoStoreEntry:
+    """Chunk do contêiner com a mesma interface usada para entradas de pak"""
+    __slots__ = ("container", "toc_index", "chunk_id", "offset", "size", "compressed_size",
+                 "compression", "is_encrypted", "hash", "blocks")
+
+    def __init__(self, container, toc_index, chunk_id, offset, size):
+        self.container = container
+        self.toc_index = toc_index
+        self.chunk_id = chunk_id
+        self.offset = offset  # Posição no espaço descomprimido do contêiner
+        self.size = size
+        self.is_encrypted = container.is_encrypted
+        self.hash = None
+
+        block_size = container.block_size
+        first = offset // block_size
+        last = (offset + size - 1) // block_size if size else first - 1
+        self.blocks = range(first, last + 1)
+        self.compressed_size = sum(container.blocks[i].compressed_size for i in self.blocks)
+        method = container.blocks[first].method if size else 0
+        self.compression = container.method_compression(method)
+
+    def read_range(self, start, size):
+        """Ler [start, start + size) descomprimindo apenas os blocos necessários"""
+        size = max(0, min(size, self.size - start))
+        if size <= 0:
+            return b""
+
+        block_size = self.container.block_size
+        absolute = self.offset + start
+        first = absolute // block_size
+        last = (absolute + size - 1) // block_size
+
+        data = b"".join(self.container.read_blocks(range(first, last + 1)))
+        skip = absolute - first * block_size
+        return data[skip:skip + size]
+
+    def iter_blocks(self):
+        """Gerar o conteúdo bloco a bloco (extração em fluxo)"""
+        block_size = self.container.block_size
+        remaining = self.size
+        skip = self.offset - self.blocks.start * block_size
+        for index in self.blocks:
+            data = self.container.read_blocks([index])[0][skip:skip + remaining]
+            skip = 0
+            remaining -= len(data)
+            yield data
+
+    def read_file(self, reader=None, version=None, key=None):
+        """Ler o chunk inteiro (mesma assinatura de Entry.read_file do pyuepak)"""
+        return self.read_range(0, self.size)
+
+
+class IoStoreIndex:
+    """Índice no mesmo formato do pyuepak (entrys: caminho -> entrada)"""
+    def __init__(self):
+        self.mount_point = ""
+        self.entrys = {}
+
+
+class IoStoreFile:
+    """Contêiner IoStore aberto com a interface usada do PakFile"""
+    is_iostore = True
+
+    def __init__(self):
+        # Versão usada ao salvar como .pak
+        self.version = PakVersion.V11
+        self.key = ZERO_KEY
+        self.mount_point = "../../../"
+        self.toc_path = None
+        self.toc_version = 0
+        self.guid = None
+        self.flags = 0
+        self.block_size = 0
+        self.partition_size = 0
+        self.partition_paths = []
+        self.blocks = []
+        self.methods = []
+        self._index = IoStoreIndex()
+        self._footer = None
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+
+    @property
+    def count(self):
+        return len(self._index.entrys)
+
+    @property
+    def is_encrypted(self):
+        return bool(self.flags & CONTAINER_ENCRYPTED)
+
+    def set_key(self, key):
+        self.key = parse_key(key)
+
+    def list_files(self):
+        return list(self._index.entrys.keys())
+
+    def method_compression(self, method):
+        """Método do bloco convertido para o enum do pyuepak"""
+        if method == 0 or method > len(self.methods):
+            return COMPRESSION.NONE
+        return COMPRESSION_BY_NAME.get(self.methods[method - 1].lower(), COMPRESSION.NONE)
+
+    def read(self, path):
+        """Ler o .utoc e montar o índice de caminhos"""
+        self.toc_path = Path(path).with_suffix(".utoc")
+        with profiler.span("parse_toc", CATEGORY_READ):
+            with open(self.toc_path, "rb") as f:
+                data = f.read()
+            self._parse_toc(data)
+
+        # Partições: nome.ucas, nome_s1.ucas, nome_s2.ucas...
+        ucas = self.toc_path.with_suffix(".ucas")
+        self.partition_paths = [str(ucas)] + [
+            str(ucas.with_name(f"{ucas.stem}_s{i}.ucas")) for i in range(1, self.partition_count)
+        ]
+
+    def _parse_toc(self, data):
+        header = _read_toc_header(data)
+        self.toc_version = header["version"]
+        self.flags = header["flags"]
+        self.guid = header["guid"]
+        self.block_size = header["block_size"]
+        self.partition_count = max(1, header["partition_count"])
+        self.partition_size = header["partition_size"]
+
+        if self.is_encrypted and self.key == ZERO_KEY:
+            raise ValueError("Chave AES necessária para este contêiner IoStore")
+
+        count = header["entry_count"]
+        pos = header["header_size"]
+
+        chunk_ids = [data[pos + i * 12:pos + i * 12 + 12] for i in range(count)]
+        pos += count * 12
+
+        offset_lengths = []
+        for i in range(count):
+            raw = data[pos + i * 10:pos + i * 10 + 10]
+            offset_lengths.append((int.from_bytes(raw[:5], "big"), int.from_bytes(raw[5:], "big")))
+        pos += count * 10
+
+        if self.toc_version >= TOC_VERSION_PERFECT_HASH_WITH_OVERFLOW:
+            pos += header["perfect_hash_seeds"] * 4 + header["chunks_without_perfect_hash"] * 4
+        elif self.toc_version >= TOC_VERSION_PERFECT_HASH:
+            pos += header["perfect_hash_seeds"] * 4
+
+        entry_size = header["block_entry_size"] or 12
+        self.blocks = []
+        for i in range(header["block_count"]):
+            raw = data[pos + i * entry_size:pos + i * entry_size + 12]
+            self.blocks.append(IoStoreBlock(
+                int.from_bytes(raw[0:5], "little"),
+                int.from_bytes(raw[5:8], "little"),
+                int.from_bytes(raw[8:11], "little"),
+                raw[11]
+            ))
+        pos += header["block_count"] * entry_size
+
+        length = header["method_length"]
+        self.methods = []
+        for i in range(header["method_count"]):
+            name = data[pos + i * length:pos + (i + 1) * length].split(b"\x00")[0]
+            self.methods.append(name.decode("ascii", errors="replace"))
+        pos += header["method_count"] * length
+
+        if self.flags & CONTAINER_SIGNED:
+            (hash_size,) = struct.unpack_from("<i", data, pos)
+            pos += 4 + hash_size * 2 + header["block_count"] * 20
+
+        paths = {}
+        directory_size = header["directory_index_size"]
+        if (self.toc_version >= TOC_VERSION_DIRECTORY_INDEX and self.flags & CONTAINER_INDEXED
+                and directory_size > 0):
+            directory = data[pos:pos + directory_size]
+            if self.is_encrypted:
+                directory = decrypt_blocks(self.key, directory)
+            paths = self._parse_directory_index(directory)
+            pos += directory_size
+
+        # Metadados: hash do chunk + flags
+        meta_size = 21 if self.toc_version >= TOC_VERSION_REPLACE_CHUNK_HASH else 33
+        hash_size = 20 if self.toc_version >= TOC_VERSION_REPLACE_CHUNK_HASH else 32
+        metas_available = pos + count * meta_size <= len(data)
+
+        entries = {}
+        for i in range(count):
+            offset, size = offset_lengths[i]
+            path = paths.get(i)
+            if path is None:
+                chunk_type = CHUNK_TYPE_NAMES.get(chunk_ids[i][11], f"Tipo{chunk_ids[i][11]}")
+                path = f"{UNNAMED_CHUNKS_DIR}/{chunk_ids[i].hex()}.{chunk_type}"
+            entry = IoStoreEntry(self, i, chunk_ids[i], offset, size)
+            if metas_available:
+                meta = pos + i * meta_size
+                entry.hash = data[meta:meta + hash_size]
+            entries[path] = entry
+
+        self._index.entrys = entries
+
+    def _parse_directory_index(self, data):
+        """FIoDirectoryIndexResource: mount point, pastas, arquivos e tabela de nomes"""
+        reader = Reader(data)
+        try:
+            self.mount_point = reader.string()
+            self._index.mount_point = self.mount_point
+
+            (dir_count,) = struct.unpack("<i", reader.read(4))
+            directories = [struct.unpack("<IIII", reader.read(16)) for _ in range(dir_count)]
+            (file_count,) = struct.unpack("<i", reader.read(4))
+            files = [struct.unpack("<III", reader.read(12)) for _ in range(file_count)]
+            (string_count,) = struct.unpack("<i", reader.read(4))
+            strings = [reader.string() for _ in range(string_count)]
+        finally:
+            reader.close()
+
+        paths = {}
+        if not directories:
+            return paths
+
+        # Percorrer a árvore a partir da raiz (pasta 0, sem nome)
+        stack = [(0, "")]
+        while stack:
+            dir_index, prefix = stack.pop()
+            name, first_child, next_sibling, first_file = directories[dir_index]
+            if name != INVALID_INDEX:
+                prefix = f"{prefix}{strings[name]}/"
+
+            file_index = first_file
+            while file_index != INVALID_INDEX:
+                file_name, next_file, toc_index = files[file_index]
+                paths[toc_index] = prefix + strings[file_name]
+                file_index = next_file
+
+            child = first_child
+            while child != INVALID_INDEX:
+                stack.append((child, prefix))
+                child = directories[child][2]
+
+        return paths
+
+    def _get_handle(self, partition):
+        """Arquivo .ucas aberto exclusivo da thread atual"""
+        handles = getattr(self._local, "handles", None)
+        if handles is None:
+            handles = self._local.handles = {}
+        handle = handles.get(partition)
+        if handle is None:
+            handle = open(self.partition_paths[partition], "rb")
+            handles[partition] = handle
+            with self._handles_lock:
+                self._handles.append(handle)
+        return handle
+
+    def _read_raw(self, offset, size):
+        partition, local_offset = divmod(offset, self.partition_size)
+        handle = self._get_handle(partition)
+        handle.seek(local_offset)
+        return handle.read(size)
+
+    def read_block(self, index):
+        """Ler, decriptar e descomprimir um bloco"""
+        block = self.blocks[index]
+        size = align(block.compressed_size) if self.is_encrypted else block.compressed_size
+        data = self._read_raw(block.offset, size)
+        profiler.count("bytes_read", len(data))
+
+        if self.is_encrypted:
+            data = decrypt_blocks(self.key, data)
+        data = data[:block.compressed_size]
+
+        return decompress_block(data, self.method_compression(block.method), block.uncompressed_size)
+
+    def read_blocks(self, indices):
+        """Ler vários blocos (em paralelo quando são muitos), na ordem pedida"""
+        indices = list(indices)
+        with profiler.span("iostore_blocks", CATEGORY_COMPRESS, blocks=len(indices)):
+            if len(indices) < PARALLEL_BLOCK_THRESHOLD:
+                return [self.read_block(index) for index in indices]
+            return list(get_block_executor().map(self.read_block, indices))
+
+    def read_file(self, path):
+        """Ler um arquivo pelo caminho (mesma interface do PakFile)"""
+        entry = self._index.entrys.get(path)
+        if entry is None:
+            raise KeyError(f"Caminho '{path}' não encontrado no contêiner")
+        return entry.read_file()
+
+    def close(self):
+        """Fechar os arquivos .ucas abertos por todas as threads"""
+        with self._handles_lock:
+            for handle in self._handles:
+                handle.close()
+            self._handles = []
+        self._local = threading.local()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Agendador central de tarefas em segundo plano
+Pool limitado de workers, prioridades e cancelamento cooperativo
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from pak_profiling import profiler
+
+
+# Prioridades (menor valor = mais urgente)
+PRIORITY_INTERACTIVE = 0  # Visualizar, abrir, extrair um arquivo
+PRIORITY_NORMAL = 10  # Salvar, montar
+PRIORITY_BULK = 20  # Extrair tudo, criar PAK, busca de conteúdo
+
+# Estados da tarefa
+STATE_QUEUED = "Na fila"
+STATE_RUNNING = "Executando"
+STATE_DONE = "Concluída"
+STATE_FAILED = "Falhou"
+STATE_CANCELLED = "Cancelada"
+
+# Tarefas concluídas mantidas na lista (as mais antigas são descartadas)
+MAX_FINISHED_JOBS = 100
+
+
+class JobCancelled(Exception):
+    """Levantada dentro da tarefa quando o cancelamento foi solicitado"""
+    pass
+
+
+class CancelToken:
+    """Token de cancelamento cooperativo"""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Interromper a tarefa se o cancelamento foi solicitado"""
+        if self._event.is_set():
+            raise JobCancelled()
+
+    def is_set(self):
+        # Compatível com threading.Event (usado pela busca de conteúdo)
+        return self._event.is_set()
+
+
+class Job:
+    """Uma tarefa agendada e seu progresso"""
+    def __init__(self, job_id, name, func, priority, critical, on_done=None):
+        self.id = job_id
+        self.name = name
+        self.func = func
+        self.priority = priority
+        self.critical = critical  # Tarefas de escrita: o app aguarda antes de fechar
+        self.on_done = on_done
+        self.token = CancelToken()
+
+        self.state = STATE_QUEUED
+        self.done = 0
+        self.total = 0
+        self.bytes_done = 0
+        self.message = ""
+        self.error = None
+        self.result = None
+
+        self.created_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+    def report(self, done=None, total=None, bytes_done=None, message=None):
+        """Atualizar o progresso (chamado pela própria tarefa)"""
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if bytes_done is not None:
+            self.bytes_done = bytes_done
+        if message is not None:
+            self.message = message
+
+    @property
+    def finished(self):
+        return self.state in (STATE_DONE, STATE_FAILED, STATE_CANCELLED)
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def items_per_second(self):
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_second(self):
+        elapsed = self.elapsed
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+
+class JobScheduler:
+    """Pool limitado de workers com fila de prioridades"""
+    def __init__(self, max_workers=3, reserved_interactive=1):
+        self.max_workers = max(1, max_workers)
+        # Workers que tarefas em massa nunca ocupam (reservados para visualizações)
+        self.max_bulk_running = max(1, self.max_workers - reserved_interactive)
+
+        self.jobs = []
+        self._queue = []
+        self._sequence = itertools.count()
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._running_bulk = 0
+        self._shutdown = False
+
+        self._workers = []
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"pak-job-worker-{i}")
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, name, func, priority=PRIORITY_NORMAL, critical=False, on_done=None):
+        """Agendar func(job); on_done(job) é chamado sempre que a tarefa termina
+
+        Inclusive se ela for cancelada antes de começar (func nunca roda): a liberação de
+        recursos da tarefa (progresso, snapshot) deve ficar no on_done.
+        """
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Agendador encerrado")
+            job = Job(next(self._ids), name, func, priority, critical, on_done)
+            self.jobs.append(job)
+            heapq.heappush(self._queue, (priority, next(self._sequence), job))
+            self._condition.notify_all()
+        return job
+
+    def _next_job(self, skipped):
+        """Retirar a próxima tarefa que pode rodar agora (chamado com o lock)
+
+        Tarefas canceladas na fila vão para skipped; o on_done delas é chamado fora do lock.
+        """
+        while self._queue:
+            priority, _, job = self._queue[0]
+            if job.token.cancelled:
+                heapq.heappop(self._queue)
+                self._mark_cancelled(job)
+                skipped.append(job)
+                self._condition.notify_all()
+                continue
+            if priority >= PRIORITY_BULK and self._running_bulk >= self.max_bulk_running:
+                return None
+            heapq.heappop(self._queue)
+            return job
+        return None
+
+    def _mark_cancelled(self, job):
+        job.state = STATE_CANCELLED
+        job.finished_at = time.monotonic()
+
+    def _notify_done(self, job):
+        on_done = job.on_done
+        # Soltar a closure e o resultado: eles seguram snapshots e dados da tarefa
+        job.func = job.on_done = None
+        if on_done:
+            try:
+                on_done(job)
+            except Exception:
+                pass
+        job.result = None
+        self._prune_finished()
+
+    def _prune_finished(self):
+        """Manter apenas as MAX_FINISHED_JOBS tarefas concluídas mais recentes"""
+        with self._condition:
+            finished = [job for job in self.jobs if job.finished]
+            if len(finished) <= MAX_FINISHED_JOBS:
+                return
+            stale = set(map(id, finished[:-MAX_FINISHED_JOBS]))
+            self.jobs = [job for job in self.jobs if id(job) not in stale]
+
+    def _worker_loop(self):
+        while True:
+            skipped = []
+            with self._condition:
+                job = self._next_job(skipped)
+                while job is None and not skipped:
+                    if self._shutdown:
+                        return
+                    self._condition.wait()
+                    job = self._next_job(skipped)
+                if job is not None:
+                    job.state = STATE_RUNNING
+                    job.started_at = time.monotonic()
+                    if job.priority >= PRIORITY_BULK:
+                        self._running_bulk += 1
+
+            for cancelled in skipped:
+                self._notify_done(cancelled)
+            if job is None:
+                continue
+
+            try:
+                # Cada tarefa é uma operação no perfil (cProfile/tracemalloc se solicitado)
+                with profiler.operation(job.name):
+                    job.result = job.func(job)
+                job.state = STATE_CANCELLED if job.token.cancelled else STATE_DONE
+            except JobCancelled:
+                job.state = STATE_CANCELLED
+            except Exception as e:
+                job.error = e
+                job.state = STATE_FAILED
+            finally:
+                job.finished_at = time.monotonic()
+                with self._condition:
+                    if job.priority >= PRIORITY_BULK:
+                        self._running_bulk -= 1
+                    self._condition.notify_all()
+
+            self._notify_done(job)
+
+    def cancel(self, job):
+        """Solicitar o cancelamento de uma tarefa"""
+        job.token.cancel()
+        unstarted = False
+        with self._condition:
+            # Tarefas que ainda não começaram saem da fila imediatamente
+            if job.state == STATE_QUEUED:
+                self._queue = [item for item in self._queue if item[2] is not job]
+                heapq.heapify(self._queue)
+                self._mark_cancelled(job)
+                unstarted = True
+            self._condition.notify_all()
+        if unstarted:
+            self._notify_done(job)
+
+    def cancel_all(self, include_critical=True):
+        """Cancelar todas as tarefas não concluídas"""
+        for job in self.active_jobs():
+            if include_critical or not job.critical:
+                self.cancel(job)
+
+    def active_jobs(self):
+        """Tarefas na fila ou em execução"""
+        with self._condition:
+            return [job for job in self.jobs if not job.finished]
+
+    def clear_finished(self):
+        """Remover tarefas concluídas da lista"""
+        with self._condition:
+            self.jobs = [job for job in self.jobs if not job.finished]
+
+    def shutdown(self, wait=True, timeout=None):
+        """Encerrar os workers (tarefas na fila são canceladas)"""
+        with self._condition:
+            self._shutdown = True
+            for _, _, job in self._queue:
+                job.token.cancel()
+            self._condition.notify_all()
+
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for worker in self._workers:
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                worker.join(remaining)
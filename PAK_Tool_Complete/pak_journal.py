@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Diário das alterações pendentes (adicionar, substituir, deletar) gravado em disco
+Cada operação é uma linha JSON acrescentada ao diário do pak; o conteúdo fica em
+blobs endereçados pelo SHA-1, então recuperar a sessão só relê o diário
+"""
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from pak_search import get_pak_fingerprint
+
+
+SESSIONS_DIR = Path.home() / ".pak_tool" / "sessions"
+BLOBS_DIR = SESSIONS_DIR / "blobs"
+JOURNAL_FORMAT = 1
+
+OP_ADD = "add"
+OP_MODIFY = "modify"
+OP_DELETE = "delete"
+OP_UNDELETE = "undelete"
+
+# Reescrever o diário quando houver muitas operações sobrescritas
+COMPACT_MIN_OPS = 1000
+
+# Blobs mais novos que isto nunca são coletados: outro diário pode ter acabado de gravá-los
+# (put) e ainda não ter registrado a operação (_append)
+BLOB_GC_GRACE_SECONDS = 3600
+BLOB_TEMP_PREFIX = ".blob-"
+
+
+def fsync_file(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class BlobStore:
+    """Conteúdos guardados uma única vez por SHA-1 (mesmo conteúdo = mesmo blob)"""
+    def __init__(self, root=BLOBS_DIR):
+        self.root = Path(root)
+
+    def path(self, digest):
+        return self.root / digest[:2] / digest
+
+    def put(self, data):
+        """Gravar o conteúdo (se ainda não existir) e devolver o SHA-1"""
+        digest = hashlib.sha1(data).hexdigest()
+        path = self.path(digest)
+        if path.exists():
+            try:
+                # Reaproveitado: renovar a data para a coleta não apagá-lo antes do _append
+                os.utime(path)
+                return digest
+            except OSError:
+                pass  # Apagado pela coleta agora mesmo: gravar de novo
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=BLOB_TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                fsync_file(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def get(self, digest):
+        with open(self.path(digest), "rb") as f:
+            return f.read()
+
+    def get_range(self, digest, start, size):
+        with open(self.path(digest), "rb") as f:
+            f.seek(start)
+            return f.read(size)
+
+    def remove_unreferenced(self, referenced, grace_seconds=BLOB_GC_GRACE_SECONDS):
+        """Apagar blobs que nenhum diário usa; devolve quantos saíram
+
+        Temporários de gravações em andamento e blobs recentes (grace_seconds) ficam.
+        """
+        removed = 0
+        if not self.root.exists():
+            return removed
+        cutoff = time.time() - grace_seconds
+        for path in self.root.glob("*/*"):
+            if path.name in referenced or path.name.startswith(BLOB_TEMP_PREFIX):
+                continue
+            try:
+                if path.stat().st_mtime > cutoff:
+                    continue
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+class StagedBlob:
+    """Conteúdo pendente recuperado do diário (lido do disco só quando necessário)"""
+    __slots__ = ("store", "digest", "size")
+
+    def __init__(self, store, digest, size):
+        self.store = store
+        self.digest = digest
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def read(self):
+        return self.store.get(self.digest)
+
+    def read_range(self, start, size):
+        return self.store.get_range(self.digest, start, size)
+
+
+def load_content(content):
+    """Bytes de um conteúdo pendente (em memória ou StagedBlob)"""
+    return content.read() if isinstance(content, StagedBlob) else content
+
+
+def read_content_range(content, start, size):
+    """Trecho de um conteúdo pendente sem ler o blob inteiro"""
+    if isinstance(content, StagedBlob):
+        return content.read_range(start, size)
+    return bytes(content[start:start + size])
+
+
+class RecoveredSession:
+    """Estado reconstruído a partir do diário"""
+    def __init__(self, header):
+        self.header = header
+        self.added_files = {}
+        self.modified_files = {}
+        self.deleted_files = set()
+        self.operations = 0
+
+    @property
+    def change_count(self):
+        return len(self.added_files) + len(self.modified_files) + len(self.deleted_files)
+
+    @property
+    def created(self):
+        return self.header.get("created", 0)
+
+    def pak_changed(self, pak_path):
+        """O pak foi alterado desde o início da sessão?"""
+        try:
+            return get_pak_fingerprint(pak_path) != self.header.get("fingerprint")
+        except OSError:
+            return True
+
+
+class SessionJournal:
+    """Diário append-only das alterações pendentes de um pak"""
+    def __init__(self, pak_path, directory=SESSIONS_DIR, store=None):
+        self.pak_path = os.path.abspath(str(pak_path))
+        self.directory = Path(directory)
+        self.store = store or BlobStore(self.directory / "blobs")
+        name = hashlib.sha1(self.pak_path.encode("utf-8")).hexdigest()
+        self.path = self.directory / f"{name}.journal"
+
+    def exists(self):
+        return self.path.exists()
+
+    def _header(self):
+        return {"format": JOURNAL_FORMAT, "pak": self.pak_path,
+                "fingerprint": get_pak_fingerprint(self.pak_path), "created": time.time()}
+
+    def _append(self, records):
+        """Acrescentar operações e forçar para o disco (sobrevive a queda do processo)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lines = []
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            lines.append(json.dumps(self._header(), ensure_ascii=False))
+        lines.extend(json.dumps(record, ensure_ascii=False) for record in records)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            fsync_file(f)
+
+    def _stage(self, op, file_path, data):
+        digest = self.store.put(data)
+        self._append([{"op": op, "path": file_path, "blob": digest, "size": len(data)}])
+
+    def record_add(self, file_path, data):
+        self._stage(OP_ADD, file_path, data)
+
+    def record_modify(self, file_path, data):
+        self._stage(OP_MODIFY, file_path, data)
+
+    def record_delete(self, file_paths):
+        self._append([{"op": OP_DELETE, "paths": list(file_paths)}])
+
+    def record_undelete(self, file_path):
+        self._append([{"op": OP_UNDELETE, "paths": [file_path]}])
+
+    def replay(self):
+        """Reconstruir as alterações (None se não houver diário)"""
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            return None
+
+        # Última linha incompleta (queda durante a gravação): cortar antes de acrescentar mais
+        complete = raw.rfind(b"\n") + 1
+        if complete < len(raw):
+            with open(self.path, "r+b") as f:
+                f.truncate(complete)
+            raw = raw[:complete]
+
+        lines = raw.decode("utf-8").splitlines()
+        if not lines:
+            return None
+
+        try:
+            session = RecoveredSession(json.loads(lines[0]))
+        except ValueError:
+            return None
+
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            session.operations += 1
+            op = record.get("op")
+            if op in (OP_ADD, OP_MODIFY):
+                blob = StagedBlob(self.store, record["blob"], record["size"])
+                target = session.added_files if op == OP_ADD else session.modified_files
+                target[record["path"]] = blob
+            elif op == OP_DELETE:
+                for file_path in record["paths"]:
+                    session.deleted_files.add(file_path)
+                    session.modified_files.pop(file_path, None)
+                    session.added_files.pop(file_path, None)
+            elif op == OP_UNDELETE:
+                for file_path in record["paths"]:
+                    session.deleted_files.discard(file_path)
+        return session
+
+    def compact(self, session):
+        """Reescrever o diário só com o estado final (substituição atômica)"""
+        if session.operations < COMPACT_MIN_OPS or session.operations <= 2 * session.change_count:
+            return False
+
+        records = [session.header]
+        for op, files in ((OP_ADD, session.added_files), (OP_MODIFY, session.modified_files)):
+            for file_path, blob in files.items():
+                records.append({"op": op, "path": file_path, "blob": blob.digest, "size": blob.size})
+        if session.deleted_files:
+            records.append({"op": OP_DELETE, "paths": sorted(session.deleted_files)})
+
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(json.dumps(record, ensure_ascii=False) for record in records) + "\n")
+            fsync_file(f)
+        os.replace(tmp_path, self.path)
+        session.operations = len(records) - 1
+
+        # Versões sobrescritas não são mais referenciadas
+        self.store.remove_unreferenced(self.referenced_blobs())
+        return True
+
+    def clear(self):
+        """Descartar o diário e os blobs que só ele usava"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self.store.remove_unreferenced(self.referenced_blobs())
+
+    def referenced_blobs(self):
+        """Blobs usados por todos os diários da pasta"""
+        referenced = set()
+        for journal_path in self.directory.glob("*.journal"):
+            try:
+                with open(journal_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if '"blob"' in line:
+                            try:
+                                referenced.add(json.loads(line)["blob"])
+                            except (ValueError, KeyError):
+                                pass
+            except OSError:
+                pass
+        return referenced
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Manifesto de um pak para auditoria: caminho, tamanhos, posição, compressão e hashes
+O SHA-1 dos dados gravados vem do índice (ou do cabeçalho da entrada) sem ler o conteúdo;
+hashes do conteúdo, quando pedidos, são calculados em paralelo lendo cada entrada em fatias
+
+Uso:
+    python pak_manifest.py Jogo.pak -o manifesto.json [--content] [--key 0x...]
+"""
+
+from pathlib import Path
+import argparse
+import csv
+import hashlib
+import io
+import json
+import sys
+import time
+
+from pak_crypto import parse_key
+from pak_io import (AtomicFileWriter, PakEntryReader, get_pak_version, parallel_map,
+                    DEFAULT_WORKERS)
+from pak_transcode import open_source
+
+
+MANIFEST_FORMAT = 1
+
+MANIFEST_FIELDS = ["path", "size", "compressed_size", "offset", "compression", "encrypted",
+                   "sha1", "sha1_source", "content_sha1", "content_xxh64"]
+
+# Origem do campo sha1
+SOURCE_INDEX = "index"  # Índice ou cabeçalho da entrada (dados gravados)
+SOURCE_CONTENT = "content"  # Sem hash no pak (IoStore): SHA-1 do conteúdo
+
+# Entradas grandes são lidas em fatias (múltiplo do bloco de compressão de 64 KB)
+HASH_SLICE_SIZE = 8 * 1024 * 1024
+
+
+def load_xxhash():
+    """Importar xxhash se estiver instalado (opcional); devolve o módulo ou None"""
+    try:
+        import xxhash
+    except ImportError:
+        return None
+    return xxhash
+
+
+def hash_content(entry_reader, file_path, size, xxhash=None, cancel_event=None):
+    """SHA-1 (e xxh64) do conteúdo descomprimido, sem carregar a entrada inteira"""
+    sha1 = hashlib.sha1()
+    xxh = xxhash.xxh64() if xxhash else None
+    for start in range(0, size, HASH_SLICE_SIZE):
+        if cancel_event is not None and cancel_event.is_set():
+            return None, None
+        data = entry_reader.read_range(file_path, start, HASH_SLICE_SIZE)
+        sha1.update(data)
+        if xxh is not None:
+            xxh.update(data)
+    return sha1.hexdigest(), (xxh.hexdigest() if xxh is not None else "")
+
+
+def build_manifest(pak, pak_path, content_hashes=False, workers=None, cancel_event=None,
+                   on_progress=None):
+    """Linhas do manifesto em ordem de caminho (None se cancelado)
+
+    content_hashes: calcular SHA-1/xxh64 do conteúdo de todas as entradas (lê os dados).
+    on_progress(arquivos, bytes) é chamado na thread do manifesto a cada entrada.
+    """
+    reader = PakEntryReader(pak, pak_path)
+    entries = reader.entries
+    xxhash = load_xxhash() if content_hashes else None
+
+    def describe(file_path):
+        # Executado nos workers: o hash do índice custa só o cabeçalho da entrada
+        entry = entries.get(file_path)
+        row = {
+            "path": file_path,
+            "size": entry.size if entry is not None else 0,
+            "compressed_size": entry.compressed_size if entry is not None else 0,
+            "offset": entry.offset if entry is not None else 0,
+            "compression": entry.compression.name if entry is not None else "",
+            "encrypted": bool(entry.is_encrypted) if entry is not None else False,
+            "sha1": "",
+            "sha1_source": "",
+            "content_sha1": "",
+            "content_xxh64": "",
+        }
+        stored_hash = reader.get_stored_hash(file_path)
+        if stored_hash is not None:
+            row["sha1"] = stored_hash.hex()
+            row["sha1_source"] = SOURCE_INDEX
+
+        bytes_read = 0
+        if content_hashes or stored_hash is None:
+            content_sha1, content_xxh64 = hash_content(reader, file_path, row["size"],
+                                                       xxhash, cancel_event)
+            row["content_sha1"] = content_sha1 or ""
+            row["content_xxh64"] = content_xxh64 or ""
+            if stored_hash is None:
+                row["sha1"] = row["content_sha1"]
+                row["sha1_source"] = SOURCE_CONTENT
+            bytes_read = row["size"]
+        return row, bytes_read
+
+    rows = []
+    try:
+        for file_path, result, error in parallel_map(describe, sorted(pak.list_files()),
+                                                     workers or DEFAULT_WORKERS, cancel_event):
+            if error is not None:
+                raise RuntimeError(f"{file_path}: {error}") from error
+            row, bytes_read = result
+            rows.append(row)
+            if on_progress:
+                on_progress(1, bytes_read)
+    finally:
+        reader.close()
+
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    rows.sort(key=lambda row: row["path"])
+    return rows
+
+
+def write_manifest(rows, output_path, pak_path=None, version=None):
+    """Gravar o manifesto em JSON ou CSV (pela extensão) de forma atômica"""
+    output_path = str(output_path)
+    with AtomicFileWriter(output_path) as writer:
+        f = io.TextIOWrapper(writer.open(), encoding="utf-8", newline="")
+        if output_path.lower().endswith(".csv"):
+            csv_writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS)
+            csv_writer.writeheader()
+            csv_writer.writerows(rows)
+        else:
+            json.dump({
+                "format": MANIFEST_FORMAT,
+                "pak": Path(pak_path).name if pak_path else None,
+                "version": getattr(version, "name", version),
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "entries": rows,
+            }, f, indent=2, ensure_ascii=False)
+        # O AtomicFileWriter faz flush/fsync no arquivo binário por baixo
+        f.flush()
+        f.detach()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manifesto de hashes de um pak (JSON ou CSV)")
+    parser.add_argument("pak", help="Arquivo .pak ou .utoc")
+    parser.add_argument("-o", "--output", help="Arquivo de saída (.json ou .csv)")
+    parser.add_argument("--content", action="store_true",
+                        help="Calcular também SHA-1/xxh64 do conteúdo descomprimido")
+    parser.add_argument("--key", help="Chave AES em hex ou base64")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    key = parse_key(args.key) if args.key else None
+    pak = open_source(args.pak, key)
+    output_path = args.output or str(Path(args.pak).with_suffix(".manifest.json"))
+
+    start = time.perf_counter()
+    rows = build_manifest(pak, args.pak, args.content, args.workers)
+    write_manifest(rows, output_path, args.pak, get_pak_version(pak))
+    print(f"{len(rows)} entradas em {time.perf_counter() - start:.1f}s -> {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Mesclagem de vários paks em um só, respeitando a prioridade de cada um
+As entradas vencedoras são copiadas como estão gravadas (sem descomprimir nem decriptar);
+só entradas que precisam mudar de formato (IoStore, outra criptografia) são recodificadas
+
+Uso:
+    python pak_merge.py Base.pak Hotfix_1_P.pak Hotfix_2_P.pak -o Jogo.pak [--report origem.json]
+"""
+
+from pathlib import Path
+import argparse
+import os
+import sys
+import time
+
+from pyuepak.utils import COMPRESSION
+from pyuepak.version import PakVersion
+
+from pak_crypto import parse_key
+from pak_io import PakEntryReader, get_pak_version, parallel_map, DEFAULT_WORKERS
+from pak_mount import MountedPakSet, join_mount_path
+from pak_profiling import profiler, CATEGORY_COMPRESS
+from pak_writer import PakWriter, RawEntry, compress_entry, DEFAULT_BLOCK_SIZE
+
+
+# Mount point relativo à pasta Binaries (como o UnrealPak grava)
+ROOT_MOUNT_POINT = "../../../"
+
+
+class MergeStats:
+    """Totais da mesclagem e o pak que forneceu cada caminho"""
+    def __init__(self):
+        self.files = 0
+        self.raw_files = 0  # Copiadas byte a byte
+        self.converted_files = 0  # Recodificadas (formato diferente do destino)
+        self.overridden = 0  # Caminhos presentes em mais de um pak
+        self.bytes_written = 0
+        self.seconds = 0.0
+        self.sources = {}  # caminho no novo pak -> nome do pak de origem
+
+    @property
+    def mb_per_second(self):
+        return self.bytes_written / (1024 * 1024) / self.seconds if self.seconds > 0 else 0.0
+
+    def format(self):
+        return (f"{self.files} arquivos ({self.raw_files} copiados, {self.converted_files} recodificados, "
+                f"{self.overridden} sobrescritos) | {self.bytes_written / (1024 * 1024):.1f} MB | "
+                f"{self.seconds:.1f}s | {self.mb_per_second:.1f} MB/s")
+
+
+def mount_in_order(pak_paths, key=None):
+    """Montar os paks na ordem dada (o último tem a maior prioridade)"""
+    mounted_set = MountedPakSet()
+    mounted_set.mount_files(pak_paths, orders=list(range(len(pak_paths))),
+                            get_key=(lambda pak_path: key) if key else None)
+    if mounted_set.errors:
+        pak_path, message = mounted_set.errors[0]
+        raise RuntimeError(f"{pak_path}: {message}")
+    return mounted_set
+
+
+def common_mount_prefix(mounts):
+    """Maior pasta comum aos mount points (vira o mount point do pak mesclado)"""
+    folders = [join_mount_path(mounted.mount_point, "").rstrip("/").split("/") for mounted in mounts]
+    common = os.path.commonprefix(folders) if folders else []
+    common = [name for name in common if name]
+    return "/".join(common) + "/" if common else ""
+
+
+def relative_blocks(entry, data_offset, version):
+    """Blocos da entrada com posição relativa ao início dos dados"""
+    if entry.compression == COMPRESSION.NONE:
+        return []
+    if not entry.blocks:
+        return [(0, entry.compressed_size)]
+    # A partir da v5 as posições contam do início da entrada; antes, do início do arquivo
+    base = data_offset - entry.offset if version >= PakVersion.V5 else data_offset
+    return [(block.start - base, block.end - base) for block in entry.blocks]
+
+
+def merge_paks(mounted_set, output_path, version=None, key=None, encrypt=False, encrypt_index=None,
+               guid=None, workers=None, cancel_event=None, on_progress=None, backup=False):
+    """Gravar os arquivos efetivos de um MountedPakSet em um único pak
+
+    version: versão do novo pak (None = a maior entre os paks de origem).
+    on_progress(arquivos, bytes) é chamado na thread da mesclagem a cada entrada gravada.
+    Devolve MergeStats (com a origem de cada caminho) ou None se cancelado.
+    """
+    start = time.perf_counter()
+    mounts = mounted_set.mounts
+    readers = {mounted.mount_index: PakEntryReader(mounted.pak, mounted.path) for mounted in mounts}
+    pak_versions = [get_pak_version(mounted.pak) for mounted in mounts
+                    if not readers[mounted.mount_index].is_iostore]
+    version = PakVersion(version or (max(pak_versions) if pak_versions else PakVersion.V11))
+    prefix = common_mount_prefix(mounts)
+
+    stats = MergeStats()
+    stats.overridden = len(mounted_set.overridden)
+    writer = PakWriter(output_path, version, ROOT_MOUNT_POINT + prefix, key=key, encrypt=encrypt,
+                       encrypt_index=encrypt_index, guid=guid, backup=backup)
+
+    def can_copy(mounted, entry):
+        # Bytes reaproveitáveis só com a mesma criptografia (e a mesma chave)
+        if readers[mounted.mount_index].is_iostore or entry is None:
+            return False
+        if entry.is_encrypted:
+            return writer.encrypt and mounted.pak.key == writer.key
+        return not writer.encrypt
+
+    def record(path, mounted, record, size):
+        stats.files += 1
+        stats.bytes_written += record.compressed_size
+        stats.sources[path] = mounted.name
+        if on_progress:
+            on_progress(1, size)
+
+    try:
+        raw_items = []
+        converted = {}
+        for virtual_path, mounted in sorted(mounted_set.index.items()):
+            internal_path = mounted.files[virtual_path]
+            entry = readers[mounted.mount_index].entries.get(internal_path)
+            item = (virtual_path[len(prefix):], mounted, internal_path)
+            if can_copy(mounted, entry):
+                raw_items.append(item)
+            else:
+                converted[item[0]] = item
+
+        # Cópia direta: limitada pelo disco, sem passar por descompressão
+        for path, mounted, internal_path in raw_items:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            reader = readers[mounted.mount_index]
+            entry = reader.entries[internal_path]
+            data_offset = reader.get_data_offset(internal_path)
+            raw = RawEntry(entry.size, entry.compressed_size, entry.compression,
+                           entry.compression_block_size,
+                           relative_blocks(entry, data_offset, reader.version),
+                           bool(entry.is_encrypted), reader.get_stored_hash(internal_path))
+            record(path, mounted, writer.add_raw(path, raw, reader.iter_stored(internal_path)), entry.size)
+            stats.raw_files += 1
+
+        def prepare(path):
+            # Executado nos workers: ler e recomprimir com o método original da entrada
+            _, mounted, internal_path = converted[path]
+            reader = readers[mounted.mount_index]
+            entry = reader.entries.get(internal_path)
+            data = reader.read(internal_path)
+            compression = entry.compression if entry is not None else COMPRESSION.NONE
+            if compression == COMPRESSION.NONE:
+                return data, None
+            writer.check_compression(compression)
+            with profiler.span("recompress", CATEGORY_COMPRESS):
+                payload = compress_entry(data, compression,
+                                         entry.compression_block_size or DEFAULT_BLOCK_SIZE)
+            return (data if payload is None else None), payload
+
+        if not (cancel_event is not None and cancel_event.is_set()):
+            for path, result, error in parallel_map(prepare, sorted(converted),
+                                                    workers or DEFAULT_WORKERS, cancel_event):
+                if error is not None:
+                    raise RuntimeError(f"{path}: {error}") from error
+                data, payload = result
+                mounted = converted[path][1]
+                if payload is not None:
+                    record(path, mounted, writer.add_payload(path, payload), payload.size)
+                else:
+                    record(path, mounted, writer.add_file(path, data), len(data))
+                stats.converted_files += 1
+
+        # Liberar as origens antes do rename (o destino pode ser um dos paks mesclados)
+        for reader in readers.values():
+            reader.close()
+
+        if cancel_event is not None and cancel_event.is_set():
+            writer.discard()
+            return None
+
+        writer.close()
+    except BaseException:
+        writer.discard()
+        raise
+    finally:
+        for reader in readers.values():
+            reader.close()
+
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesclar paks em um só (o último informado vence)")
+    parser.add_argument("paks", nargs="+", help="Paks em ordem crescente de prioridade")
+    parser.add_argument("-o", "--output", required=True, help="Pak de saída")
+    parser.add_argument("--report", help="JSON com o pak que forneceu cada caminho")
+    parser.add_argument("--version", choices=[version.name for version in PakVersion],
+                        help="Versão do pak de saída (padrão: a maior das origens)")
+    parser.add_argument("--key", help="Chave AES dos paks de origem (hex ou base64)")
+    parser.add_argument("--encrypt", action="store_true", help="Criptografar o resultado com a mesma chave")
+    args = parser.parse_args(argv)
+
+    key = parse_key(args.key) if args.key else None
+    mounted_set = mount_in_order(args.paks, key)
+    stats = merge_paks(mounted_set, args.output, PakVersion[args.version] if args.version else None,
+                       key=key if args.encrypt else None, encrypt=args.encrypt)
+    if args.report:
+        mounted_set.export_index(args.report)
+    print(stats.format())
+    print(f"-> {Path(args.output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
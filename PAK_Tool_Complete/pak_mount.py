@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Montagem de vários arquivos .pak como um único sistema de arquivos virtual
+A prioridade segue as regras do Unreal Engine (ordem do pak + sufixo _P)
+"""
+
+from pathlib import Path
+import os
+
+from pyuepak import PakFile
+
+from pak_io import get_pak_mount_point
+from pak_iostore import IoStoreFile, is_iostore_path
+
+
+# Ordem base usada pelo FPakPlatformFile::GetPakOrderFromPakFilePath
+ENGINE_PAK_ORDER = 1
+PROJECT_PAK_ORDER = 4
+PATCH_ORDER_STEP = 100
+
+
+def get_pak_order(pak_path):
+    """Calcular a ordem de leitura de um pak (maior ordem vence)"""
+    path = Path(pak_path)
+    parts = [p.lower() for p in path.parts]
+
+    # Paks da engine têm prioridade menor que os do projeto
+    if "engine" in parts and "paks" in parts:
+        order = ENGINE_PAK_ORDER
+    else:
+        order = PROJECT_PAK_ORDER
+
+    # Paks de patch (<nome>_<versão>_P.pak) sobrescrevem os paks base
+    stem = path.stem
+    if stem.upper().endswith("_P"):
+        chunk_version = 1
+        version_string = stem[:-2].rsplit("_", 1)[-1] if "_" in stem[:-2] else ""
+        if version_string.isdigit() and int(version_string) >= 1:
+            # +1 para que o primeiro patch ainda vença o pak base
+            chunk_version = int(version_string) + 1
+        order += PATCH_ORDER_STEP * chunk_version
+
+    return order
+
+
+def join_mount_path(mount_point, file_path):
+    """Montar o caminho virtual (mount point + caminho interno)"""
+    mount = (mount_point or "").replace("\\", "/")
+    # "../../../" é relativo à pasta Binaries - equivale à raiz do jogo
+    while mount.startswith("../"):
+        mount = mount[3:]
+    mount = mount.lstrip("/")
+    if mount and not mount.endswith("/"):
+        mount += "/"
+    return mount + file_path.replace("\\", "/").lstrip("/")
+
+
+class MountedPak:
+    """Um pak montado e sua posição na ordem de prioridade"""
+    def __init__(self, pak_path, pak, order, mount_index):
+        self.path = str(pak_path)
+        self.name = Path(pak_path).name
+        self.pak = pak
+        self.order = order
+        self.mount_index = mount_index
+        self.mount_point = get_pak_mount_point(pak)
+
+        # Caminho virtual -> caminho interno no pak
+        self.files = {}
+        for file_path in pak.list_files():
+            self.files[join_mount_path(self.mount_point, file_path)] = file_path
+
+        self.winning_count = 0
+        self.overridden_count = 0
+
+
+class MountedPakSet:
+    """Conjunto de paks montados com índice mesclado por prioridade"""
+    def __init__(self):
+        self.mounts = []
+        self.index = {}  # Caminho virtual -> MountedPak que fornece o arquivo
+        self.overridden = {}  # Caminho virtual -> [MountedPak sobrescritos]
+        self.errors = []  # [(caminho do pak, mensagem)]
+
+    @property
+    def count(self):
+        """Número de arquivos efetivos (após resolver conflitos)"""
+        return len(self.index)
+
+    def mount_directory(self, folder_path, recursive=True, progress_callback=None, get_key=None):
+        """Montar todos os .pak (e contêineres .utoc) de uma pasta"""
+        folder = Path(folder_path)
+        prefix = "**/" if recursive else ""
+        found = list(folder.glob(prefix + "*.pak")) + list(folder.glob(prefix + "*.utoc"))
+        return self.mount_files(found, progress_callback=progress_callback, get_key=get_key)
+
+    def mount_files(self, pak_paths, orders=None, progress_callback=None, get_key=None):
+        """Montar vários paks de uma vez
+
+        orders: prioridade de cada pak (None = regras da engine pelo nome).
+        get_key(caminho) devolve a chave AES do pak, se houver.
+        """
+        if orders is None:
+            # Ordem alfabética = ordem de montagem (desempate igual ao da engine)
+            pak_paths = sorted((Path(p) for p in pak_paths), key=lambda p: str(p).lower())
+            orders = [None] * len(pak_paths)
+
+        for i, (pak_path, order) in enumerate(zip(pak_paths, orders)):
+            pak_path = Path(pak_path)
+            if progress_callback:
+                progress_callback(i, len(pak_paths), pak_path.name)
+            try:
+                self.mount(pak_path, order, rebuild=False, key=get_key(pak_path) if get_key else None)
+            except Exception as e:
+                self.errors.append((str(pak_path), str(e)))
+
+        self.rebuild_index()
+        return len(self.mounts)
+
+    def mount(self, pak_path, order=None, rebuild=True, key=None):
+        """Montar um único pak ou contêiner IoStore"""
+        pak = IoStoreFile() if is_iostore_path(pak_path) else PakFile()
+        if key:
+            pak.set_key(key)
+        pak.read(str(pak_path))
+
+        if order is None:
+            order = get_pak_order(pak_path)
+
+        mounted = MountedPak(pak_path, pak, order, len(self.mounts))
+        self.mounts.append(mounted)
+
+        if rebuild:
+            self.rebuild_index()
+        return mounted
+
+    def unmount_all(self):
+        """Desmontar todos os paks"""
+        self.mounts = []
+        self.index = {}
+        self.overridden = {}
+        self.errors = []
+
+    def by_priority(self):
+        """Paks ordenados do mais prioritário para o menos prioritário"""
+        # Ordenação estável: em caso de empate vence o pak montado primeiro
+        return sorted(self.mounts, key=lambda m: (-m.order, m.mount_index))
+
+    def rebuild_index(self):
+        """Reconstruir o índice mesclado (um único dicionário, busca O(1))"""
+        index = {}
+        overridden = {}
+
+        for mounted in self.by_priority():
+            winning = 0
+            lost = 0
+            for virtual_path in mounted.files:
+                if virtual_path in index:
+                    overridden.setdefault(virtual_path, []).append(mounted)
+                    lost += 1
+                else:
+                    index[virtual_path] = mounted
+                    winning += 1
+            mounted.winning_count = winning
+            mounted.overridden_count = lost
+
+        self.index = index
+        self.overridden = overridden
+
+    def resolve(self, virtual_path):
+        """Retornar o pak que fornece o caminho (ou None)"""
+        return self.index.get(virtual_path)
+
+    def list_files(self):
+        """Listar todos os caminhos virtuais efetivos"""
+        return list(self.index.keys())
+
+    def read_file(self, virtual_path):
+        """Ler o arquivo do pak vencedor"""
+        mounted = self.index.get(virtual_path)
+        if mounted is None:
+            raise KeyError(f"Caminho '{virtual_path}' não encontrado nos paks montados.")
+        return mounted.pak.read_file(mounted.files[virtual_path])
+
+    def export_index(self, output_path):
+        """Exportar o índice mesclado em JSON (caminho -> pak fornecedor)"""
+        import json
+
+        data = {
+            "paks": [
+                {
+                    "name": m.name,
+                    "path": m.path,
+                    "order": m.order,
+                    "mount_point": m.mount_point,
+                    "files": len(m.files),
+                    "winning": m.winning_count,
+                    "overridden": m.overridden_count,
+                }
+                for m in self.by_priority()
+            ],
+            "files": {
+                virtual_path: {
+                    "pak": mounted.name,
+                    "overrides": [m.name for m in self.overridden.get(virtual_path, [])],
+                }
+                for virtual_path, mounted in sorted(self.index.items())
+            },
+        }
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+        return os.path.getsize(output_path)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Instrumentação dos caminhos críticos (abrir, ler, gravar)
+Intervalos de tempo, contadores de bytes/cache e cProfile/tracemalloc opcionais por operação
+Exporta trace no formato do Chrome (chrome://tracing, Perfetto) ou resumo em JSON
+"""
+
+from contextlib import contextmanager
+import io
+import json
+import os
+import threading
+import time
+
+
+# Categorias usadas para separar CPU, disco e memória no resumo
+CATEGORY_PARSE = "parse"
+CATEGORY_READ = "read"
+CATEGORY_COMPRESS = "compress"
+CATEGORY_WRITE = "write"
+CATEGORY_OPERATION = "operation"
+
+# Limite de intervalos guardados (evita crescer sem fim com o perfil ligado)
+MAX_SPANS = 200000
+
+# Linhas do relatório do cProfile e alocações do tracemalloc mostradas
+PROFILE_TOP = 25
+TRACEMALLOC_TOP = 15
+
+
+class Span:
+    """Intervalo medido (tempo real e tempo de CPU da thread)"""
+    __slots__ = ("name", "category", "start", "duration", "cpu", "thread_id", "args")
+
+    def __init__(self, name, category, start, duration, cpu, thread_id, args):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.duration = duration
+        self.cpu = cpu
+        self.thread_id = thread_id
+        self.args = args
+
+
+class OperationReport:
+    """Resultado de uma operação perfilada com cProfile/tracemalloc"""
+    def __init__(self, name, duration, cpu, profile_text=None, peak_memory=None, top_allocations=None):
+        self.name = name
+        self.duration = duration
+        self.cpu = cpu
+        self.profile_text = profile_text
+        self.peak_memory = peak_memory
+        self.top_allocations = top_allocations or []
+
+    @property
+    def bound(self):
+        """Diagnóstico simples: CPU se a thread ficou ocupada a maior parte do tempo"""
+        if self.duration <= 0:
+            return "-"
+        return "CPU" if self.cpu / self.duration >= 0.7 else "E/S"
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "seconds": round(self.duration, 6),
+            "cpu_seconds": round(self.cpu, 6),
+            "bound": self.bound,
+            "peak_memory": self.peak_memory,
+            "top_allocations": self.top_allocations,
+            "profile": self.profile_text,
+        }
+
+
+class Profiler:
+    """Coletor de intervalos e contadores (desligado por padrão, custo quase zero)"""
+    def __init__(self):
+        self.enabled = False
+        self.deep_next = False  # cProfile + tracemalloc na próxima operação
+
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.spans = []
+        self.counters = {}
+        self.reports = []
+
+    def reset(self):
+        """Descartar tudo o que foi coletado"""
+        with self._lock:
+            self._origin = time.perf_counter()
+            self.spans = []
+            self.counters = {}
+            self.reports = []
+
+    @contextmanager
+    def span(self, name, category=CATEGORY_READ, **args):
+        """Medir o bloco como um intervalo"""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            cpu = time.thread_time() - cpu_start
+            span = Span(name, category, start - self._origin, duration, cpu,
+                        threading.get_ident(), args)
+            with self._lock:
+                if len(self.spans) < MAX_SPANS:
+                    self.spans.append(span)
+
+    def count(self, name, value=1):
+        """Incrementar um contador (bytes lidos, acertos de cache...)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def operation(self, name):
+        """Operação de alto nível (salvar, extrair...); com deep_next liga cProfile/tracemalloc"""
+        deep = self.enabled and self.deep_next
+        if deep:
+            self.deep_next = False
+        if not deep:
+            with self.span(name, CATEGORY_OPERATION):
+                yield
+            return
+
+        # Importados só aqui: raramente usados e lentos para carregar na abertura do programa
+        import cProfile
+        import pstats
+        import tracemalloc
+
+        # cProfile só observa a thread que o ligou (a do worker)
+        profile = cProfile.Profile()
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        profile.enable()
+        try:
+            with self.span(name, CATEGORY_OPERATION):
+                yield
+        finally:
+            profile.disable()
+            duration = time.perf_counter() - start
+            cpu = time.thread_time() - cpu_start
+
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+            top_allocations = [
+                {"location": str(stat.traceback[0]), "bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]
+            ]
+
+            output = io.StringIO()
+            pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(PROFILE_TOP)
+
+            report = OperationReport(name, duration, cpu, output.getvalue(), peak, top_allocations)
+            with self._lock:
+                self.reports.append(report)
+
+    def summary(self):
+        """Totais por intervalo e categoria, contadores e relatórios"""
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+            reports = list(self.reports)
+
+        by_name = {}
+        by_category = {}
+        for span in spans:
+            stats = by_name.setdefault(span.name, {"category": span.category, "count": 0,
+                                                   "seconds": 0.0, "cpu_seconds": 0.0, "max_seconds": 0.0})
+            stats["count"] += 1
+            stats["seconds"] += span.duration
+            stats["cpu_seconds"] += span.cpu
+            stats["max_seconds"] = max(stats["max_seconds"], span.duration)
+
+            if span.category != CATEGORY_OPERATION:
+                category = by_category.setdefault(span.category, {"seconds": 0.0, "cpu_seconds": 0.0})
+                category["seconds"] += span.duration
+                category["cpu_seconds"] += span.cpu
+
+        return {
+            "spans": by_name,
+            "categories": by_category,
+            "counters": counters,
+            "operations": [report.to_dict() for report in reports],
+            "dropped_spans": len(spans) >= MAX_SPANS,
+        }
+
+    def format_summary(self):
+        """Resumo em texto para a aba de log"""
+        summary = self.summary()
+        lines = ["⏱️ Perfil:"]
+        for name, stats in sorted(summary["spans"].items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"   {name:<24} {stats['count']:>7}x  {stats['seconds']:>8.3f}s  "
+                         f"CPU {stats['cpu_seconds']:>8.3f}s  máx {stats['max_seconds'] * 1000:.1f} ms")
+        for name, value in sorted(summary["counters"].items()):
+            if name.startswith("bytes"):
+                lines.append(f"   {name:<24} {value / (1024 * 1024):.2f} MB")
+            else:
+                lines.append(f"   {name:<24} {value}")
+        for report in self.reports:
+            peak = f" | pico {report.peak_memory / (1024 * 1024):.1f} MB" if report.peak_memory else ""
+            lines.append(f"   {report.name}: {report.duration:.3f}s, CPU {report.cpu:.3f}s "
+                         f"({report.bound}){peak}")
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, output_path):
+        """Gravar no formato Trace Event (abrir em chrome://tracing ou ui.perfetto.dev)"""
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+
+        pid = os.getpid()
+        events = []
+        for span in spans:
+            args = dict(span.args)
+            args["cpu_ms"] = round(span.cpu * 1000, 3)
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args,
+            })
+
+        end = max((span.start + span.duration for span in spans), default=0.0)
+        for name, value in counters.items():
+            events.append({"name": name, "ph": "C", "ts": end * 1e6, "pid": pid, "args": {name: value}})
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export_summary(self, output_path):
+        """Gravar o resumo em JSON"""
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+
+
+# Instância única usada por todos os módulos
+profiler = Profiler()
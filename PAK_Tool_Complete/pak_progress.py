@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Canal de progresso entre tarefas em segundo plano e a interface Tk
+O worker só incrementa contadores; a interface lê e publica a uma taxa fixa
+"""
+
+import threading
+import time
+
+
+# 10 atualizações por segundo são suficientes para a barra de status
+DEFAULT_INTERVAL_MS = 100
+
+
+class ProgressStats:
+    """Fotografia do progresso em um instante"""
+    def __init__(self, files, bytes_done, total_files, total_bytes, elapsed):
+        self.files = files
+        self.bytes_done = bytes_done
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.elapsed = elapsed
+
+    @property
+    def files_per_second(self):
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_second(self):
+        return self.bytes_done / (1024 * 1024) / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Segundos restantes estimados (None se não for possível estimar)"""
+        if self.elapsed <= 0:
+            return None
+        # Bytes estimam melhor que arquivos quando os tamanhos variam muito
+        if self.total_bytes and self.bytes_done:
+            rate = self.bytes_done / self.elapsed
+            return max(0.0, (self.total_bytes - self.bytes_done) / rate)
+        if self.total_files and self.files:
+            rate = self.files / self.elapsed
+            return max(0.0, (self.total_files - self.files) / rate)
+        return None
+
+
+def format_eta(seconds):
+    """Formatar segundos como m:ss ou h:mm:ss"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def format_progress(label, stats):
+    """Texto da barra de status: 'Extraindo... 120/5000 | 850 arq/s | 45.3 MB/s | ETA 0:05'"""
+    if stats.total_files:
+        count = f"{stats.files}/{stats.total_files}"
+    else:
+        count = f"{stats.files}"
+    return (f"{label} {count} | {stats.files_per_second:.0f} arq/s | "
+            f"{stats.mb_per_second:.1f} MB/s | ETA {format_eta(stats.eta)}")
+
+
+class ProgressChannel:
+    """Contadores compartilhados publicados na thread Tk a uma taxa fixa
+
+    Deve ser criado e iniciado na thread principal; add() pode ser chamado de qualquer thread.
+    """
+    def __init__(self, root, callback, total_files=0, total_bytes=0, job=None,
+                 interval_ms=DEFAULT_INTERVAL_MS):
+        self.root = root
+        self.callback = callback
+        self.job = job
+        self.interval_ms = interval_ms
+
+        self._lock = threading.Lock()
+        self._files = 0
+        self._bytes = 0
+        self._total_files = total_files
+        self._total_bytes = total_bytes
+        self._started_at = time.monotonic()
+        self._finished = False
+        self._last_published = None
+
+    def set_totals(self, total_files=None, total_bytes=None):
+        """Definir os totais quando forem conhecidos (worker)"""
+        with self._lock:
+            if total_files is not None:
+                self._total_files = total_files
+            if total_bytes is not None:
+                self._total_bytes = total_bytes
+
+    def add(self, files=1, bytes_count=0):
+        """Contabilizar arquivos/bytes processados (worker)"""
+        with self._lock:
+            self._files += files
+            self._bytes += bytes_count
+            files_done, bytes_done, total_files = self._files, self._bytes, self._total_files
+        if self.job is not None:
+            self.job.report(done=files_done, total=total_files, bytes_done=bytes_done)
+
+    def restart_clock(self):
+        """Reiniciar a medição de tempo (ex: quando a tarefa sai da fila)"""
+        with self._lock:
+            self._started_at = time.monotonic()
+
+    def stats(self):
+        """Fotografia atual dos contadores"""
+        with self._lock:
+            return ProgressStats(self._files, self._bytes, self._total_files,
+                                 self._total_bytes, time.monotonic() - self._started_at)
+
+    def start(self):
+        """Começar a publicar na interface (thread principal)"""
+        self.root.after(self.interval_ms, self._tick)
+        return self
+
+    def finish(self):
+        """Parar de publicar (pode ser chamado pelo worker)"""
+        self._finished = True
+
+    def _tick(self):
+        if self._finished:
+            return
+
+        stats = self.stats()
+        # Só repintar quando algo mudou
+        current = (stats.files, stats.bytes_done, stats.total_files)
+        if current != self._last_published:
+            self._last_published = current
+            self.callback(stats)
+
+        self.root.after(self.interval_ms, self._tick)
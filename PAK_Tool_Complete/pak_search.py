@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Busca de conteúdo dentro das entradas de um .pak
+Pool de workers em paralelo, filtro por extensão e índice n-gram persistente opcional
+"""
+
+from array import array
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+import hashlib
+import os
+import struct
+import sys
+import zlib
+
+from pak_profiling import profiler
+
+
+# Amostra usada para detectar blobs incompressíveis (texturas, áudio, dados já comprimidos)
+SAMPLE_SIZE = 4096
+INCOMPRESSIBLE_RATIO = 0.95
+
+# Extensões que sempre são varridas, mesmo que a amostra pareça incompressível
+TEXT_EXTENSIONS = {'.txt', '.ini', '.cfg', '.log', '.xml', '.json', '.md', '.csv'}
+
+INDEX_MAGIC = b"PKNG"
+INDEX_VERSION = 2
+INDEX_DIR = Path.home() / ".pak_tool" / "search_index"
+
+# Bits do filtro de n-gramas por arquivo (potência de 2 entre os limites)
+MIN_FILTER_BITS = 1 << 10
+MAX_FILTER_BITS = 1 << 20
+BITS_PER_NGRAM = 8
+
+# Entradas maiores que isso ficam fora do índice (sempre varridas)
+MAX_INDEXED_BYTES = 4 * 1024 * 1024
+
+# Inteiro sem sinal de 4 bytes para extrair os trigramas em bloco
+_WORD_TYPECODE = next(code for code in "IL" if array(code).itemsize == 4)
+
+
+def is_incompressible(sample):
+    """Verificar se a amostra praticamente não comprime (alta entropia)"""
+    if len(sample) < 256:
+        return False
+    return len(zlib.compress(sample, 1)) >= len(sample) * INCOMPRESSIBLE_RATIO
+
+
+def parse_extensions(text):
+    """Converter '.ini uasset, .json' em {'.ini', '.uasset', '.json'}"""
+    extensions = set()
+    for ext in text.replace(",", " ").replace(";", " ").split():
+        ext = ext.lower()
+        extensions.add(ext if ext.startswith(".") else "." + ext)
+    return extensions
+
+
+def get_pak_fingerprint(pak_path):
+    """Identificador do pak em disco (caminho, tamanho e data de modificação)"""
+    stat = os.stat(pak_path)
+    key = f"{os.path.abspath(pak_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _ngram_bit(ngram, bits):
+    # Hash multiplicativo determinístico (hash() do Python muda a cada execução)
+    return (int.from_bytes(ngram, "little") * 2654435761) & (bits - 1)
+
+
+class NgramIndex:
+    """Índice persistente de trigramas por arquivo (filtro de bits estilo Bloom)"""
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.filters = {}  # caminho -> (bits, bytes) ou None se não indexável
+
+    @property
+    def index_path(self):
+        return INDEX_DIR / f"{self.fingerprint}.idx"
+
+    @staticmethod
+    def _unique_ngrams(data, limit):
+        """Trigramas distintos como inteiros little-endian de 24 bits (None acima do limite)"""
+        # Cada trigrama começa no byte 0 de uma palavra de 4 bytes em um dos 4
+        # deslocamentos; zerar o 4º byte da palavra e converter em array faz o
+        # trabalho pesado em C em vez de fatiar byte a byte.
+        padded = data + b"\0"
+        ngrams = set()
+        for offset in range(4):
+            words = (len(padded) - offset) // 4
+            if words <= 0:
+                break
+            buf = bytearray(padded[offset:offset + words * 4])
+            buf[3::4] = bytes(words)
+            values = array(_WORD_TYPECODE, buf)
+            if sys.byteorder != "little":
+                values.byteswap()
+            ngrams.update(values)
+            if len(ngrams) > limit:
+                return None
+        return ngrams
+
+    @classmethod
+    def build_filter(cls, data):
+        """Criar o filtro de trigramas do conteúdo (sem diferenciar maiúsculas)
+
+        Retorna None quando o conteúdo é grande demais ou o filtro saturaria,
+        pois um filtro cheio nunca descarta nada e só ocupa espaço.
+        """
+        if len(data) > MAX_INDEXED_BYTES:
+            return None
+        ngrams = cls._unique_ngrams(data.lower(), MAX_FILTER_BITS // BITS_PER_NGRAM)
+        if ngrams is None:
+            return None
+
+        bits = MIN_FILTER_BITS
+        while bits < len(ngrams) * BITS_PER_NGRAM:
+            bits <<= 1
+
+        mask = bits - 1
+        bitmap = bytearray(bits // 8)
+        for ngram in ngrams:
+            bit = (ngram * 2654435761) & mask
+            bitmap[bit >> 3] |= 1 << (bit & 7)
+        return bits, bytes(bitmap)
+
+    def add(self, file_path, data):
+        """Indexar o conteúdo de um arquivo (None = nunca descartar na busca)"""
+        self.filters[file_path] = self.build_filter(data) if data is not None else None
+
+    def may_contain(self, file_path, pattern):
+        """False somente se o arquivo com certeza não contém o padrão"""
+        if file_path not in self.filters:
+            return True
+        entry = self.filters[file_path]
+        if entry is None or len(pattern) < 3:
+            return True
+
+        bits, bitmap = entry
+        pattern = pattern.lower()
+        for i in range(len(pattern) - 2):
+            bit = _ngram_bit(pattern[i:i + 3], bits)
+            if not bitmap[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def save(self):
+        """Gravar o índice em disco"""
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(struct.pack("<II", INDEX_VERSION, len(self.filters)))
+            for file_path, entry in self.filters.items():
+                encoded = file_path.encode("utf-8")
+                f.write(struct.pack("<I", len(encoded)))
+                f.write(encoded)
+                if entry is None:
+                    f.write(struct.pack("<I", 0))
+                else:
+                    bits, bitmap = entry
+                    f.write(struct.pack("<I", bits))
+                    f.write(bitmap)
+
+        os.replace(tmp_path, self.index_path)
+
+    @classmethod
+    def load(cls, fingerprint):
+        """Carregar o índice do pak (None se não existir ou estiver inválido)"""
+        index = cls(fingerprint)
+        try:
+            with open(index.index_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if data[:4] != INDEX_MAGIC:
+            return None
+        version, count = struct.unpack_from("<II", data, 4)
+        if version != INDEX_VERSION:
+            return None
+
+        pos = 12
+        try:
+            for _ in range(count):
+                (length,) = struct.unpack_from("<I", data, pos)
+                pos += 4
+                file_path = data[pos:pos + length].decode("utf-8")
+                pos += length
+                (bits,) = struct.unpack_from("<I", data, pos)
+                pos += 4
+                if bits:
+                    index.filters[file_path] = (bits, data[pos:pos + bits // 8])
+                    pos += bits // 8
+                else:
+                    index.filters[file_path] = None
+        except (struct.error, UnicodeDecodeError):
+            return None
+
+        return index
+
+
+class ContentMatch:
+    """Resultado da busca em um arquivo"""
+    def __init__(self, file_path, count, first_offset, snippet):
+        self.file_path = file_path
+        self.count = count
+        self.first_offset = first_offset
+        self.snippet = snippet
+
+
+class ContentSearch:
+    """Busca de conteúdo em paralelo nas entradas de um pak"""
+    def __init__(self, read_func, head_func=None, workers=None):
+        self.read_func = read_func
+        self.head_func = head_func
+        self.workers = workers or min(32, (os.cpu_count() or 4) + 4)
+
+        self.candidates = 0
+        self.scanned = 0
+        self.skipped = 0
+        self.errors = 0
+
+    def _search_one(self, file_path, pattern, case_sensitive, skip_incompressible, index):
+        ext = Path(file_path).suffix.lower()
+
+        check_sample = skip_incompressible and ext not in TEXT_EXTENSIONS
+
+        # Descartar blobs incompressíveis antes de ler a entrada inteira
+        if check_sample and self.head_func:
+            sample = self.head_func(file_path, SAMPLE_SIZE)
+            if sample is not None:
+                check_sample = False
+                if is_incompressible(sample):
+                    if index is not None:
+                        index.add(file_path, None)
+                    return "skipped", None
+
+        data = self.read_func(file_path)
+
+        # Entradas comprimidas só podem ser amostradas depois de descomprimidas
+        if check_sample and is_incompressible(data[:SAMPLE_SIZE]):
+            if index is not None:
+                index.add(file_path, None)
+            return "skipped", None
+
+        if index is not None:
+            index.add(file_path, data)
+
+        haystack = data if case_sensitive else data.lower()
+        count = haystack.count(pattern)
+        if not count:
+            return "scanned", None
+
+        first_offset = haystack.find(pattern)
+        start = max(0, first_offset - 40)
+        snippet = data[start:first_offset + len(pattern) + 40].decode("utf-8", errors="replace")
+        return "scanned", ContentMatch(file_path, count, first_offset, snippet)
+
+    def search(self, file_paths, pattern, extensions=None, case_sensitive=False,
+               skip_incompressible=True, index=None, volatile_paths=(),
+               on_match=None, cancel_event=None):
+        """Buscar o padrão (bytes ou str) e chamar on_match a cada arquivo encontrado
+
+        volatile_paths: arquivos alterados em memória, que não usam nem alimentam o índice
+        """
+        if isinstance(pattern, str):
+            pattern = pattern.encode("utf-8")
+        if not case_sensitive:
+            pattern = pattern.lower()
+
+        # Filtrar por extensão e pelo índice n-gram antes de ler qualquer payload
+        candidates = []
+        index_hits = 0
+        for file_path in file_paths:
+            if extensions and Path(file_path).suffix.lower() not in extensions:
+                continue
+            if (index is not None and file_path not in volatile_paths
+                    and not index.may_contain(file_path, pattern)):
+                index_hits += 1
+                continue
+            candidates.append(file_path)
+        self.candidates = len(candidates)
+        profiler.count("search_index_hits", index_hits)
+
+        matches = []
+        max_in_flight = self.workers * 4  # Limita a memória de payloads em trânsito
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            paths = iter(candidates)
+
+            while True:
+                while len(pending) < max_in_flight and not (cancel_event and cancel_event.is_set()):
+                    file_path = next(paths, None)
+                    if file_path is None:
+                        break
+                    file_index = None if file_path in volatile_paths else index
+                    future = executor.submit(self._search_one, file_path, pattern, case_sensitive,
+                                             skip_incompressible, file_index)
+                    pending[future] = file_path
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    try:
+                        status, match = future.result()
+                    except Exception:
+                        self.errors += 1
+                        continue
+
+                    if status == "skipped":
+                        self.skipped += 1
+                    else:
+                        self.scanned += 1
+
+                    if match is not None:
+                        matches.append(match)
+                        if on_match:
+                            on_match(match)
+
+        return matches
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local, somente leitura, sobre um pak aberto ou um conjunto de paks montados
+Listagem em JSON e download de entradas com suporte a Range; o conteúdo é lido em fatias
+(só os blocos comprimidos necessários) com cache LRU, e as conexões são atendidas com asyncio
+
+Uso:
+    python pak_server.py Base.pak Patch_P.pak [--port 8765] [--key 0x...]
+
+Rotas:
+    GET /             informações do servidor (JSON)
+    GET /files        lista de arquivos (?filter=termo&limit=N)
+    GET /files/<caminho>  conteúdo da entrada (aceita Range: bytes=início-fim)
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+import argparse
+import asyncio
+import hashlib
+import json
+import mimetypes
+import sys
+import threading
+import time
+import zlib
+
+from pak_io import PakEntryReader, DEFAULT_WORKERS
+from pak_journal import StagedBlob
+from pak_profiling import profiler
+from pak_search import get_pak_fingerprint
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Fatias de 256 KB (4 blocos de compressão) em um cache de 64 MB compartilhado pelos clientes
+CACHE_CHUNK_SIZE = 256 * 1024
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+MAX_HEADER_SIZE = 16 * 1024
+DEFAULT_LIST_LIMIT = 100000
+
+SERVER_NAME = "PakTool"
+
+STATUS_TEXT = {
+    200: "OK",
+    206: "Partial Content",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    416: "Range Not Satisfiable",
+    500: "Internal Server Error",
+}
+
+
+class SnapshotSource:
+    """Arquivos do PAK aberto (PakSnapshot, inclui alterações pendentes)"""
+    def __init__(self, snapshot, name=None):
+        self.snapshot = snapshot
+        self.name = name or str(snapshot.pak_path)
+        self._sizes = {file_path: snapshot.get_size(file_path) for file_path in snapshot.all_files()}
+        self._fingerprint = get_pak_fingerprint(snapshot.pak_path) if snapshot.pak_path else ""
+        self._pending_tags = {}
+
+    def list_files(self):
+        return [(file_path, size, self.name) for file_path, size in sorted(self._sizes.items())]
+
+    def get_size(self, file_path):
+        return self._sizes.get(file_path)
+
+    def get_etag(self, file_path):
+        """Hash do conteúdo pendente ou identificador do pak em disco"""
+        content = self.snapshot.added_files.get(file_path)
+        if content is None:
+            content = self.snapshot.modified_files.get(file_path)
+        if content is None:
+            return self._fingerprint
+        if isinstance(content, StagedBlob):
+            return content.digest
+        # O snapshot não muda: o hash de cada conteúdo em memória é calculado uma vez
+        tag = self._pending_tags.get(file_path)
+        if tag is None:
+            tag = self._pending_tags[file_path] = hashlib.sha1(content).hexdigest()
+        return tag
+
+    def read_range(self, file_path, start, size):
+        return self.snapshot.read_range(file_path, start, size)
+
+    def close(self):
+        self.snapshot.close()
+
+
+class MountedSource:
+    """Arquivos efetivos de um MountedPakSet (caminhos virtuais, o pak de maior prioridade vence)"""
+    def __init__(self, mounted_set):
+        self.mounted_set = mounted_set
+        self.name = ", ".join(mounted.name for mounted in mounted_set.by_priority())
+        self._readers = {mounted.mount_index: PakEntryReader(mounted.pak, mounted.path)
+                         for mounted in mounted_set.mounts}
+        self._fingerprints = {mounted.mount_index: get_pak_fingerprint(mounted.path)
+                              for mounted in mounted_set.mounts}
+
+    def _resolve(self, virtual_path):
+        mounted = self.mounted_set.index.get(virtual_path)
+        if mounted is None:
+            return None, None
+        return self._readers[mounted.mount_index], mounted.files[virtual_path]
+
+    def list_files(self):
+        files = []
+        for virtual_path, mounted in sorted(self.mounted_set.index.items()):
+            files.append((virtual_path, self.get_size(virtual_path), mounted.name))
+        return files
+
+    def get_size(self, virtual_path):
+        reader, internal_path = self._resolve(virtual_path)
+        return reader.get_size(internal_path) if reader is not None else None
+
+    def read_range(self, virtual_path, start, size):
+        reader, internal_path = self._resolve(virtual_path)
+        return reader.read_range(internal_path, start, size)
+
+    def get_etag(self, virtual_path):
+        """Identificador do pak que fornece o arquivo (muda se o pak em disco mudar)"""
+        mounted = self.mounted_set.index.get(virtual_path)
+        return self._fingerprints[mounted.mount_index] if mounted is not None else ""
+
+    def close(self):
+        for reader in self._readers.values():
+            reader.close()
+
+
+class ChunkCache:
+    """Fatias de entradas já descomprimidas, LRU limitado em bytes (seguro entre threads)"""
+    def __init__(self, read_range, max_bytes=DEFAULT_CACHE_BYTES, chunk_size=CACHE_CHUNK_SIZE):
+        self.read_range = read_range
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+        self._chunks = OrderedDict()  # (caminho, índice) -> bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, file_path, index):
+        key = (file_path, index)
+        with self._lock:
+            data = self._chunks.get(key)
+            if data is not None:
+                self._chunks.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = self.read_range(file_path, index * self.chunk_size, self.chunk_size)
+        with self._lock:
+            if key not in self._chunks and len(data) <= self.max_bytes:
+                self._chunks[key] = data
+                self._bytes += len(data)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._chunks.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return data
+
+    def read(self, file_path, start, end):
+        """Gerar [start, end) em fatias do cache"""
+        position = start
+        while position < end:
+            index = position // self.chunk_size
+            data = self.get(file_path, index)
+            skip = position - index * self.chunk_size
+            piece = data[skip:skip + end - position]
+            if not piece:
+                break
+            yield piece
+            position += len(piece)
+
+
+def parse_range(header, size):
+    """Intervalo [início, fim) de 'bytes=a-b', 'bytes=a-' ou 'bytes=-n'
+
+    Devolve None para ignorar o cabeçalho (vários intervalos ou formato desconhecido,
+    responde com o arquivo inteiro) e levanta ValueError se o intervalo não cabe no arquivo.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, dash, last = ranges.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise ValueError(header)
+            return max(0, size - suffix), size
+        start = int(first)
+        end = int(last) + 1 if last else size
+    except ValueError:
+        raise ValueError(header)
+    if start >= size or end <= start:
+        raise ValueError(header)
+    return start, min(end, size)
+
+
+class PakServer:
+    """Servidor asyncio em uma thread própria (ou no loop de quem chama, via serve())"""
+    def __init__(self, source, host=DEFAULT_HOST, port=DEFAULT_PORT, cache_bytes=DEFAULT_CACHE_BYTES,
+                 workers=None, on_request=None):
+        self.source = source
+        self.host = host
+        self.port = port
+        self.cache = ChunkCache(source.read_range, cache_bytes)
+        self.on_request = on_request  # on_request(método, caminho, status, bytes) para o log
+        self.requests = 0
+        self.bytes_sent = 0
+        self.started = time.time()
+
+        self._executor = ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS)
+        self._lower_paths = None
+        self._loop = None
+        self._server = None
+        self._serve_task = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    async def serve(self):
+        """Atender até ser cancelado"""
+        self._serve_task = asyncio.current_task()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self):
+        """Iniciar em segundo plano; devolve a porta (útil com port=0)"""
+        def run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.serve())
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                self._error = e
+                self._ready.set()
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="pak-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self.port
+
+    async def _shutdown(self):
+        # Encerrar as conexões abertas antes do próprio servidor
+        current = asyncio.current_task()
+        connections = [task for task in asyncio.all_tasks()
+                       if task is not current and task is not self._serve_task]
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+        self._serve_task.cancel()
+
+    def stop(self):
+        """Parar o servidor e fechar a origem"""
+        if self._loop is not None and self._serve_task is not None and self._thread.is_alive():
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+            except Exception:
+                pass  # O loop já terminou
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+        self.source.close()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                if len(head) > MAX_HEADER_SIZE:
+                    await self._send_error(writer, "GET", 400, "Cabeçalho muito grande")
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._send_error(writer, "GET", 400, "Requisição inválida")
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (version.upper() == "HTTP/1.1"
+                              and headers.get("connection", "").lower() != "close")
+                await self._dispatch(writer, method.upper(), target, headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def _dispatch(self, writer, method, target, headers, keep_alive):
+        self.requests += 1
+        if method not in ("GET", "HEAD"):
+            await self._send_error(writer, method, 405, "Somente GET e HEAD", keep_alive)
+            return
+
+        url = urlsplit(target)
+        path = unquote(url.path)
+        try:
+            if path in ("", "/"):
+                await self._send_json(writer, method, self._info(), keep_alive)
+            elif path.rstrip("/") == "/files":
+                query = parse_qs(url.query)
+                term = query.get("filter", [""])[0].lower()
+                try:
+                    limit = int(query.get("limit", [DEFAULT_LIST_LIMIT])[0])
+                except ValueError:
+                    await self._send_error(writer, method, 400, "limit deve ser um número inteiro", keep_alive)
+                    return
+                if limit < 1:
+                    await self._send_error(writer, method, 400, "limit deve ser maior que zero", keep_alive)
+                    return
+                files = await self._run(self._list, term, limit)
+                await self._send_json(writer, method, files, keep_alive)
+            elif path.startswith("/files/"):
+                await self._send_entry(writer, method, path[len("/files/"):], headers, keep_alive)
+            else:
+                await self._send_error(writer, method, 404, "Rota desconhecida", keep_alive)
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            await self._send_error(writer, method, 500, str(e), keep_alive)
+
+    def _run(self, func, *args):
+        # Leitura e descompressão fora do loop: as outras conexões continuam sendo atendidas
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _info(self):
+        return {
+            "server": SERVER_NAME,
+            "source": self.source.name,
+            "requests": self.requests,
+            "bytes_sent": self.bytes_sent,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "uptime_seconds": round(time.time() - self.started),
+        }
+
+    def _list(self, term, limit):
+        files = []
+        for file_path, size, origin in self.source.list_files():
+            if term and term not in file_path.lower():
+                continue
+            files.append({"path": file_path, "size": size, "source": origin,
+                          "url": "/files/" + quote(file_path)})
+            if len(files) >= limit:
+                break
+        return files
+
+    def _find(self, file_path):
+        """Caminho exato ou, como no Unreal, sem diferenciar maiúsculas"""
+        if self.source.get_size(file_path) is not None:
+            return file_path
+        if self._lower_paths is None:
+            self._lower_paths = {path.lower(): path for path, _, _ in self.source.list_files()}
+        return self._lower_paths.get(file_path.lower())
+
+    async def _send_entry(self, writer, method, file_path, headers, keep_alive):
+        found = await self._run(self._find, file_path)
+        if found is None:
+            await self._send_error(writer, method, 404, f"Arquivo não encontrado: {file_path}", keep_alive)
+            return
+        size = self.source.get_size(found)
+
+        status, start, end = 200, 0, size
+        extra = {}
+        if "range" in headers:
+            try:
+                requested = parse_range(headers["range"], size)
+            except ValueError:
+                await self._send_error(writer, method, 416, "Intervalo fora do arquivo", keep_alive,
+                                       {"Content-Range": f"bytes */{size}"})
+                return
+            if requested is not None:
+                status, (start, end) = 206, requested
+                extra["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+
+        content_type = mimetypes.guess_type(found)[0] or "application/octet-stream"
+        # Inclui o conteúdo (hash do pendente ou identificador do pak): edições do mesmo tamanho mudam o ETag
+        tag = await self._run(self.source.get_etag, found)
+        extra["ETag"] = f'"{size:x}-{zlib.crc32(found.encode("utf-8")):08x}-{tag[:16]}"'
+        self._write_head(writer, status, content_type, end - start, keep_alive, extra)
+
+        sent = 0
+        if method == "GET":
+            # Uma fatia por vez: memória limitada mesmo com muitos clientes baixando arquivos grandes
+            chunks = self.cache.read(found, start, end)
+            while True:
+                piece = await self._run(next, chunks, None)
+                if piece is None:
+                    break
+                writer.write(piece)
+                await writer.drain()
+                sent += len(piece)
+        else:
+            await writer.drain()
+        self._record(method, found, status, sent)
+
+    def _write_head(self, writer, status, content_type, length, keep_alive, extra=None):
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+            f"Server: {SERVER_NAME}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {length}",
+            "Accept-Ranges: bytes",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        for name, value in (extra or {}).items():
+            lines.append(f"{name}: {value}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _send_json(self, writer, method, data, keep_alive):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self._write_head(writer, 200, "application/json; charset=utf-8", len(body), keep_alive)
+        if method == "GET":
+            writer.write(body)
+        await writer.drain()
+        self._record(method, "", 200, len(body) if method == "GET" else 0)
+
+    async def _send_error(self, writer, method, status, message, keep_alive=False, extra=None):
+        body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+        self._write_head(writer, status, "application/json; charset=utf-8", len(body), keep_alive, extra)
+        if method != "HEAD":
+            writer.write(body)
+        await writer.drain()
+        self._record(method, message, status, 0)
+
+    def _record(self, method, path, status, sent):
+        self.bytes_sent += sent
+        profiler.count("bytes_served", sent)
+        if self.on_request:
+            self.on_request(method, path, status, sent)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP local (somente leitura) sobre paks")
+    parser.add_argument("paks", nargs="+", help="Paks em ordem crescente de prioridade")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--key", help="Chave AES dos paks (hex ou base64)")
+    parser.add_argument("--cache", type=int, default=DEFAULT_CACHE_BYTES // (1024 * 1024),
+                        help="Cache de conteúdo em MB (padrão: 64)")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar cada requisição")
+    args = parser.parse_args(argv)
+
+    from pak_crypto import parse_key
+    from pak_merge import mount_in_order
+
+    mounted_set = mount_in_order(args.paks, parse_key(args.key) if args.key else None)
+
+    def on_request(method, path, status, sent):
+        print(f"[{time.strftime('%H:%M:%S')}] {method} {status} {sent} {path}")
+
+    server = PakServer(MountedSource(mounted_set), args.host, args.port, args.cache * 1024 * 1024,
+                       on_request=on_request if args.verbose else None)
+    print(f"{mounted_set.count} arquivos em {server.url}files (Ctrl+C para sair)")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.source.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,21 +4,59 @@ PAK Tool GUI v3 - Aplicação Desktop Avançada para gerenciar arquivos .pak do
 Funcionalidades: Visualização, Edição, Reempacotamento, Adicionar, Substituir, Deletar (estilo 7-Zip)
 """
 
+import time
+STARTUP_START = time.perf_counter()  # Medir a inicialização desde o primeiro import
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from pathlib import Path
 import os
 import json
-from pyuepak import PakFile
+import csv
+import sys
 import threading
 import tempfile
 import io
+import importlib
+
+# pyuepak, cryptography e PIL (e os módulos que dependem deles: pak_io, pak_iostore,
+# pak_writer, pak_mount) são importados no primeiro uso ou em segundo plano após a janela aparecer
+from pak_crypto import (KeyStore, read_encryption_info, count_encrypted_entries, parse_key,
+                        DEFAULT_GUID, ZERO_KEY)
+from pak_entries import EntryTable
+from pak_inspect import (PagedSource, BYTES_PER_ROW, describe_structure, find_pattern,
+                         format_hex_rows, offset_width, parse_pattern)
+from pak_journal import SessionJournal
+from pak_tree import DirectoryTree, format_size
+from pak_progress import ProgressChannel, format_progress
+from pak_profiling import profiler, CATEGORY_PARSE, CATEGORY_WRITE
+from pak_jobs import (JobScheduler, JobCancelled, PRIORITY_INTERACTIVE, PRIORITY_NORMAL,
+                      PRIORITY_BULK, STATE_QUEUED)
+from pak_search import ContentSearch, NgramIndex, get_pak_fingerprint, parse_extensions
+
+# Extensões abertas no editor de texto e no visualizador de imagens; o resto vai para o hex
+TEXT_EXTENSIONS = ['.txt', '.ini', '.cfg', '.log', '.xml', '.json', '.md', '.csv']
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tga', '.dds']
+
+
+# Carregados em segundo plano: pyuepak e cryptography vêm junto com estes
+PRELOAD_MODULES = ("pak_io", "pak_iostore", "pak_writer", "pak_mount",
+                   "cryptography.hazmat.primitives.ciphers")
+
+
+def load_pil():
+    """Importar PIL na primeira imagem aberta; devolve (Image, ImageTk) ou None"""
+    try:
+        from PIL import Image, ImageTk
+    except ImportError:
+        return None
+    return Image, ImageTk
+
 
-try:
-    from PIL import Image, ImageTk
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+def preload_modules():
+    """Importar os módulos pesados (chamado em segundo plano depois da primeira pintura)"""
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
 
 
 class TextEditorWindow:
@@ -205,10 +243,12 @@ class ImageViewerWindow:
     
     def load_image(self):
         """Carregar e exibir imagem"""
-        if not PIL_AVAILABLE:
+        pil = load_pil()
+        if pil is None:
             messagebox.showerror("Erro", "Biblioteca PIL/Pillow não disponível.\nInstale com: pip install Pillow")
             self.window.destroy()
             return
+        Image, ImageTk = pil
         
         try:
             # Tentar carregar imagem
@@ -251,6 +291,508 @@ class ImageViewerWindow:
                 messagebox.showerror("Erro", f"Erro ao salvar:\n{str(e)}")
 
 
+class HexViewerWindow:
+    """Visualizador hexadecimal paginado: só os blocos da janela visível são lidos"""
+    VISIBLE_ROWS = 32
+    
+    def __init__(self, parent, file_path, source, scheduler, on_extract=None, on_close=None):
+        self.parent = parent
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Visualizador Hex - {Path(file_path).name}")
+        self.window.geometry("1000x650")
+        
+        self.file_path = file_path
+        self.source = source  # PagedSource da entrada
+        self.scheduler = scheduler
+        self.on_extract = on_extract
+        self.on_close = on_close
+        
+        self.top_row = 0
+        self.total_rows = max(1, -(-source.size // BYTES_PER_ROW))
+        self.width = offset_width(source.size)
+        self.match = None  # (posição, tamanho) do último resultado
+        self.search_job = None
+        
+        self.create_widgets()
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.show_structure()
+        self.render()
+    
+    def create_widgets(self):
+        """Criar widgets do visualizador"""
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        # Barra de ferramentas
+        toolbar = ttk.Frame(main_frame)
+        toolbar.grid(row=0, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        ttk.Label(toolbar, text="Ir para:").grid(row=0, column=0, padx=(0, 5))
+        self.goto_var = tk.StringVar()
+        goto_entry = ttk.Entry(toolbar, textvariable=self.goto_var, width=14)
+        goto_entry.grid(row=0, column=1)
+        goto_entry.bind('<Return>', lambda e: self.goto_offset())
+        ttk.Button(toolbar, text="➡️ Ir", command=self.goto_offset).grid(row=0, column=2, padx=5)
+        
+        ttk.Label(toolbar, text="Buscar:").grid(row=0, column=3, padx=(15, 5))
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(toolbar, textvariable=self.search_var, width=24)
+        search_entry.grid(row=0, column=4)
+        search_entry.bind('<Return>', lambda e: self.find_next())
+        self.search_mode = ttk.Combobox(toolbar, values=["Hex", "Texto"], state="readonly", width=6)
+        self.search_mode.set("Hex")
+        self.search_mode.grid(row=0, column=5, padx=5)
+        self.search_button = ttk.Button(toolbar, text="🔍 Próximo", command=self.find_next)
+        self.search_button.grid(row=0, column=6, padx=5)
+        
+        if self.on_extract:
+            ttk.Button(toolbar, text="💾 Extrair", command=lambda: self.on_extract(self.file_path)).grid(row=0, column=7, padx=5)
+        ttk.Button(toolbar, text="❌ Fechar", command=self.close).grid(row=0, column=8, padx=5)
+        
+        # Bytes (só as linhas visíveis ficam no widget)
+        self.hex_text = tk.Text(main_frame, wrap=tk.NONE, font=("Consolas", 10),
+                                height=self.VISIBLE_ROWS, bg='#1e1e1e', fg='#d4d4d4')
+        self.hex_text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.hex_text.tag_configure("match", background="#e67e22", foreground="#000000")
+        self.hex_text.config(state=tk.DISABLED)
+        
+        self.scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        
+        # Eventos dos widgets filhos também chegam à janela (bindtags)
+        self.window.bind('<MouseWheel>', lambda e: self.scroll_rows(-3 if e.delta > 0 else 3))
+        self.window.bind('<Button-4>', lambda e: self.scroll_rows(-3))
+        self.window.bind('<Button-5>', lambda e: self.scroll_rows(3))
+        self.window.bind('<Prior>', lambda e: self.scroll_rows(-self.VISIBLE_ROWS))
+        self.window.bind('<Next>', lambda e: self.scroll_rows(self.VISIBLE_ROWS))
+        self.window.bind('<Control-Home>', lambda e: self.show_row(0))
+        self.window.bind('<Control-End>', lambda e: self.show_row(self.total_rows))
+        
+        # Estrutura identificada pelo cabeçalho
+        structure_frame = ttk.LabelFrame(main_frame, text="Estrutura", padding="5")
+        structure_frame.grid(row=1, column=2, sticky=(tk.N, tk.S, tk.E), padx=(10, 0))
+        structure_frame.rowconfigure(0, weight=1)
+        self.structure_tree = ttk.Treeview(structure_frame, columns=("value",), show="tree headings", height=20)
+        self.structure_tree.heading("#0", text="Campo")
+        self.structure_tree.heading("value", text="Valor")
+        self.structure_tree.column("#0", width=150)
+        self.structure_tree.column("value", width=200)
+        self.structure_tree.grid(row=0, column=0, sticky=(tk.N, tk.S))
+        
+        self.status_label = ttk.Label(main_frame, text="")
+        self.status_label.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+    
+    def show_structure(self):
+        """Preencher o painel de estrutura (lê só o início e o fim do arquivo)"""
+        try:
+            fields = describe_structure(self.source)
+        except Exception as e:
+            fields = [("Erro", str(e))]
+        for name, value in fields:
+            self.structure_tree.insert("", tk.END, text=name, values=(value,))
+    
+    def render(self):
+        """Desenhar as linhas visíveis"""
+        start = self.top_row * BYTES_PER_ROW
+        try:
+            data = self.source.read(start, self.VISIBLE_ROWS * BYTES_PER_ROW)
+        except Exception as e:
+            self.status_label.config(text=f"Erro ao ler: {str(e)}")
+            return
+        
+        self.hex_text.config(state=tk.NORMAL)
+        self.hex_text.delete(1.0, tk.END)
+        self.hex_text.insert(1.0, "\n".join(format_hex_rows(data, start, self.width)))
+        self.highlight_match(start, len(data))
+        self.hex_text.config(state=tk.DISABLED)
+        
+        self.scrollbar.set(self.top_row / self.total_rows,
+                           min(1.0, (self.top_row + self.VISIBLE_ROWS) / self.total_rows))
+        self.status_label.config(text=f"Posição 0x{start:X} de 0x{self.source.size:X} "
+                                      f"({format_size(self.source.size)})")
+    
+    def highlight_match(self, start, length):
+        """Destacar no hex os bytes do último resultado que estão visíveis"""
+        if self.match is None:
+            return
+        match_start, match_size = self.match
+        half = BYTES_PER_ROW // 2
+        for offset in range(max(match_start, start), min(match_start + match_size, start + length)):
+            line, column = divmod(offset - start, BYTES_PER_ROW)
+            char = self.width + 2 + column * 3 + (1 if column >= half else 0)
+            self.hex_text.tag_add("match", f"{line + 1}.{char}", f"{line + 1}.{char + 2}")
+    
+    def show_row(self, row):
+        self.top_row = max(0, min(row, self.total_rows - self.VISIBLE_ROWS))
+        self.render()
+    
+    def scroll_rows(self, rows):
+        self.show_row(self.top_row + rows)
+    
+    def on_scroll(self, *args):
+        """Comandos da barra de rolagem (arrastar ou clicar)"""
+        if args[0] == "moveto":
+            self.show_row(int(float(args[1]) * self.total_rows))
+        elif args[0] == "scroll":
+            step = self.VISIBLE_ROWS if args[2] == "pages" else 1
+            self.scroll_rows(int(args[1]) * step)
+    
+    def goto_offset(self):
+        """Ir para uma posição (hex com 0x ou decimal)"""
+        text = self.goto_var.get().strip()
+        try:
+            offset = int(text, 16) if text.lower().startswith("0x") else int(text)
+        except ValueError:
+            messagebox.showwarning("Aviso", f"Posição inválida: {text}", parent=self.window)
+            return
+        self.show_row(max(0, min(offset, self.source.size - 1)) // BYTES_PER_ROW)
+    
+    def find_next(self):
+        """Buscar a sequência a partir do resultado atual (em segundo plano)"""
+        if self.search_job is not None and not self.search_job.finished:
+            self.scheduler.cancel(self.search_job)
+            if self.search_job.finished:
+                # Ainda estava na fila: não há busca para avisar o fim
+                self.finish_find(None, -1, True)
+            return
+        try:
+            pattern = parse_pattern(self.search_var.get(), self.search_mode.get() == "Hex")
+        except ValueError as e:
+            messagebox.showwarning("Aviso", str(e), parent=self.window)
+            return
+        if not pattern:
+            return
+        
+        start = self.match[0] + 1 if self.match else self.top_row * BYTES_PER_ROW
+        self.search_button.config(text="⏹ Parar")
+        self.status_label.config(text="Buscando...")
+        self.search_job = self.scheduler.submit(f"Buscar bytes em {Path(self.file_path).name}",
+                                                lambda job: self.do_find(pattern, start, job),
+                                                priority=PRIORITY_INTERACTIVE)
+    
+    def do_find(self, pattern, start, job):
+        """Varrer a entrada em fatias (executado em segundo plano)"""
+        size = self.source.size
+        scanned = [0]
+        
+        def on_progress(count):
+            scanned[0] += count
+            job.report(bytes_done=scanned[0], message=f"{scanned[0] * 100 // max(size, 1)}%")
+        
+        try:
+            position = find_pattern(self.source.read_range, size, pattern, start,
+                                    cancel_event=job.token, on_progress=on_progress)
+            if position == -1 and start > 0 and not job.token.is_set():
+                # Recomeçar do início até o ponto de partida
+                position = find_pattern(self.source.read_range, size, pattern, 0, start + len(pattern) - 1,
+                                        cancel_event=job.token, on_progress=on_progress)
+        except Exception as e:
+            error = str(e)
+            self.parent.after(0, lambda: self.finish_find(pattern, -1, False, error))
+            raise
+        self.parent.after(0, lambda: self.finish_find(pattern, position, job.token.is_set()))
+    
+    def finish_find(self, pattern, position, cancelled, error=None):
+        """Mostrar o resultado da busca"""
+        if not self.window.winfo_exists():
+            return
+        self.search_button.config(text="🔍 Próximo")
+        if error:
+            self.status_label.config(text=f"Erro na busca: {error}")
+            return
+        if cancelled:
+            self.status_label.config(text="Busca cancelada")
+            return
+        if position == -1:
+            self.match = None
+            self.render()
+            self.status_label.config(text="Sequência não encontrada")
+            return
+        self.match = (position, len(pattern))
+        self.show_row(position // BYTES_PER_ROW - self.VISIBLE_ROWS // 4)
+        self.status_label.config(text=f"Encontrado em 0x{position:X} ({position})")
+    
+    def close(self):
+        """Fechar a janela e liberar os leitores da entrada"""
+        if self.search_job is not None and not self.search_job.finished:
+            self.scheduler.cancel(self.search_job)
+        self.window.destroy()
+        if self.on_close:
+            self.on_close()
+
+
+class ContentSearchDialog:
+    """Janela de opções da busca de conteúdo"""
+    def __init__(self, parent):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Buscar Conteúdo")
+        self.window.geometry("500x220")
+        self.window.transient(parent)
+        
+        self.result = None
+        
+        self.create_widgets()
+        self.window.grab_set()
+        self.pattern_entry.focus_set()
+        parent.wait_window(self.window)
+    
+    def create_widgets(self):
+        """Criar widgets da janela"""
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.window.columnconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(main_frame, text="Texto:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.pattern_var = tk.StringVar()
+        self.pattern_entry = ttk.Entry(main_frame, textvariable=self.pattern_var)
+        self.pattern_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), pady=5)
+        
+        ttk.Label(main_frame, text="Extensões:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.extensions_var = tk.StringVar(value=".ini .uasset")
+        ttk.Entry(main_frame, textvariable=self.extensions_var).grid(row=1, column=1, sticky=(tk.W, tk.E), pady=5)
+        
+        self.case_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="Diferenciar maiúsculas/minúsculas", variable=self.case_var).grid(row=2, column=1, sticky=tk.W)
+        
+        self.index_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="Usar índice persistente (buscas repetidas instantâneas)", variable=self.index_var).grid(row=3, column=1, sticky=tk.W)
+        
+        buttons = ttk.Frame(main_frame)
+        buttons.grid(row=4, column=0, columnspan=2, pady=(10, 0))
+        ttk.Button(buttons, text="🔎 Buscar", command=self.confirm).grid(row=0, column=0, padx=5)
+        ttk.Button(buttons, text="❌ Cancelar", command=self.window.destroy).grid(row=0, column=1, padx=5)
+        
+        self.window.bind('<Return>', lambda e: self.confirm())
+        self.window.bind('<Escape>', lambda e: self.window.destroy())
+    
+    def confirm(self):
+        """Confirmar opções"""
+        pattern = self.pattern_var.get()
+        if not pattern:
+            messagebox.showwarning("Aviso", "Digite o texto a ser buscado", parent=self.window)
+            return
+        
+        self.result = {
+            "pattern": pattern,
+            "extensions": parse_extensions(self.extensions_var.get()),
+            "case_sensitive": self.case_var.get(),
+            "use_index": self.index_var.get(),
+        }
+        self.window.destroy()
+
+
+class KeyDialog:
+    """Janela para informar a chave AES de um pak"""
+    def __init__(self, parent, guid, pak_name=""):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Chave AES")
+        self.window.geometry("560x200")
+        self.window.transient(parent)
+        
+        self.guid = guid
+        self.pak_name = pak_name
+        self.result = None  # (chave, lembrar)
+        
+        self.create_widgets()
+        self.window.grab_set()
+        self.key_entry.focus_set()
+        parent.wait_window(self.window)
+    
+    def create_widgets(self):
+        """Criar widgets da janela"""
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.window.columnconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(main_frame, text=f"🔒 {self.pak_name} está criptografado").grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
+        ttk.Label(main_frame, text="GUID:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        ttk.Label(main_frame, text=self.guid, font=("Consolas", 9)).grid(row=1, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(main_frame, text="Chave (hex/base64):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.key_var = tk.StringVar()
+        self.key_entry = ttk.Entry(main_frame, textvariable=self.key_var, show="•")
+        self.key_entry.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=5)
+        
+        self.remember_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(main_frame, text="Lembrar chave para este GUID", variable=self.remember_var).grid(row=3, column=1, sticky=tk.W)
+        
+        buttons = ttk.Frame(main_frame)
+        buttons.grid(row=4, column=0, columnspan=2, pady=(10, 0))
+        ttk.Button(buttons, text="🔑 OK", command=self.confirm).grid(row=0, column=0, padx=5)
+        ttk.Button(buttons, text="❌ Cancelar", command=self.window.destroy).grid(row=0, column=1, padx=5)
+        
+        self.window.bind('<Return>', lambda e: self.confirm())
+        self.window.bind('<Escape>', lambda e: self.window.destroy())
+    
+    def confirm(self):
+        """Validar a chave"""
+        try:
+            key = parse_key(self.key_var.get())
+        except ValueError as e:
+            messagebox.showwarning("Aviso", str(e), parent=self.window)
+            return
+        
+        self.result = (key, self.remember_var.get())
+        self.window.destroy()
+
+
+class TranscodeDialog:
+    """Janela com as opções da conversão de pak (versão, compressão, criptografia)"""
+    def __init__(self, parent, pak_name, versions, current_version, compressions, can_encrypt):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Converter PAK")
+        self.window.geometry("520x230")
+        self.window.transient(parent)
+        
+        self.pak_name = pak_name
+        self.versions = versions  # Nomes das versões (V1...V12)
+        self.compressions = compressions
+        self.result = None  # (versão, compressão, criptografar)
+        
+        self.version_var = tk.StringVar(value=current_version)
+        self.compression_var = tk.StringVar(value=compressions[0])
+        self.encrypt_var = tk.BooleanVar(value=False)
+        self.can_encrypt = can_encrypt
+        
+        self.create_widgets()
+        self.window.grab_set()
+        parent.wait_window(self.window)
+    
+    def create_widgets(self):
+        """Criar widgets da janela"""
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.window.columnconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(main_frame, text=f"🔁 {self.pak_name}").grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
+        
+        ttk.Label(main_frame, text="Versão:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        ttk.Combobox(main_frame, textvariable=self.version_var, values=self.versions,
+                     state="readonly").grid(row=1, column=1, sticky=(tk.W, tk.E), pady=5)
+        
+        ttk.Label(main_frame, text="Compressão:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        ttk.Combobox(main_frame, textvariable=self.compression_var, values=self.compressions,
+                     state="readonly").grid(row=2, column=1, sticky=(tk.W, tk.E), pady=5)
+        
+        encrypt_check = ttk.Checkbutton(main_frame, text="Criptografar com a chave AES atual", variable=self.encrypt_var)
+        encrypt_check.grid(row=3, column=1, sticky=tk.W)
+        if not self.can_encrypt:
+            encrypt_check.state(["disabled"])
+        
+        ttk.Label(main_frame, text="Alterações pendentes não entram na conversão (use Salvar PAK Como).",
+                  foreground="#888888").grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        
+        buttons = ttk.Frame(main_frame)
+        buttons.grid(row=5, column=0, columnspan=2, pady=(10, 0))
+        ttk.Button(buttons, text="🔁 Converter", command=self.confirm).grid(row=0, column=0, padx=5)
+        ttk.Button(buttons, text="❌ Cancelar", command=self.window.destroy).grid(row=0, column=1, padx=5)
+        
+        self.window.bind('<Return>', lambda e: self.confirm())
+        self.window.bind('<Escape>', lambda e: self.window.destroy())
+    
+    def confirm(self):
+        """Devolver as opções escolhidas"""
+        self.result = (self.version_var.get(), self.compression_var.get(), self.encrypt_var.get())
+        self.window.destroy()
+
+
+class KeyManagerDialog:
+    """Janela para cadastrar e remover chaves AES por GUID"""
+    def __init__(self, parent, key_store):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Chaves AES")
+        self.window.geometry("620x320")
+        self.window.transient(parent)
+        
+        self.key_store = key_store
+        
+        self.create_widgets()
+        self.refresh()
+        self.window.grab_set()
+        parent.wait_window(self.window)
+    
+    def create_widgets(self):
+        """Criar widgets da janela"""
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(0, weight=1)
+        
+        self.keys_tree = ttk.Treeview(main_frame, columns=("key",), show="tree headings")
+        self.keys_tree.heading("#0", text="GUID")
+        self.keys_tree.heading("key", text="Chave")
+        self.keys_tree.column("#0", width=300)
+        self.keys_tree.column("key", width=260)
+        self.keys_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        form = ttk.Frame(main_frame)
+        form.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        form.columnconfigure(1, weight=1)
+        form.columnconfigure(3, weight=2)
+        
+        ttk.Label(form, text="GUID:").grid(row=0, column=0, padx=(0, 5))
+        self.guid_var = tk.StringVar(value=DEFAULT_GUID)
+        ttk.Entry(form, textvariable=self.guid_var).grid(row=0, column=1, sticky=(tk.W, tk.E))
+        ttk.Label(form, text="Chave:").grid(row=0, column=2, padx=5)
+        self.key_var = tk.StringVar()
+        ttk.Entry(form, textvariable=self.key_var, show="•").grid(row=0, column=3, sticky=(tk.W, tk.E))
+        
+        buttons = ttk.Frame(main_frame)
+        buttons.grid(row=2, column=0, pady=(10, 0))
+        ttk.Button(buttons, text="➕ Adicionar", command=self.add_key).grid(row=0, column=0, padx=5)
+        ttk.Button(buttons, text="🗑️ Remover", command=self.remove_key).grid(row=0, column=1, padx=5)
+        ttk.Button(buttons, text="✓ Fechar", command=self.window.destroy).grid(row=0, column=2, padx=5)
+    
+    def refresh(self):
+        """Listar as chaves (mascaradas)"""
+        for item in self.keys_tree.get_children():
+            self.keys_tree.delete(item)
+        for guid, key in sorted(self.key_store.keys.items()):
+            label = "(padrão)" if guid == DEFAULT_GUID else ""
+            masked = key[:6] + "…" + key[-4:]
+            self.keys_tree.insert("", tk.END, iid=guid, text=f"{guid} {label}", values=(masked,))
+    
+    def add_key(self):
+        """Cadastrar a chave do GUID informado"""
+        guid = self.guid_var.get().strip().replace("-", "") or DEFAULT_GUID
+        try:
+            bytes.fromhex(guid)
+            if len(guid) != 32:
+                raise ValueError
+        except ValueError:
+            messagebox.showwarning("Aviso", "GUID inválido: use 32 dígitos hexadecimais", parent=self.window)
+            return
+        try:
+            self.key_store.set(guid, self.key_var.get())
+            self.key_store.save()
+        except (ValueError, OSError) as e:
+            messagebox.showwarning("Aviso", str(e), parent=self.window)
+            return
+        self.key_var.set("")
+        self.refresh()
+    
+    def remove_key(self):
+        """Remover as chaves selecionadas"""
+        for guid in self.keys_tree.selection():
+            self.key_store.remove(guid)
+        self.key_store.save()
+        self.refresh()
+
+
 class PakToolGUI:
     def __init__(self, root):
         self.root = root
@@ -262,9 +804,30 @@ class PakToolGUI:
         self.current_pak_path = None
         self.current_pak = None
         self.pak_files_list = []
+        self.entry_table = EntryTable()  # Arquivos do PAK aberto + alterações pendentes
+        self.dir_tree = DirectoryTree()  # Pastas do PAK aberto
+        self.shown_tree = self.dir_tree  # Árvore exibida (completa ou filtrada)
+        self.tree_dir_items = {}
+        self.tree_dir_paths = {}
+        self.tree_pending = set()
         self.modified_files = {}  # Arquivos modificados: {path: content}
         self.added_files = {}  # Arquivos adicionados: {path: content}
         self.deleted_files = set()  # Arquivos deletados
+        self.journal = None  # Diário em disco das alterações pendentes
+        self.mounted_set = None  # Paks montados como sistema de arquivos virtual
+        self.chunk_size_mb = 0  # Última divisão em partes escolhida (0 = arquivo único)
+        self.watch_stop = None  # Evento que encerra o modo observação (None = parado)
+        self.watch_thread = None  # Thread do modo observação (grava paks: aguardada ao fechar)
+        self.pak_server = None  # Servidor HTTP local em execução
+        self.search_job = None  # Busca de conteúdo em andamento
+        self.deps_index = None  # Dependências entre pacotes do PAK aberto (None = ainda indexando)
+        self.deps_job = None
+        self.key_store = KeyStore().load()  # Chaves AES por GUID
+        self.current_pak_crypto = None  # Criptografia do PAK aberto (footer)
+        self.current_pak_encrypted_entries = 0
+        
+        # Tarefas em segundo plano (pool limitado com prioridades)
+        self.scheduler = JobScheduler(max_workers=3)
         
         # Configurar estilo
         self.setup_style()
@@ -272,6 +835,10 @@ class PakToolGUI:
         # Criar interface
         self.create_widgets()
         
+        # Não interromper gravações em andamento ao fechar
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.refresh_jobs_view()
+        
     def setup_style(self):
         """Configurar estilo da aplicação"""
         style = ttk.Style()
@@ -322,6 +889,20 @@ class PakToolGUI:
         ttk.Button(controls_frame, text="💾 Salvar PAK Como", command=self.save_pak_as).grid(row=0, column=4, padx=5)
         ttk.Button(controls_frame, text="📦 Novo PAK", command=self.create_pak_from_folder).grid(row=0, column=5, padx=5)
         
+        # Segunda linha: ferramentas (a primeira linha não comporta todos os botões na janela padrão)
+        tools_frame = ttk.Frame(controls_frame)
+        tools_frame.grid(row=1, column=0, columnspan=6, sticky=tk.W, pady=(10, 0))
+        ttk.Label(tools_frame, text="Ferramentas:").pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(tools_frame, text="🗂️ Montar Pasta", command=self.mount_pak_folder).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(tools_frame, text="🔑 Chaves", command=self.manage_keys).pack(side=tk.LEFT, padx=5)
+        ttk.Button(tools_frame, text="🔁 Converter", command=self.transcode_current_pak).pack(side=tk.LEFT, padx=5)
+        ttk.Button(tools_frame, text="🧾 Manifesto", command=self.export_manifest).pack(side=tk.LEFT, padx=5)
+        self.watch_button = ttk.Button(tools_frame, text="👁️ Observar Pasta", command=self.toggle_watch_folder)
+        self.watch_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(tools_frame, text="📊 Estimar Compressão", command=self.estimate_compression).pack(side=tk.LEFT, padx=5)
+        self.server_button = ttk.Button(tools_frame, text="🌐 Servidor HTTP", command=self.toggle_pak_server)
+        self.server_button.pack(side=tk.LEFT, padx=5)
+        
         # Notebook (abas)
         self.notebook = ttk.Notebook(main_frame)
         self.notebook.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -348,6 +929,7 @@ class PakToolGUI:
         ttk.Button(search_frame, text="➕ Adicionar", command=self.add_files_to_pak).grid(row=0, column=2, padx=5)
         ttk.Button(search_frame, text="🔄 Substituir", command=self.replace_file_in_pak).grid(row=0, column=3, padx=5)
         ttk.Button(search_frame, text="🗑️ Deletar", command=self.delete_file_from_pak).grid(row=0, column=4, padx=5)
+        ttk.Button(search_frame, text="🔎 Conteúdo", command=self.search_content).grid(row=0, column=5, padx=5)
         
         # Treeview para arquivos
         tree_frame = ttk.Frame(files_frame)
@@ -377,18 +959,11 @@ class PakToolGUI:
         self.files_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
-        # Menu de contexto
-        self.context_menu = tk.Menu(self.root, tearoff=0)
-        self.context_menu.add_command(label="👁️ Visualizar", command=self.view_file_content)
-        self.context_menu.add_command(label="✏️ Editar", command=self.edit_file_content)
-        self.context_menu.add_separator()
-        self.context_menu.add_command(label="🔄 Substituir", command=self.replace_file_in_pak)
-        self.context_menu.add_command(label="🗑️ Deletar", command=self.delete_file_from_pak)
-        self.context_menu.add_separator()
-        self.context_menu.add_command(label="📤 Extrair", command=self.extract_selected_file)
-        self.context_menu.add_command(label="📋 Copiar caminho", command=self.copy_file_path)
+        # Menu de contexto (criado no primeiro clique direito)
+        self.context_menu = None
         
         self.files_tree.bind("<Button-3>", self.show_context_menu)
+        self.files_tree.bind("<<TreeviewOpen>>", self.on_tree_open)
         self.files_tree.bind("<Double-1>", lambda e: self.view_file_content())
         self.files_tree.bind("<Delete>", lambda e: self.delete_file_from_pak())
         
@@ -408,12 +983,32 @@ class PakToolGUI:
         self.notebook.add(log_frame, text="📋 Log")
         
         log_frame.columnconfigure(0, weight=1)
-        log_frame.rowconfigure(0, weight=1)
+        log_frame.rowconfigure(1, weight=1)
+        
+        # Perfil de desempenho
+        profile_frame = ttk.Frame(log_frame)
+        profile_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=10, pady=(10, 0))
+        
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(profile_frame, text="⏱️ Medir desempenho", variable=self.profile_var,
+                        command=self.toggle_profiling).grid(row=0, column=0, padx=(0, 10))
+        self.deep_profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(profile_frame, text="cProfile + memória na próxima tarefa", variable=self.deep_profile_var,
+                        command=self.toggle_deep_profiling).grid(row=0, column=1, padx=(0, 10))
+        ttk.Button(profile_frame, text="📊 Resumo", command=self.show_profile_summary).grid(row=0, column=2, padx=5)
+        ttk.Button(profile_frame, text="💾 Exportar Trace", command=self.export_profile).grid(row=0, column=3, padx=5)
+        ttk.Button(profile_frame, text="🧹 Limpar", command=self.clear_profile).grid(row=0, column=4, padx=5)
         
         self.log_text = scrolledtext.ScrolledText(log_frame, wrap=tk.WORD, font=("Consolas", 9))
-        self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=10)
+        self.log_text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=10)
         self.log_text.config(state=tk.DISABLED)
         
+        # Abas 4 e 5 (pouco usadas): conteúdo criado na primeira vez que forem abertas
+        self.lazy_tabs = {}
+        self.mount_frame = self.add_lazy_tab("🗂️ Montagem", self.create_mount_tab)
+        self.jobs_frame = self.add_lazy_tab("⚙️ Tarefas", self.create_jobs_tab)
+        self.notebook.bind("<<NotebookTabChanged>>", lambda e: self.build_tab(self.notebook.select()))
+        
         # Barra de status
         self.status_var = tk.StringVar(value="Pronto")
         status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
@@ -425,49 +1020,288 @@ class PakToolGUI:
         
     def log(self, message):
         """Adicionar mensagem ao log"""
+        # Widgets Tk só podem ser alterados pela thread principal
+        if threading.current_thread() is not threading.main_thread():
+            self.root.after(0, lambda: self.log(message))
+            return
+        
         self.log_text.config(state=tk.NORMAL)
         self.log_text.insert(tk.END, f"{message}\n")
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
         
+    def toggle_profiling(self):
+        """Ligar/desligar a coleta de tempos e contadores"""
+        profiler.enabled = self.profile_var.get()
+        if not profiler.enabled:
+            profiler.deep_next = False
+            self.deep_profile_var.set(False)
+        self.log("⏱️ Medição de desempenho " + ("ligada" if profiler.enabled else "desligada"))
+    
+    def toggle_deep_profiling(self):
+        """Perfilar a próxima tarefa com cProfile e tracemalloc"""
+        if self.deep_profile_var.get() and not profiler.enabled:
+            self.profile_var.set(True)
+            self.toggle_profiling()
+        profiler.deep_next = self.deep_profile_var.get()
+        self.check_deep_profiling()
+    
+    def check_deep_profiling(self):
+        """Desmarcar a opção quando a tarefa perfilada começar"""
+        if self.deep_profile_var.get() and not profiler.deep_next:
+            self.deep_profile_var.set(False)
+            self.log("🧬 Tarefa perfilada iniciada; veja o resultado em Resumo")
+        elif self.deep_profile_var.get():
+            self.root.after(500, self.check_deep_profiling)
+    
+    def show_profile_summary(self):
+        """Mostrar o resumo do perfil no log"""
+        self.log(profiler.format_summary())
+        for report in profiler.reports:
+            if report.profile_text:
+                self.log(f"🧬 {report.name}:\n{report.profile_text}")
+            for allocation in report.top_allocations[:5]:
+                self.log(f"   {allocation['bytes'] / 1024:.0f} KB  {allocation['location']}")
+        self.notebook.select(2)
+    
+    def export_profile(self):
+        """Exportar trace do Chrome (.json) ou resumo (.summary.json)"""
+        output_path = filedialog.asksaveasfilename(
+            title="Exportar perfil",
+            defaultextension=".json",
+            initialfile="pak_tool_trace.json",
+            filetypes=[("Chrome trace", "*.json"), ("Resumo JSON", "*.summary.json")]
+        )
+        
+        if not output_path:
+            return
+        
+        try:
+            if output_path.endswith(".summary.json"):
+                profiler.export_summary(output_path)
+            else:
+                profiler.export_chrome_trace(output_path)
+                profiler.export_summary(str(Path(output_path).with_suffix(".summary.json")))
+            self.log(f"✓ Perfil exportado: {output_path}")
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao exportar perfil:\n{str(e)}")
+            self.log(f"ERRO: {str(e)}")
+    
+    def clear_profile(self):
+        """Descartar as medições"""
+        profiler.reset()
+        self.log("🧹 Medições descartadas")
+    
     def open_pak_file(self):
         """Abrir arquivo .pak"""
         file_path = filedialog.askopenfilename(
-            title="Selecione um arquivo .pak",
-            filetypes=[("PAK files", "*.pak"), ("All files", "*.*")]
+            title="Selecione um arquivo .pak ou .utoc",
+            filetypes=[("PAK / IoStore", "*.pak *.utoc"), ("PAK files", "*.pak"),
+                       ("IoStore (UE5)", "*.utoc"), ("All files", "*.*")]
         )
         
         if not file_path:
             return
         
+        self.start_loading_pak(file_path)
+    
+    def start_loading_pak(self, file_path, key=None):
+        """Pedir a chave se o índice for criptografado e carregar em segundo plano"""
+        from pak_iostore import is_iostore_path, read_toc_encryption_info
+        
+        remember = False
+        try:
+            if is_iostore_path(file_path):
+                crypto = read_toc_encryption_info(file_path)
+            else:
+                crypto = read_encryption_info(file_path)
+        except Exception:
+            crypto = None  # O erro é informado pelo carregamento
+        
+        if crypto and crypto.index_encrypted and key is None:
+            key, remember = self.get_pak_key(crypto.guid, file_path)
+            if key is None:
+                self.status_var.set("Abertura cancelada: chave AES necessária")
+                return
+        
         self.status_var.set("Carregando arquivo...")
         self.log(f"Abrindo arquivo: {file_path}")
         
-        # Carregar em thread separada para não travar a interface
-        thread = threading.Thread(target=self.load_pak_file, args=(file_path,))
-        thread.daemon = True
-        thread.start()
+        # Carregar em segundo plano para não travar a interface
+        self.scheduler.submit(f"Abrir {Path(file_path).name}",
+                              lambda job: self.load_pak_file(file_path, job, key, crypto, remember),
+                              priority=PRIORITY_INTERACTIVE)
+    
+    def get_pak_key(self, guid, file_path):
+        """Chave salva para o GUID ou informada pelo usuário; devolve (chave, lembrar)"""
+        key = self.key_store.get(guid)
+        if key is not None:
+            return key, False
+        
+        result = KeyDialog(self.root, guid, Path(file_path).name).result
+        if not result:
+            return None, False
+        return result
+    
+    def remember_key(self, guid, key):
+        """Salvar a chave depois que ela abriu o PAK com sucesso"""
+        try:
+            self.key_store.set(guid, key)
+            self.key_store.save()
+            self.log(f"🔑 Chave salva para o GUID {guid}")
+        except OSError as e:
+            self.log(f"ERRO ao salvar chave: {str(e)}")
+    
+    def manage_keys(self):
+        """Abrir o cadastro de chaves AES"""
+        KeyManagerDialog(self.root, self.key_store)
         
-    def load_pak_file(self, file_path):
-        """Carregar arquivo .pak (executado em thread separada)"""
+    def load_pak_file(self, file_path, job=None, key=None, crypto=None, remember=False):
+        """Carregar arquivo .pak (executado em segundo plano)"""
         try:
-            pak = PakFile()
-            pak.read(file_path)
+            # .utoc/.ucas: contêiner IoStore do UE5 com a mesma interface do PakFile
+            from pak_iostore import IoStoreFile, is_iostore_path
+            if is_iostore_path(file_path):
+                file_path = str(Path(file_path).with_suffix(".utoc"))
+                pak = IoStoreFile()
+            else:
+                from pyuepak import PakFile
+                pak = PakFile()
+            if key:
+                pak.set_key(key)
+            with profiler.span("parse_index", CATEGORY_PARSE, path=file_path):
+                pak.read(file_path)
+            
+            if job:
+                job.token.raise_if_cancelled()
             
-            self.current_pak_path = file_path
-            self.current_pak = pak
-            self.modified_files = {}  # Limpar modificações
-            self.added_files = {}  # Limpar adições
-            self.deleted_files = set()  # Limpar deleções
+            encrypted_entries = count_encrypted_entries(pak)
             
-            # Atualizar interface na thread principal
-            self.root.after(0, self.update_interface_after_load)
+            # Tabela de caminhos montada aqui, fora da thread da interface
+            from pak_io import get_pak_entries
+            entry_table = EntryTable.from_entries(get_pak_entries(pak))
             
+            # Trocar o PAK atual somente na thread principal
+            self.root.after(0, lambda: self.apply_loaded_pak(file_path, pak, crypto, encrypted_entries,
+                                                             remember, entry_table))
+            
+        except JobCancelled:
+            self.root.after(0, lambda: self.status_var.set("Carregamento cancelado"))
+            raise
         except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao carregar arquivo:\n{str(e)}"))
+            message = str(e)
+            hint = "\n\nO índice é criptografado: verifique a chave AES (🔑 Chaves)." if crypto and crypto.index_encrypted else ""
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao carregar arquivo:\n{message}{hint}"))
             self.root.after(0, lambda: self.status_var.set("Erro ao carregar arquivo"))
-            self.log(f"ERRO: {str(e)}")
+            self.log(f"ERRO: {message}")
             
+    def apply_loaded_pak(self, file_path, pak, crypto=None, encrypted_entries=0, remember=False,
+                         entry_table=None):
+        """Tornar o PAK carregado o PAK atual (thread principal)"""
+        guid = crypto.guid if crypto else DEFAULT_GUID
+        if remember:
+            self.remember_key(guid, pak.key)
+        
+        # Só as entradas são criptografadas: a chave é pedida agora
+        if encrypted_entries and pak.key == ZERO_KEY:
+            key, remember = self.get_pak_key(guid, file_path)
+            if key is not None:
+                pak.set_key(key)
+                if remember:
+                    self.remember_key(guid, key)
+            else:
+                self.log(f"⚠️ {encrypted_entries} entradas criptografadas não poderão ser lidas sem a chave")
+        
+        self.current_pak_path = file_path
+        self.current_pak = pak
+        self.current_pak_crypto = crypto
+        self.current_pak_encrypted_entries = encrypted_entries
+        self.pak_files_list = pak.list_files()
+        if entry_table is None:
+            from pak_io import get_pak_entries
+            entry_table = EntryTable.from_entries(get_pak_entries(pak))
+        self.entry_table = entry_table
+        self.modified_files = {}  # Limpar modificações
+        self.added_files = {}  # Limpar adições
+        self.deleted_files = set()  # Limpar deleções
+        self.journal = SessionJournal(file_path)
+        self.recover_session()
+        
+        self.update_interface_after_load()
+    
+    def recover_session(self):
+        """Oferecer as alterações pendentes que ficaram no diário da sessão anterior"""
+        try:
+            session = self.journal.replay()
+        except Exception as e:
+            self.log(f"⚠️ Diário da sessão ilegível: {str(e)}")
+            return
+        if session is None:
+            return
+        if not session.change_count:
+            self.discard_journal()
+            return
+        
+        warning = ""
+        if session.pak_changed(self.current_pak_path):
+            warning = "\n\n⚠️ O PAK foi alterado desde então."
+        started = time.strftime("%d/%m/%Y %H:%M", time.localtime(session.created))
+        result = messagebox.askyesno(
+            "Recuperar Sessão",
+            f"Há alterações pendentes de uma sessão anterior ({started}):\n\n"
+            f"✏️ Modificados: {len(session.modified_files)}\n"
+            f"➕ Adicionados: {len(session.added_files)}\n"
+            f"🗑️ Deletados: {len(session.deleted_files)}{warning}\n\n"
+            "Recuperar essas alterações?"
+        )
+        if not result:
+            self.discard_journal()
+            self.log("Alterações da sessão anterior descartadas")
+            return
+        
+        # O conteúdo continua nos blobs e só é lido ao salvar/visualizar
+        self.added_files = session.added_files
+        self.modified_files = session.modified_files
+        self.deleted_files = session.deleted_files
+        self.entry_table.apply_changes(self.added_files, self.modified_files, self.deleted_files)
+        try:
+            self.journal.compact(session)
+        except OSError:
+            pass
+        self.log(f"♻️ Sessão recuperada: {session.change_count} alterações pendentes")
+    
+    def journal_record(self, method, *args):
+        """Registrar a alteração no diário (falha no diário não impede a edição)"""
+        if self.journal is None:
+            return
+        try:
+            getattr(self.journal, method)(*args)
+        except OSError as e:
+            self.log(f"⚠️ Não foi possível gravar o diário da sessão: {str(e)}")
+    
+    def discard_journal(self):
+        """Apagar o diário do PAK aberto"""
+        if self.journal is None:
+            return
+        try:
+            self.journal.clear()
+        except OSError as e:
+            self.log(f"⚠️ Não foi possível apagar o diário da sessão: {str(e)}")
+    
+    def snapshot(self):
+        """Capturar o estado atual para uma tarefa em segundo plano"""
+        from pak_io import PakSnapshot
+        return PakSnapshot(self.current_pak, self.current_pak_path, self.pak_files_list,
+                           self.added_files, self.modified_files, self.deleted_files)
+    
+    def reload_after_overwrite(self, file_path):
+        """Recarregar o PAK aberto depois de sobrescrevê-lo"""
+        self.log(f"Recarregando PAK sobrescrito: {file_path}")
+        # As alterações pendentes agora fazem parte do PAK
+        self.discard_journal()
+        key = self.current_pak.key if self.current_pak and self.current_pak.key != ZERO_KEY else None
+        self.start_loading_pak(file_path, key)
+    
     def update_interface_after_load(self):
         """Atualizar interface após carregar arquivo"""
         filename = Path(self.current_pak_path).name
@@ -481,6 +1315,111 @@ class PakToolGUI:
         # Mostrar informações
         self.show_info()
         
+        # Quem referencia cada pacote, para avisar antes de deletar/substituir
+        self.start_dependency_index()
+        
+    def start_dependency_index(self):
+        """Indexar as dependências dos pacotes .uasset/.umap em segundo plano (cache por fingerprint)"""
+        from pak_deps import is_package_header
+        
+        if self.deps_job is not None:
+            self.scheduler.cancel(self.deps_job)
+        self.deps_index = None
+        self.deps_job = None
+        if not any(is_package_header(file_path) for file_path in self.pak_files_list):
+            return
+        
+        pak, pak_path = self.current_pak, self.current_pak_path
+        self.deps_job = self.scheduler.submit(f"Dependências {Path(pak_path).name}",
+                                              lambda job: self.do_dependency_index(pak, pak_path, job),
+                                              priority=PRIORITY_BULK)
+    
+    def do_dependency_index(self, pak, pak_path, job):
+        """Ler os cabeçalhos que faltam no índice (executado em segundo plano)"""
+        from pak_deps import is_package_header, open_dependency_index
+        
+        try:
+            index, reader = open_dependency_index(pak, pak_path)
+            try:
+                if reader.is_iostore:
+                    self.log("🔗 Índice de dependências indisponível: pacotes IoStore (Zen) não são suportados")
+                    return
+                total = sum(1 for file_path in reader.entries if is_package_header(file_path))
+                parsed = index.build(reader.entries, reader.read_range, reader.get_size,
+                                     cancel_event=job.token,
+                                     on_progress=lambda files, _: job.report(done=len(index.dependencies), total=total))
+            finally:
+                reader.close()
+            
+            # Índice parcial também vai para o cache: a próxima abertura continua de onde parou
+            if parsed:
+                index.save()
+            if job.token.cancelled:
+                return
+            
+            source = "cache" if not parsed else f"{parsed} cabeçalhos lidos"
+            unreadable = f", {index.unreadable} ilegíveis" if index.unreadable else ""
+            self.log(f"🔗 Índice de dependências: {len(index.dependencies) - index.unreadable} pacotes "
+                     f"({source}{unreadable})")
+            self.root.after(0, lambda: self.apply_dependency_index(index, job))
+        except Exception as e:
+            self.log(f"⚠️ Índice de dependências não foi criado: {str(e)}")
+    
+    def apply_dependency_index(self, index, job):
+        """Usar o índice se ele ainda for do PAK aberto (thread principal)"""
+        if job is self.deps_job:
+            self.deps_index = index
+            self.deps_job = None
+    
+    def find_dependents(self, file_paths, ignored=()):
+        """Quem referencia os arquivos, incluindo pacotes alterados em memória
+
+        Retorna (referências, pacotes pendentes cujo cabeçalho não pôde ser lido).
+        """
+        from pak_deps import is_package_header, read_package_dependencies
+        from pak_journal import read_content_range
+        
+        # Pacotes adicionados/modificados podem ter imports diferentes dos do pak em disco
+        overrides = {}
+        unverified = []
+        for file_path, content in list(self.added_files.items()) + list(self.modified_files.items()):
+            if not is_package_header(file_path):
+                continue
+            try:
+                overrides[file_path] = read_package_dependencies(
+                    lambda start, size: read_content_range(content, start, size),
+                    len(content), self.deps_index.package_name(file_path))
+            except Exception:
+                # Sem cabeçalho legível: valem as dependências indexadas (se houver)
+                unverified.append(file_path)
+        
+        # Pacotes já deletados não quebram mais
+        ignored = set(ignored) | self.deleted_files
+        found = self.deps_index.find_referencers(file_paths, overrides, ignored)
+        return found, sorted(file_path for file_path in unverified if file_path not in ignored)
+    
+    def describe_dependents(self, file_paths, ignored=()):
+        """Aviso para as confirmações: quem referencia os arquivos (vazio se ninguém)"""
+        from pak_deps import format_referencers, PACKAGE_EXTENSIONS
+        
+        if not any(file_path.lower().endswith(PACKAGE_EXTENSIONS) for file_path in file_paths):
+            return ""
+        if self.deps_index is None:
+            return "\n\nℹ️ Índice de dependências ainda em construção: referências não verificadas."
+        
+        found, unverified = self.find_dependents(file_paths, ignored)
+        warning = ""
+        if found:
+            referencers = {referencer for items in found.values() for referencer, _ in items}
+            self.log(f"🔗 {len(referencers)} pacote(s) referenciam {', '.join(sorted(found))}")
+            warning = (f"\n\n⚠️ {len(referencers)} pacote(s) do PAK referenciam estes arquivos:\n"
+                       f"{format_referencers(found)}")
+        if unverified:
+            self.log(f"⚠️ Referências não verificadas (cabeçalho ilegível): {', '.join(unverified)}")
+            warning += (f"\n\nℹ️ {len(unverified)} pacote(s) alterado(s) com cabeçalho ilegível: "
+                        "referências deles não verificadas.")
+        return warning
+    
     def get_file_status(self, file_path):
         """Obter status do arquivo"""
         if file_path in self.deleted_files:
@@ -497,35 +1436,76 @@ class PakToolGUI:
         if not self.current_pak:
             return
         
-        # Limpar árvore
+        # A tabela já inclui os adicionados e exclui os deletados
+        # Árvore de pastas construída uma vez; os nós são expandidos sob demanda
+        self.dir_tree = self.build_dir_tree()
+        self.render_tree(self.dir_tree)
+        
+        self.log(f"Listados {len(self.entry_table)} arquivos")
+    
+    def build_dir_tree(self, files=None):
+        """Criar a árvore de pastas com o tamanho de cada arquivo (todos ou os informados)"""
+        return DirectoryTree.build(self.entry_table.iter_sizes(files))
+    
+    def render_tree(self, dir_tree, expand_all=False, open_paths=()):
+        """Mostrar a árvore de pastas (só o primeiro nível é inserido)"""
         for item in self.files_tree.get_children():
             self.files_tree.delete(item)
         
-        # Obter lista de arquivos (incluindo adicionados, excluindo deletados)
-        self.pak_files_list = self.current_pak.list_files()
-        all_files = set(self.pak_files_list) | set(self.added_files.keys())
-        all_files -= self.deleted_files
+        self.shown_tree = dir_tree
+        self.tree_dir_items = {}  # item da árvore -> DirectoryNode
+        self.tree_dir_paths = {}  # caminho da pasta -> item da árvore
+        self.tree_pending = set()  # pastas ainda não expandidas
         
-        # Organizar por tipo
-        by_type = {}
-        for file_path in all_files:
-            ext = Path(file_path).suffix or "sem extensão"
-            if ext not in by_type:
-                by_type[ext] = []
-            by_type[ext].append(file_path)
+        self.insert_tree_node("", dir_tree.root, expand_all)
         
-        # Adicionar à árvore
-        for ext in sorted(by_type.keys()):
-            parent = self.files_tree.insert("", tk.END, text=f"{ext} ({len(by_type[ext])} arquivos)", 
-                                           values=("Pasta", "", ""), open=False)
+        # Reabrir as pastas que estavam abertas (pais antes dos filhos)
+        for dir_path in sorted(open_paths, key=lambda path: path.count("/")):
+            item = self.tree_dir_paths.get(dir_path)
+            if item:
+                self.expand_tree_item(item)
+                self.files_tree.item(item, open=True)
+    
+    def insert_tree_node(self, parent_item, node, expand_all=False):
+        """Inserir subpastas e arquivos diretos de uma pasta"""
+        for child in node.sorted_children():
+            item = self.files_tree.insert(parent_item, tk.END,
+                                          text=f"📁 {child.name} ({child.file_count} arquivos)",
+                                          values=("Pasta", format_size(child.total_size), ""),
+                                          open=expand_all)
+            self.tree_dir_items[item] = child
+            self.tree_dir_paths[child.path] = item
             
-            for file_path in sorted(by_type[ext]):
-                status = self.get_file_status(file_path)
-                self.files_tree.insert(parent, tk.END, text=file_path, 
-                                      values=(ext, "", status), tags=(file_path,))
-        
-        self.log(f"Listados {len(all_files)} arquivos")
-        
+            if expand_all:
+                self.insert_tree_node(item, child, True)
+            else:
+                # Filho provisório para exibir o indicador de expansão
+                self.files_tree.insert(item, tk.END, text="...")
+                self.tree_pending.add(item)
+        
+        for file_path, size in node.sorted_files():
+            ext = self.entry_table.get_extension(file_path) or "sem extensão"
+            status = self.get_file_status(file_path)
+            self.files_tree.insert(parent_item, tk.END, text=file_path.rsplit("/", 1)[-1],
+                                   values=(ext, format_size(size), status), tags=(file_path,))
+    
+    def expand_tree_item(self, item):
+        """Preencher uma pasta na primeira vez que ela é aberta"""
+        if item not in self.tree_pending:
+            return
+        self.tree_pending.discard(item)
+        self.files_tree.delete(*self.files_tree.get_children(item))
+        self.insert_tree_node(item, self.tree_dir_items[item])
+    
+    def on_tree_open(self, event=None):
+        """Expandir pasta sob demanda"""
+        self.expand_tree_item(self.files_tree.focus())
+    
+    def get_open_tree_paths(self):
+        """Pastas abertas na árvore (para manter ao atualizar)"""
+        return [node.path for item, node in self.tree_dir_items.items()
+                if self.files_tree.item(item, "open")]
+    
     def filter_files(self, *args):
         """Filtrar arquivos na árvore"""
         if not self.current_pak:
@@ -533,46 +1513,31 @@ class PakToolGUI:
         
         search_term = self.search_var.get().lower()
         
-        # Limpar árvore
-        for item in self.files_tree.get_children():
-            self.files_tree.delete(item)
-        
         if not search_term:
-            self.list_pak_contents()
+            self.render_tree(self.dir_tree)
             return
         
-        # Obter todos os arquivos
-        all_files = set(self.pak_files_list) | set(self.added_files.keys())
-        all_files -= self.deleted_files
-        
-        # Filtrar arquivos
-        filtered = [f for f in all_files if search_term in f.lower()]
-        
-        # Organizar por tipo
-        by_type = {}
-        for file_path in filtered:
-            ext = Path(file_path).suffix or "sem extensão"
-            if ext not in by_type:
-                by_type[ext] = []
-            by_type[ext].append(file_path)
-        
-        # Adicionar à árvore
-        for ext in sorted(by_type.keys()):
-            parent = self.files_tree.insert("", tk.END, text=f"{ext} ({len(by_type[ext])} arquivos)", 
-                                           values=("Pasta", "", ""), open=True)
-            
-            for file_path in sorted(by_type[ext]):
-                status = self.get_file_status(file_path)
-                self.files_tree.insert(parent, tk.END, text=file_path, 
-                                      values=(ext, "", status), tags=(file_path,))
+        # Filtrar arquivos (uma varredura sobre o texto da tabela, em ordem)
+        filtered = self.entry_table.filter(search_term)
         
+        # Poucos resultados: mostrar tudo aberto
+        self.render_tree(self.build_dir_tree(filtered), expand_all=len(filtered) <= 1000)
+        
+    def describe_version(self):
+        """Versão do PAK ou do TOC do contêiner IoStore"""
+        if getattr(self.current_pak, "is_iostore", False):
+            return f"IoStore (TOC v{self.current_pak.toc_version}, {len(self.current_pak.partition_paths)} .ucas)"
+        return self.current_pak.version
+    
     def show_info(self):
         """Mostrar informações do arquivo .pak"""
         if not self.current_pak:
             messagebox.showinfo("Informação", "Nenhum arquivo .pak carregado")
             return
         
-        total_files = len(set(self.pak_files_list) | set(self.added_files.keys()) - self.deleted_files)
+        from pak_io import get_pak_mount_point
+        
+        total_files = len(self.entry_table)
         
         info_text = f"""
 ╔══════════════════════════════════════════════════════════════╗
@@ -581,10 +1546,12 @@ class PakToolGUI:
 
 📦 Arquivo: {Path(self.current_pak_path).name if self.current_pak_path else "Novo PAK"}
 📏 Tamanho: {os.path.getsize(self.current_pak_path) / 1024:.2f} KB
-📍 Mount Point: {self.current_pak.mount_point}
-🔢 Versão: {self.current_pak.version}
+📍 Mount Point: {get_pak_mount_point(self.current_pak)}
+🔢 Versão: {self.describe_version()}
 📁 Total de arquivos: {total_files}
-🔒 Criptografado: {'Sim' if hasattr(self.current_pak, 'encrypted') and self.current_pak.encrypted else 'Não'}
+🔒 Índice criptografado: {'Sim' if self.current_pak_crypto and self.current_pak_crypto.index_encrypted else 'Não'}
+🔐 Entradas criptografadas: {self.current_pak_encrypted_entries}
+🔑 GUID da chave: {self.current_pak_crypto.guid if self.current_pak_crypto else DEFAULT_GUID}
 
 ╔══════════════════════════════════════════════════════════════╗
 ║              MODIFICAÇÕES PENDENTES                          ║
@@ -601,16 +1568,10 @@ class PakToolGUI:
 """
         
         # Contar por tipo
-        all_files = set(self.pak_files_list) | set(self.added_files.keys())
-        all_files -= self.deleted_files
-        
-        by_type = {}
-        for file_path in all_files:
-            ext = Path(file_path).suffix or "sem extensão"
-            by_type[ext] = by_type.get(ext, 0) + 1
+        by_type = self.entry_table.count_by_extension()
         
         for ext, count in sorted(by_type.items(), key=lambda x: x[1], reverse=True):
-            info_text += f"{ext:20s} : {count:5d} arquivos\n"
+            info_text += f"{ext or 'sem extensão':20s} : {count:5d} arquivos\n"
         
         self.info_text.config(state=tk.NORMAL)
         self.info_text.delete(1.0, tk.END)
@@ -620,14 +1581,31 @@ class PakToolGUI:
         # Mudar para aba de informações
         self.notebook.select(1)
         
+    def get_context_menu(self):
+        """Menu de contexto da lista de arquivos (criado no primeiro uso)"""
+        if self.context_menu is None:
+            self.context_menu = tk.Menu(self.root, tearoff=0)
+            self.context_menu.add_command(label="👁️ Visualizar", command=self.view_file_content)
+            self.context_menu.add_command(label="✏️ Editar", command=self.edit_file_content)
+            self.context_menu.add_separator()
+            self.context_menu.add_command(label="🔄 Substituir", command=self.replace_file_in_pak)
+            self.context_menu.add_command(label="🗑️ Deletar", command=self.delete_file_from_pak)
+            self.context_menu.add_separator()
+            self.context_menu.add_command(label="📤 Extrair", command=self.extract_selected_file)
+            self.context_menu.add_command(label="📋 Copiar caminho", command=self.copy_file_path)
+            self.context_menu.add_command(label="📄 Exportar lista de caminhos", command=self.export_path_list)
+        return self.context_menu
+    
     def show_context_menu(self, event):
         """Mostrar menu de contexto"""
         item = self.files_tree.identify_row(event.y)
         if item:
-            self.files_tree.selection_set(item)
-            # Verificar se é um arquivo (tem tags)
-            if self.files_tree.item(item)["tags"]:
-                self.context_menu.post(event.x_root, event.y_root)
+            # Manter a seleção múltipla se o clique foi sobre ela
+            if item not in self.files_tree.selection():
+                self.files_tree.selection_set(item)
+            # Verificar se é um arquivo (tem tags) ou uma pasta
+            if self.files_tree.item(item)["tags"] or item in self.tree_dir_items:
+                self.get_context_menu().post(event.x_root, event.y_root)
     
     def add_files_to_pak(self):
         """Adicionar arquivos ao PAK"""
@@ -663,6 +1641,8 @@ class PakToolGUI:
                 internal_file_path = f"{internal_path}/{filename}" if internal_path else filename
                 
                 self.added_files[internal_file_path] = data
+                self.entry_table.set_file(internal_file_path, len(data))
+                self.journal_record("record_add", internal_file_path, data)
                 added_count += 1
                 self.log(f"➕ Arquivo adicionado: {internal_file_path} ({len(data)} bytes)")
                 
@@ -699,6 +1679,15 @@ class PakToolGUI:
         if not new_file_path:
             return
         
+        # Quem importa o pacote depende dos exports do arquivo atual
+        dependents = self.describe_dependents([file_path])
+        if dependents and not messagebox.askyesno(
+            "Confirmar Substituição",
+            f"Substituir arquivo?\n\n{file_path}{dependents}\n\n"
+            "O novo arquivo precisa manter os objetos que eles usam."
+        ):
+            return
+        
         try:
             with open(new_file_path, 'rb') as f:
                 data = f.read()
@@ -706,11 +1695,16 @@ class PakToolGUI:
             # Adicionar aos modificados ou adicionados
             if file_path in self.added_files:
                 self.added_files[file_path] = data
+                self.journal_record("record_add", file_path, data)
             else:
                 self.modified_files[file_path] = data
+                self.journal_record("record_modify", file_path, data)
             
             # Remover de deletados se estava lá
-            self.deleted_files.discard(file_path)
+            if file_path in self.deleted_files:
+                self.deleted_files.discard(file_path)
+                self.journal_record("record_undelete", file_path)
+            self.entry_table.set_file(file_path, len(data))
             
             self.log(f"🔄 Arquivo substituído: {file_path} ({len(data)} bytes)")
             messagebox.showinfo("Sucesso", f"Arquivo substituído!\n\nUse 'Salvar PAK Como' para aplicar as mudanças.")
@@ -730,64 +1724,107 @@ class PakToolGUI:
         
         item = selection[0]
         tags = self.files_tree.item(item)["tags"]
-        item_text = self.files_tree.item(item)["text"]
         
-        if not tags:
-            messagebox.showinfo("Informação", "Selecione um arquivo para deletar")
-            return
-        
-        file_path = tags[0]
-        
-        # Verificar se é uma pasta (extensão)
-        if " (" in item_text and "arquivos)" in item_text:
-            # É uma pasta - deletar todos os arquivos desta extensão
-            ext = file_path  # Na verdade é a extensão
-            files_to_delete = [f for f in self.pak_files_list if Path(f).suffix.lower() == ext and f not in self.deleted_files]
+        if len(selection) > 1 or item in self.tree_dir_items:
+            # Pastas e/ou vários arquivos - uma única confirmação
+            files_to_delete = self.get_selected_files()
             
             if not files_to_delete:
-                messagebox.showinfo("Informação", "Nenhum arquivo para deletar nesta pasta")
+                messagebox.showinfo("Informação", "Nenhum arquivo para deletar na seleção")
                 return
             
             result = messagebox.askyesno(
                 "Confirmar Deleção Múltipla",
-                f"Deseja deletar TODOS os arquivos desta pasta?\n\n{item_text}\n\nTotal: {len(files_to_delete)} arquivo(s)\n\nUse 'Salvar PAK Como' para aplicar."
+                f"Deseja deletar TODOS os arquivos selecionados?\n\n{self.describe_paths(files_to_delete)}\n\nTotal: {len(files_to_delete)} arquivo(s)"
+                f"{self.describe_dependents(files_to_delete, ignored=files_to_delete)}\n\nUse 'Salvar PAK Como' para aplicar."
             )
             
             if not result:
                 return
             
+            open_paths = self.get_open_tree_paths()
+            
+            # Pastas da árvore completa saem como subárvore (só os ancestrais são ajustados)
+            if self.shown_tree is self.dir_tree:
+                for selected in selection:
+                    if selected in self.tree_dir_items:
+                        self.dir_tree.remove_subtree(self.tree_dir_items[selected].path)
+            for fp in files_to_delete:
+                self.dir_tree.remove_file(fp)
+                self.entry_table.remove(fp)
+            
             # Deletar todos
             for fp in files_to_delete:
                 self.deleted_files.add(fp)
                 self.modified_files.pop(fp, None)
                 self.added_files.pop(fp, None)
+            self.journal_record("record_delete", files_to_delete)
             
             self.log(f"🗑️ {len(files_to_delete)} arquivo(s) marcados para deleção")
             messagebox.showinfo("Sucesso", f"{len(files_to_delete)} arquivo(s) marcados para deleção!\n\nUse 'Salvar PAK Como' para aplicar.")
         else:
+            if not tags:
+                messagebox.showinfo("Informação", "Selecione um arquivo para deletar")
+                return
+            
+            file_path = tags[0]
+            
             # É um arquivo individual
             result = messagebox.askyesno(
                 "Confirmar Deleção",
-                f"Deletar arquivo?\n\n{file_path}\n\nEsta ação será aplicada ao salvar o PAK."
+                f"Deletar arquivo?\n\n{file_path}{self.describe_dependents([file_path])}\n\nEsta ação será aplicada ao salvar o PAK."
             )
             
             if not result:
                 return
             
+            open_paths = self.get_open_tree_paths()
+            
             # Adicionar aos deletados
             self.deleted_files.add(file_path)
             
             # Remover de modificados e adicionados se estava lá
             self.modified_files.pop(file_path, None)
             self.added_files.pop(file_path, None)
+            self.journal_record("record_delete", [file_path])
+            self.dir_tree.remove_file(file_path)
+            self.entry_table.remove(file_path)
             
             self.log(f"🗑️ Arquivo marcado para deleção: {file_path}")
             messagebox.showinfo("Sucesso", f"Arquivo marcado para deleção!\n\nUse 'Salvar PAK Como' para aplicar as mudanças.")
         
-        self.list_pak_contents()
+        # A árvore já foi atualizada: só redesenhar, sem reconstruir
+        if self.search_var.get():
+            self.filter_files()
+        else:
+            self.render_tree(self.dir_tree, open_paths=open_paths)
         self.show_info()
 
     
+    def get_selected_files(self):
+        """Arquivos selecionados na árvore (pastas incluem a subárvore inteira)"""
+        files = []
+        seen = set()
+        for item in self.files_tree.selection():
+            if item in self.tree_dir_items:
+                paths = self.shown_tree.iter_files(self.tree_dir_items[item])
+            else:
+                tags = self.files_tree.item(item)["tags"]
+                paths = tags[:1]
+            
+            for file_path in paths:
+                if file_path not in seen and file_path not in self.deleted_files:
+                    seen.add(file_path)
+                    files.append(file_path)
+        return files
+    
+    def describe_paths(self, files, limit=10):
+        """Primeiros caminhos de uma lista para as confirmações"""
+        text = "\n".join(files[:limit])
+        if len(files) > limit:
+            text += f"\n... e mais {len(files) - limit}"
+        return text
+    
     def view_file_content(self):
         """Visualizar conteúdo do arquivo"""
         selection = self.files_tree.selection()
@@ -809,68 +1846,58 @@ class PakToolGUI:
         
         ext = Path(file_path).suffix.lower()
         
+        # Binários abrem no visualizador hex, que lê só o trecho visível
+        if ext not in TEXT_EXTENSIONS + IMAGE_EXTENSIONS:
+            self.open_hex_viewer(file_path)
+            return
+        
         self.status_var.set(f"Carregando {Path(file_path).name}...")
         self.log(f"Visualizando: {file_path}")
         
-        # Carregar em thread separada
-        thread = threading.Thread(target=self.do_view_file, args=(file_path, ext))
-        thread.daemon = True
-        thread.start()
+        # Carregar em segundo plano (visualização tem prioridade sobre tarefas em massa)
+        snapshot = self.snapshot()
+        self.submit_job(f"Visualizar {Path(file_path).name}",
+                        lambda job: self.do_view_file(file_path, ext, snapshot, job),
+                        priority=PRIORITY_INTERACTIVE, snapshot=snapshot)
     
-    def do_view_file(self, file_path, ext):
-        """Visualizar arquivo (executado em thread separada)"""
+    def do_view_file(self, file_path, ext, snapshot, job=None):
+        """Visualizar arquivo (executado em segundo plano)"""
         try:
-            # Verificar de onde carregar
-            if file_path in self.added_files:
-                data = self.added_files[file_path]
-            elif file_path in self.modified_files:
-                data = self.modified_files[file_path]
-            else:
-                data = self.current_pak.read_file(file_path)
+            # Usar versão modificada/adicionada se existir
+            data = snapshot.read(file_path)
+            
+            if job:
+                job.token.raise_if_cancelled()
             
             # Decidir como visualizar baseado na extensão
-            if ext in ['.txt', '.ini', '.cfg', '.log', '.xml', '.json', '.md', '.csv']:
+            if ext in TEXT_EXTENSIONS:
                 # Arquivo de texto - abrir editor
                 self.root.after(0, lambda: TextEditorWindow(self.root, file_path, data, self.on_file_saved))
             
-            elif ext in ['.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tga', '.dds']:
+            else:
                 # Imagem - abrir visualizador
                 self.root.after(0, lambda: ImageViewerWindow(self.root, file_path, data))
             
-            else:
-                # Arquivo binário - perguntar o que fazer
-                self.root.after(0, lambda: self.handle_binary_file(file_path, data))
-            
             self.root.after(0, lambda: self.status_var.set("Pronto"))
             
+        except JobCancelled:
+            self.root.after(0, lambda: self.status_var.set("Visualização cancelada"))
+            raise
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao visualizar arquivo:\n{str(e)}"))
             self.root.after(0, lambda: self.status_var.set("Erro ao visualizar arquivo"))
             self.log(f"ERRO: {str(e)}")
+        finally:
+            snapshot.close()
     
-    def handle_binary_file(self, file_path, data):
-        """Lidar com arquivo binário"""
-        result = messagebox.askyesno(
-            "Arquivo Binário",
-            f"Este é um arquivo binário ({Path(file_path).suffix}).\n\n"
-            f"Tamanho: {len(data)} bytes\n\n"
-            "Deseja extrair este arquivo?"
-        )
-        
-        if result:
-            output_path = filedialog.asksaveasfilename(
-                title="Salvar arquivo como",
-                initialfile=Path(file_path).name,
-                defaultextension=Path(file_path).suffix
-            )
-            
-            if output_path:
-                try:
-                    with open(output_path, 'wb') as f:
-                        f.write(data)
-                    messagebox.showinfo("Sucesso", f"Arquivo extraído:\n{output_path}")
-                except Exception as e:
-                    messagebox.showerror("Erro", f"Erro ao salvar:\n{str(e)}")
+    def open_hex_viewer(self, file_path):
+        """Abrir o visualizador hex com leitura sob demanda da entrada"""
+        snapshot = self.snapshot()
+        size = snapshot.get_size(file_path)
+        source = PagedSource(lambda start, length: snapshot.read_range(file_path, start, length), size)
+        self.log(f"Inspecionando: {file_path} ({format_size(size)})")
+        HexViewerWindow(self.root, file_path, source, self.scheduler,
+                        on_extract=self.extract_file_as, on_close=snapshot.close)
     
     def edit_file_content(self):
         """Editar conteúdo do arquivo"""
@@ -888,7 +1915,7 @@ class PakToolGUI:
         ext = Path(file_path).suffix.lower()
         
         # Verificar se é editável
-        if ext not in ['.txt', '.ini', '.cfg', '.log', '.xml', '.json', '.md', '.csv']:
+        if ext not in TEXT_EXTENSIONS:
             messagebox.showwarning("Aviso", f"Tipo de arquivo {ext} não é editável como texto.")
             return
         
@@ -900,8 +1927,11 @@ class PakToolGUI:
             # Adicionar aos modificados ou adicionados
             if file_path in self.added_files:
                 self.added_files[file_path] = content
+                self.journal_record("record_add", file_path, content)
             else:
                 self.modified_files[file_path] = content
+                self.journal_record("record_modify", file_path, content)
+            self.entry_table.set_file(file_path, len(content))
             
             self.log(f"✓ Arquivo modificado: {file_path} ({len(content)} bytes)")
             
@@ -923,6 +1953,10 @@ class PakToolGUI:
         item = selection[0]
         tags = self.files_tree.item(item)["tags"]
         
+        if len(selection) > 1 or item in self.tree_dir_items:
+            self.extract_selected_files()
+            return
+        
         if not tags:
             messagebox.showinfo("Informação", "Selecione um arquivo para extrair")
             return
@@ -934,6 +1968,10 @@ class PakToolGUI:
             messagebox.showwarning("Aviso", "Este arquivo foi marcado para deleção")
             return
         
+        self.extract_file_as(file_path)
+    
+    def extract_file_as(self, file_path):
+        """Perguntar o destino e extrair um arquivo em segundo plano"""
         # Selecionar pasta de destino
         output_path = filedialog.asksaveasfilename(
             title="Salvar arquivo como",
@@ -947,21 +1985,105 @@ class PakToolGUI:
         self.status_var.set(f"Extraindo {Path(file_path).name}...")
         self.log(f"Extraindo: {file_path}")
         
-        # Extrair em thread separada
-        thread = threading.Thread(target=self.do_extract_file, args=(file_path, output_path))
-        thread.daemon = True
-        thread.start()
+        # Extrair em segundo plano
+        snapshot = self.snapshot()
+        self.submit_job(f"Extrair {Path(file_path).name}",
+                        lambda job: self.do_extract_file(file_path, output_path, snapshot, job),
+                        priority=PRIORITY_INTERACTIVE, snapshot=snapshot)
+        
+    def extract_selected_files(self):
+        """Extrair vários arquivos/pastas selecionados para uma pasta"""
+        files = self.get_selected_files()
+        if not files:
+            messagebox.showinfo("Informação", "Nenhum arquivo para extrair na seleção")
+            return
+        
+        output_dir = filedialog.askdirectory(title="Selecione a pasta de destino")
+        
+        if not output_dir:
+            return
+        
+        result = messagebox.askyesno(
+            "Confirmar",
+            f"Extrair {len(files)} arquivos selecionados para:\n{output_dir}\n\nContinuar?"
+        )
         
-    def do_extract_file(self, file_path, output_path):
-        """Extrair arquivo (executado em thread separada)"""
+        if not result:
+            return
+        
+        self.status_var.set(f"Extraindo {len(files)} arquivos...")
+        self.log(f"Iniciando extração de {len(files)} arquivos selecionados para: {output_dir}")
+        
+        # Uma única tarefa em lote para toda a seleção
+        snapshot = self.snapshot()
+        progress = self.start_progress("Extraindo...", total_files=len(files),
+                                       total_bytes=sum(snapshot.get_size(f) for f in files))
+        progress.job = self.submit_job(f"Extrair {len(files)} selecionados",
+                                       lambda job: self.do_extract_all(output_dir, files, snapshot, job, progress),
+                                       priority=PRIORITY_BULK, snapshot=snapshot, progress=progress)
+    
+    def export_path_list(self):
+        """Exportar a lista de caminhos selecionados (ou todos) para .txt ou .csv"""
+        if not self.current_pak:
+            messagebox.showinfo("Informação", "Nenhum arquivo .pak carregado")
+            return
+        
+        files = self.get_selected_files() or list(self.shown_tree.iter_files())
+        if not files:
+            messagebox.showinfo("Informação", "Nenhum arquivo para exportar")
+            return
+        
+        output_path = filedialog.asksaveasfilename(
+            title="Exportar lista de caminhos",
+            defaultextension=".txt",
+            initialfile="lista_arquivos.txt",
+            filetypes=[("Texto", "*.txt"), ("CSV", "*.csv")]
+        )
+        
+        if not output_path:
+            return
+        
+        snapshot = self.snapshot()
+        self.submit_job(f"Exportar lista ({len(files)})",
+                        lambda job: self.do_export_path_list(output_path, sorted(files), snapshot, job),
+                        priority=PRIORITY_NORMAL, snapshot=snapshot)
+    
+    def do_export_path_list(self, output_path, files, snapshot, job=None):
+        """Gravar a lista de caminhos (executado em segundo plano)"""
         try:
-            # Verificar de onde carregar
-            if file_path in self.added_files:
-                data = self.added_files[file_path]
-            elif file_path in self.modified_files:
-                data = self.modified_files[file_path]
-            else:
-                data = self.current_pak.read_file(file_path)
+            with open(output_path, "w", encoding="utf-8", newline="") as f:
+                if output_path.lower().endswith(".csv"):
+                    writer = csv.writer(f)
+                    writer.writerow(["caminho", "tamanho", "status"])
+                    for file_path in files:
+                        if file_path in snapshot.added_files:
+                            status = "novo"
+                        elif file_path in snapshot.modified_files:
+                            status = "modificado"
+                        else:
+                            status = ""
+                        writer.writerow([file_path, snapshot.get_size(file_path), status])
+                else:
+                    f.write("\n".join(files) + "\n")
+            
+            self.root.after(0, lambda: self.status_var.set(f"Lista exportada: {len(files)} caminhos"))
+            self.log(f"✓ Lista de {len(files)} caminhos exportada: {output_path}")
+        except Exception as e:
+            message = str(e)
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao exportar lista:\n{message}"))
+            self.log(f"ERRO: {message}")
+        finally:
+            snapshot.close()
+    
+    def do_extract_file(self, file_path, output_path, snapshot, job=None):
+        """Extrair arquivo (executado em segundo plano)"""
+        try:
+            # Usar versão modificada/adicionada se existir
+            data = snapshot.read(file_path)
+            
+            if job:
+                job.token.raise_if_cancelled()
+                job.report(done=1, total=1, bytes_done=len(data))
             
             output_path = Path(output_path)
             output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -973,10 +2095,15 @@ class PakToolGUI:
             self.root.after(0, lambda: self.status_var.set("Arquivo extraído com sucesso"))
             self.log(f"✓ Arquivo extraído: {output_path} ({len(data)} bytes)")
             
+        except JobCancelled:
+            self.root.after(0, lambda: self.status_var.set("Extração cancelada"))
+            raise
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao extrair arquivo:\n{str(e)}"))
             self.root.after(0, lambda: self.status_var.set("Erro ao extrair arquivo"))
             self.log(f"ERRO: {str(e)}")
+        finally:
+            snapshot.close()
             
     def copy_file_path(self):
         """Copiar caminho do arquivo para clipboard"""
@@ -1001,8 +2128,7 @@ class PakToolGUI:
             return
         
         # Obter todos os arquivos
-        all_files = set(self.pak_files_list) | set(self.added_files.keys())
-        all_files -= self.deleted_files
+        all_files = list(self.entry_table.iter_files())
         
         # Selecionar pasta de destino
         output_dir = filedialog.askdirectory(title="Selecione a pasta de destino")
@@ -1021,45 +2147,81 @@ class PakToolGUI:
         self.status_var.set(f"Extraindo {len(all_files)} arquivos...")
         self.log(f"Iniciando extração de {len(all_files)} arquivos para: {output_dir}")
         
-        # Extrair em thread separada
-        thread = threading.Thread(target=self.do_extract_all, args=(output_dir, list(all_files)))
-        thread.daemon = True
-        thread.start()
+        # Extrair em segundo plano (tarefa em massa: não bloqueia visualizações)
+        snapshot = self.snapshot()
+        progress = self.start_progress("Extraindo...", total_files=len(all_files),
+                                       total_bytes=self.entry_table.total_size())
+        progress.job = self.submit_job("Extrair tudo",
+                                       lambda job: self.do_extract_all(output_dir, list(all_files), snapshot, job, progress),
+                                       priority=PRIORITY_BULK, snapshot=snapshot, progress=progress)
+        
+    def submit_job(self, name, func, priority=PRIORITY_NORMAL, critical=False, snapshot=None, progress=None):
+        """Agendar uma tarefa que usa snapshot/progresso; os dois são liberados quando ela termina
+
+        O agendador chama o on_done mesmo se a tarefa for cancelada ainda na fila (func não roda).
+        """
+        def release(job):
+            if progress is not None:
+                progress.finish()
+            if snapshot is not None:
+                snapshot.close()
+        
+        return self.scheduler.submit(name, func, priority=priority, critical=critical, on_done=release)
+    
+    def start_progress(self, label, total_files=0, total_bytes=0):
+        """Criar canal de progresso que atualiza a barra de status a 10 Hz"""
+        return ProgressChannel(
+            self.root,
+            lambda stats: self.status_var.set(format_progress(label, stats)),
+            total_files=total_files,
+            total_bytes=total_bytes
+        ).start()
+    
+    def do_extract_all(self, output_dir, files_list, snapshot, job=None, progress=None):
+        """Extrair arquivos em paralelo (executado em segundo plano)"""
+        from pak_io import parallel_map
         
-    def do_extract_all(self, output_dir, files_list):
-        """Extrair todos os arquivos (executado em thread separada)"""
         extracted = 0
         failed = 0
         
-        for file_path in files_list:
-            try:
-                # Verificar de onde carregar
-                if file_path in self.added_files:
-                    data = self.added_files[file_path]
-                elif file_path in self.modified_files:
-                    data = self.modified_files[file_path]
-                else:
-                    data = self.current_pak.read_file(file_path)
-                
-                output_path = Path(output_dir) / file_path.lstrip('/')
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                
+        if progress:
+            progress.restart_clock()
+        
+        def extract_one(file_path):
+            # Usar versão modificada/adicionada se existir
+            data = snapshot.read(file_path)
+            
+            output_path = Path(output_dir) / file_path.lstrip('/')
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            with profiler.span("write_file", CATEGORY_WRITE):
                 with open(output_path, 'wb') as f:
                     f.write(data)
-                
+            profiler.count("bytes_written", len(data))
+            
+            if progress:
+                progress.add(1, len(data))
+        
+        for file_path, _, error in parallel_map(extract_one, files_list,
+                                                cancel_event=job.token if job else None):
+            if error is None:
                 extracted += 1
-                self.root.after(0, lambda: self.status_var.set(f"Extraindo... {extracted}/{len(files_list)}"))
-                
-            except Exception as e:
+            else:
                 failed += 1
-                self.log(f"ERRO ao extrair {file_path}: {str(e)}")
+                self.log(f"ERRO ao extrair {file_path}: {str(error)}")
         
+        cancelled = bool(job and job.token.cancelled)
+        snapshot.close()
+        if progress:
+            progress.finish()
+        
+        title = "Extração Cancelada" if cancelled else "Extração Concluída"
         self.root.after(0, lambda: messagebox.showinfo(
-            "Extração Concluída",
-            f"Extração concluída!\n\n✓ Extraídos: {extracted}\n✗ Falhas: {failed}\n\n📁 Destino: {output_dir}"
+            title,
+            f"{title}!\n\n✓ Extraídos: {extracted}\n✗ Falhas: {failed}\n\n📁 Destino: {output_dir}"
         ))
-        self.root.after(0, lambda: self.status_var.set(f"Extração concluída: {extracted} arquivos"))
-        self.log(f"✓ Extração concluída: {extracted} extraídos, {failed} falhas")
+        self.root.after(0, lambda: self.status_var.set(f"{title}: {extracted} arquivos"))
+        self.log(f"✓ {title}: {extracted} extraídos, {failed} falhas")
     
     def save_pak_as(self):
         """Salvar PAK com modificações"""
@@ -1080,59 +2242,356 @@ class PakToolGUI:
         if not output_path:
             return
         
+        from pak_iostore import is_iostore_path
+        if is_iostore_path(output_path):
+            messagebox.showerror("Erro", "O resultado é sempre gravado como .pak (não como .utoc/.ucas)")
+            return
+        
+        chunk_size = self.ask_chunk_size()
+        if chunk_size is None:
+            return
+        
+        backup = self.ask_backup(self.first_output_path(output_path, chunk_size))
+        if backup is None:
+            return
+        
+        # Manter a criptografia quando o PAK original tem chave
+        encryption = None
+        if self.current_pak.key != ZERO_KEY:
+            encrypt = messagebox.askyesnocancel(
+                "Criptografia",
+                "Criptografar o novo PAK (entradas e índice) com a mesma chave AES?"
+            )
+            if encrypt is None:
+                return
+            if encrypt:
+                guid = self.current_pak_crypto.guid if self.current_pak_crypto else DEFAULT_GUID
+                encryption = (self.current_pak.key, bytes.fromhex(guid))
+        
         self.status_var.set("Criando novo PAK...")
         self.log(f"Criando novo PAK: {output_path}")
         self.log(f"Modificações: {len(self.modified_files)} modificados, {len(self.added_files)} adicionados, {len(self.deleted_files)} deletados")
         
-        # Criar em thread separada
-        thread = threading.Thread(target=self.do_save_pak, args=(output_path,))
-        thread.daemon = True
-        thread.start()
+        # Criar em segundo plano (gravação: o app aguarda antes de fechar)
+        snapshot = self.snapshot()
+        save_files = snapshot.all_files()
+        progress = self.start_progress("Lendo arquivos...", total_files=len(save_files),
+                                       total_bytes=sum(snapshot.get_size(f) for f in save_files))
+        if chunk_size:
+            from pak_io import get_pak_mount_point, get_pak_version
+            
+            # Partes gravadas em paralelo a partir do snapshot
+            key, guid = encryption if encryption else (None, None)
+            options = dict(version=get_pak_version(snapshot.pak), mount_point=get_pak_mount_point(snapshot.pak),
+                           key=key, encrypt=encryption is not None, guid=guid, backup=backup,
+                           release_sources=snapshot.close)
+            file_sizes = [(file_path, snapshot.get_size(file_path)) for file_path in save_files]
+            progress.job = self.submit_job(f"Salvar partes de {Path(output_path).name}",
+                                           lambda job: self.do_write_chunks(file_sizes, output_path, snapshot.read,
+                                                                            chunk_size, options, job, progress),
+                                           priority=PRIORITY_NORMAL, critical=True, snapshot=snapshot, progress=progress)
+            return
+        progress.job = self.submit_job(f"Salvar {Path(output_path).name}",
+                                       lambda job: self.do_save_pak(output_path, snapshot, job, backup, progress, encryption),
+                                       priority=PRIORITY_NORMAL, critical=True, snapshot=snapshot, progress=progress)
     
-    def do_save_pak(self, output_path):
-        """Salvar PAK (executado em thread separada)"""
+    def ask_chunk_size(self):
+        """Tamanho máximo de cada parte em bytes (0 = arquivo único, None = cancelar)"""
+        chunk_size_mb = tk.simpledialog.askinteger(
+            "Dividir em partes",
+            "Tamanho máximo de cada parte em MB (ex: 2048)\n0 = gravar um único arquivo:",
+            initialvalue=self.chunk_size_mb, minvalue=0
+        )
+        if chunk_size_mb is None:
+            return None
+        self.chunk_size_mb = chunk_size_mb
+        return chunk_size_mb * 1024 * 1024
+    
+    def first_output_path(self, output_path, chunk_size):
+        """Arquivo que a gravação substitui primeiro (a primeira parte, quando dividida)"""
+        from pak_chunks import chunk_path
+        
+        return chunk_path(output_path, 0) if chunk_size else output_path
+    
+    def do_write_chunks(self, file_sizes, output_path, read_file, chunk_size, options, job=None, progress=None):
+        """Gravar a saída em partes com tamanho máximo (executado em segundo plano)"""
+        from pak_chunks import split_output
+        
+        if progress:
+            progress.restart_clock()
+        
         try:
-            # Criar PAK novo
-            new_pak = PakFile()
-            new_pak.mount_point = self.current_pak.mount_point
-            new_pak.version = self.current_pak.version
-            
-            # Obter lista final de arquivos
-            all_files = set(self.pak_files_list) | set(self.added_files.keys())
-            all_files -= self.deleted_files
-            
-            # Adicionar todos os arquivos
-            for file_path in all_files:
-                # Usar versão modificada/adicionada se existir
-                if file_path in self.added_files:
-                    data = self.added_files[file_path]
-                elif file_path in self.modified_files:
-                    data = self.modified_files[file_path]
-                else:
-                    data = self.current_pak.read_file(file_path)
+            result = split_output(file_sizes, output_path, read_file, chunk_size,
+                                  cancel_event=job.token if job else None,
+                                  on_progress=progress.add if progress else None, **options)
+            if result is None:
+                self.root.after(0, lambda: self.status_var.set("Gravação das partes cancelada"))
+                self.log(f"⏹️ Gravação das partes cancelada: {output_path}")
+                return
+            chunk_paths, manifest_path = result
+            
+            self.log(f"✓ {len(file_sizes)} arquivos gravados em {len(chunk_paths)} partes:")
+            for chunk_file in chunk_paths:
+                self.log(f"   {Path(chunk_file).name}: {format_size(os.path.getsize(chunk_file))}")
+            self.log(f"🧾 Manifesto das partes: {manifest_path}")
+            
+            # O PAK aberto foi sobrescrito por uma das partes: recarregar o índice
+            if self.current_pak_path and any(os.path.abspath(path) == os.path.abspath(self.current_pak_path)
+                                             for path in chunk_paths):
+                self.root.after(0, lambda: self.reload_after_overwrite(self.current_pak_path))
+            
+            self.root.after(0, lambda: messagebox.showinfo(
+                "Sucesso",
+                f"Saída dividida em {len(chunk_paths)} partes!\n\n"
+                f"📦 Primeira parte: {Path(chunk_paths[0]).name if chunk_paths else '-'}\n"
+                f"📁 Total de arquivos: {len(file_sizes)}\n"
+                f"🧾 Manifesto: {Path(manifest_path).name}"
+            ))
+            self.root.after(0, lambda: self.status_var.set(f"{len(chunk_paths)} partes gravadas"))
+        except Exception as e:
+            message = str(e)
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao gravar as partes:\n{message}"))
+            self.root.after(0, lambda: self.status_var.set("Erro ao gravar as partes"))
+            self.log(f"ERRO: {message}")
+        finally:
+            if options.get("release_sources"):
+                options["release_sources"]()
+            if progress:
+                progress.finish()
+    
+    def transcode_current_pak(self):
+        """Converter o PAK aberto para outra versão/compressão direto para um novo arquivo"""
+        from pyuepak.version import PakVersion
+        from pak_io import get_pak_entries, get_pak_version
+        from pak_iostore import is_iostore_path
+        from pak_transcode import COMPRESSION_CHOICES
+        
+        if not self.current_pak:
+            messagebox.showinfo("Informação", "Abra um arquivo .pak primeiro")
+            return
+        
+        source_name = Path(self.current_pak_path).name
+        dialog = TranscodeDialog(self.root, source_name, [version.name for version in PakVersion],
+                                 PakVersion(get_pak_version(self.current_pak)).name,
+                                 list(COMPRESSION_CHOICES), self.current_pak.key != ZERO_KEY)
+        if not dialog.result:
+            return
+        version_name, compression_name, encrypt = dialog.result
+        
+        output_path = filedialog.asksaveasfilename(
+            title="Salvar PAK convertido como",
+            defaultextension=".pak",
+            initialfile=f"{Path(source_name).stem}_{version_name}.pak",
+            filetypes=[("PAK files", "*.pak"), ("All files", "*.*")]
+        )
+        if not output_path:
+            return
+        if is_iostore_path(output_path):
+            messagebox.showerror("Erro", "O resultado é sempre gravado como .pak (não como .utoc/.ucas)")
+            return
+        
+        backup = self.ask_backup(output_path)
+        if backup is None:
+            return
+        
+        guid = None
+        if encrypt:
+            guid = bytes.fromhex(self.current_pak_crypto.guid if self.current_pak_crypto else DEFAULT_GUID)
+        options = dict(version=PakVersion[version_name], compression=COMPRESSION_CHOICES[compression_name],
+                       key=self.current_pak.key if encrypt else None, encrypt=encrypt, guid=guid, backup=backup)
+        
+        self.log(f"🔁 Convertendo {source_name} -> {Path(output_path).name} ({version_name}, compressão: {compression_name})")
+        entries = get_pak_entries(self.current_pak)
+        progress = self.start_progress("Convertendo...", total_files=len(entries),
+                                       total_bytes=sum(entry.size for entry in entries.values()))
+        pak, pak_path = self.current_pak, self.current_pak_path
+        progress.job = self.submit_job(f"Converter {source_name}",
+                                       lambda job: self.do_transcode(pak, pak_path, output_path, options, job, progress),
+                                       priority=PRIORITY_NORMAL, critical=True, progress=progress)
+    
+    def do_transcode(self, pak, pak_path, output_path, options, job=None, progress=None):
+        """Converter PAK (executado em segundo plano)"""
+        from pak_transcode import transcode_pak
+        
+        try:
+            stats = transcode_pak(pak, output_path, source_path=pak_path,
+                                  cancel_event=job.token if job else None,
+                                  on_progress=progress.add if progress else None, **options)
+            if stats is None:
+                self.root.after(0, lambda: self.status_var.set("Conversão cancelada"))
+                self.log(f"⏹️ Conversão cancelada: {output_path}")
+                return
+            
+            self.log(f"✓ PAK convertido: {output_path}")
+            self.log(f"   {stats.format()}")
+            self.root.after(0, lambda: self.status_var.set(f"PAK convertido: {stats.format()}"))
+            
+            # O PAK aberto foi sobrescrito: recarregar o índice
+            if os.path.abspath(output_path) == os.path.abspath(pak_path):
+                self.root.after(0, lambda: self.reload_after_overwrite(output_path))
+        except Exception as e:
+            message = str(e)
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao converter PAK:\n{message}"))
+            self.root.after(0, lambda: self.status_var.set("Erro ao converter PAK"))
+            self.log(f"ERRO: {message}")
+        finally:
+            if progress:
+                progress.finish()
+    
+    def export_manifest(self):
+        """Exportar o manifesto de hashes do PAK aberto (JSON ou CSV)"""
+        from pak_io import get_pak_entries
+        
+        if not self.current_pak:
+            messagebox.showinfo("Informação", "Abra um arquivo .pak primeiro")
+            return
+        
+        source_name = Path(self.current_pak_path).name
+        output_path = filedialog.asksaveasfilename(
+            title="Salvar manifesto como",
+            defaultextension=".json",
+            initialfile=f"{Path(source_name).stem}.manifest.json",
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")]
+        )
+        if not output_path:
+            return
+        
+        content_hashes = messagebox.askyesnocancel(
+            "Manifesto",
+            "Calcular também o hash do conteúdo descomprimido de cada arquivo?\n\n"
+            "Sim: lê todas as entradas (mais lento)\n"
+            "Não: só os hashes que já estão no índice"
+        )
+        if content_hashes is None:
+            return
+        if self.added_files or self.modified_files or self.deleted_files:
+            self.log("⚠️ O manifesto descreve o PAK em disco: alterações pendentes não entram")
+        
+        entries = get_pak_entries(self.current_pak)
+        # IoStore não guarda hash por arquivo: o conteúdo é lido de qualquer forma
+        reads_content = content_hashes or getattr(self.current_pak, "is_iostore", False)
+        total_bytes = sum(entry.size for entry in entries.values()) if reads_content else 0
+        progress = self.start_progress("Gerando manifesto...", total_files=len(entries), total_bytes=total_bytes)
+        pak, pak_path = self.current_pak, self.current_pak_path
+        progress.job = self.submit_job(f"Manifesto {source_name}",
+                                       lambda job: self.do_export_manifest(pak, pak_path, output_path, content_hashes, job, progress),
+                                       priority=PRIORITY_NORMAL, progress=progress)
+    
+    def do_export_manifest(self, pak, pak_path, output_path, content_hashes, job=None, progress=None):
+        """Gerar manifesto (executado em segundo plano)"""
+        from pak_io import get_pak_version
+        from pak_manifest import build_manifest, write_manifest
+        
+        try:
+            rows = build_manifest(pak, pak_path, content_hashes,
+                                  cancel_event=job.token if job else None,
+                                  on_progress=progress.add if progress else None)
+            if rows is None:
+                self.root.after(0, lambda: self.status_var.set("Manifesto cancelado"))
+                return
+            write_manifest(rows, output_path, pak_path, get_pak_version(pak))
+            
+            self.log(f"🧾 Manifesto exportado: {output_path} ({len(rows)} entradas)")
+            self.root.after(0, lambda: self.status_var.set(f"Manifesto exportado: {len(rows)} entradas"))
+        except Exception as e:
+            message = str(e)
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao gerar manifesto:\n{message}"))
+            self.root.after(0, lambda: self.status_var.set("Erro ao gerar manifesto"))
+            self.log(f"ERRO: {message}")
+        finally:
+            if progress:
+                progress.finish()
+    
+    def ask_backup(self, output_path):
+        """Perguntar se o arquivo existente deve ser preservado como .bak (None = cancelar)"""
+        if not os.path.exists(output_path):
+            return False
+        
+        return messagebox.askyesnocancel(
+            "Backup",
+            f"O arquivo já existe:\n{output_path}\n\n"
+            "Manter uma cópia da versão anterior (.bak)?"
+        )
+    
+    def do_save_pak(self, output_path, snapshot, job=None, backup=False, progress=None, encryption=None):
+        """Salvar PAK (executado em segundo plano)"""
+        from pak_io import get_pak_mount_point, get_pak_version
+        from pak_writer import PakWriter
+        
+        if progress:
+            progress.restart_clock()
+        
+        try:
+            key, guid = encryption if encryption else (None, None)
+            
+            # Gravar em fluxo: cada entrada vai direto para o temporário
+            writer = PakWriter(output_path, get_pak_version(snapshot.pak), get_pak_mount_point(snapshot.pak),
+                               key=key, encrypt=encryption is not None, guid=guid, backup=backup)
+            try:
+                # Obter lista final de arquivos
+                all_files = sorted(snapshot.all_files())
+                
+                # Adicionar todos os arquivos
+                for file_path in all_files:
+                    if job:
+                        job.token.raise_if_cancelled()
+                    
+                    # Usar versão modificada/adicionada se existir
+                    data = snapshot.read(file_path)
+                    writer.add_file(file_path, data)
+                    
+                    if progress:
+                        progress.add(1, len(data))
+                
+                if progress:
+                    progress.finish()
+                self.root.after(0, lambda: self.status_var.set(f"Gravando {Path(output_path).name}..."))
+                
+                # Liberar o pak de origem (no Windows não é possível substituir um arquivo aberto)
+                snapshot.close()
                 
-                # Adicionar ao novo PAK
-                new_pak.add_file(file_path, data)
+                if job:
+                    job.token.raise_if_cancelled()
+                
+                # Índice + footer + rename atômico: o destino nunca fica truncado
+                backup_path = writer.close()
+            except BaseException:
+                writer.discard()
+                raise
+            
+            if backup_path:
+                self.log(f"Backup da versão anterior: {backup_path}")
+            if encryption:
+                self.log("🔒 PAK gravado com entradas e índice criptografados")
             
-            # Salvar
-            new_pak.write(output_path)
+            # O PAK aberto foi sobrescrito: recarregar o índice
+            if snapshot.pak_path and os.path.abspath(output_path) == os.path.abspath(snapshot.pak_path):
+                self.root.after(0, lambda: self.reload_after_overwrite(output_path))
             
             self.root.after(0, lambda: messagebox.showinfo(
                 "Sucesso",
                 f"PAK criado com sucesso!\n\n"
                 f"📦 Arquivo: {Path(output_path).name}\n"
                 f"📁 Total de arquivos: {len(all_files)}\n"
-                f"✏️ Modificados: {len(self.modified_files)}\n"
-                f"➕ Adicionados: {len(self.added_files)}\n"
-                f"🗑️ Deletados: {len(self.deleted_files)}"
+                f"✏️ Modificados: {len(snapshot.modified_files)}\n"
+                f"➕ Adicionados: {len(snapshot.added_files)}\n"
+                f"🗑️ Deletados: {len(snapshot.deleted_files)}"
             ))
             self.root.after(0, lambda: self.status_var.set("PAK criado com sucesso"))
             self.log(f"✓ PAK criado: {output_path}")
             
+        except JobCancelled:
+            self.root.after(0, lambda: self.status_var.set("Criação do PAK cancelada"))
+            self.log(f"⏹️ Criação do PAK cancelada: {output_path}")
+            raise
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao criar PAK:\n{str(e)}"))
             self.root.after(0, lambda: self.status_var.set("Erro ao criar PAK"))
             self.log(f"ERRO: {str(e)}")
+        finally:
+            snapshot.close()
+            if progress:
+                progress.finish()
     
     def create_pak_from_folder(self):
         """Criar PAK a partir de uma pasta"""
@@ -1150,16 +2609,34 @@ class PakToolGUI:
         if not output_path:
             return
         
+        chunk_size = self.ask_chunk_size()
+        if chunk_size is None:
+            return
+        
+        backup = self.ask_backup(self.first_output_path(output_path, chunk_size))
+        if backup is None:
+            return
+        
         self.status_var.set("Criando PAK...")
         self.log(f"Criando PAK a partir de: {folder_path}")
         
-        # Criar em thread separada
-        thread = threading.Thread(target=self.do_create_pak_from_folder, args=(folder_path, output_path))
-        thread.daemon = True
-        thread.start()
+        # Criar em segundo plano (gravação: o app aguarda antes de fechar)
+        progress = self.start_progress("Adicionando arquivos...")
+        if chunk_size:
+            progress.job = self.submit_job(f"Novo PAK em partes {Path(output_path).name}",
+                                           lambda job: self.do_create_chunks_from_folder(folder_path, output_path, chunk_size,
+                                                                                         job, backup, progress),
+                                           priority=PRIORITY_BULK, critical=True, progress=progress)
+            return
+        progress.job = self.submit_job(f"Novo PAK {Path(output_path).name}",
+                                       lambda job: self.do_create_pak_from_folder(folder_path, output_path, job, backup, progress),
+                                       priority=PRIORITY_BULK, critical=True, progress=progress)
     
-    def do_create_pak_from_folder(self, folder_path, output_path):
-        """Criar PAK a partir de pasta (executado em thread separada)"""
+    def do_create_pak_from_folder(self, folder_path, output_path, job=None, backup=False, progress=None):
+        """Criar PAK a partir de pasta (executado em segundo plano)"""
+        from pyuepak import PakFile
+        from pak_io import atomic_write_pak
+        
         try:
             pak = PakFile()
             pak.mount_point = "../../../"
@@ -1168,21 +2645,33 @@ class PakToolGUI:
             folder = Path(folder_path)
             files_added = 0
             
+            # Listar antes de ler para conhecer os totais (permite calcular o ETA)
+            source_files = [(file_path, file_path.stat().st_size) for file_path in folder.rglob('*') if file_path.is_file()]
+            if progress:
+                progress.set_totals(len(source_files), sum(size for _, size in source_files))
+                progress.restart_clock()
+            
             # Adicionar todos os arquivos da pasta
-            for file_path in folder.rglob('*'):
-                if file_path.is_file():
-                    relative_path = file_path.relative_to(folder)
-                    
-                    with open(file_path, 'rb') as f:
-                        data = f.read()
-                    
-                    pak.add_file(str(relative_path), data)
-                    files_added += 1
-                    
-                    self.root.after(0, lambda: self.status_var.set(f"Adicionando arquivos... {files_added}"))
+            for file_path, _ in source_files:
+                if job:
+                    job.token.raise_if_cancelled()
+                
+                relative_path = file_path.relative_to(folder)
+                
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                
+                pak.add_file(relative_path.as_posix(), data)
+                files_added += 1
+                if progress:
+                    progress.add(1, len(data))
+            
+            if progress:
+                progress.finish()
+            self.root.after(0, lambda: self.status_var.set(f"Gravando {Path(output_path).name}..."))
             
-            # Salvar PAK
-            pak.write(output_path)
+            # Salvar PAK (temporário + fsync + rename)
+            atomic_write_pak(pak, output_path, backup=backup, cancel_token=job.token if job else None)
             
             self.root.after(0, lambda: messagebox.showinfo(
                 "Sucesso",
@@ -1193,15 +2682,762 @@ class PakToolGUI:
             self.root.after(0, lambda: self.status_var.set("PAK criado com sucesso"))
             self.log(f"✓ PAK criado: {output_path} ({files_added} arquivos)")
             
+        except JobCancelled:
+            self.root.after(0, lambda: self.status_var.set("Criação do PAK cancelada"))
+            self.log(f"⏹️ Criação do PAK cancelada: {output_path}")
+            raise
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao criar PAK:\n{str(e)}"))
             self.root.after(0, lambda: self.status_var.set("Erro ao criar PAK"))
             self.log(f"ERRO: {str(e)}")
+        finally:
+            if progress:
+                progress.finish()
+
+    def do_create_chunks_from_folder(self, folder_path, output_path, chunk_size, job=None, backup=False, progress=None):
+        """Criar PAK em partes a partir de pasta (executado em segundo plano)"""
+        from pyuepak.version import PakVersion
+        
+        folder = Path(folder_path)
+        source_files = {file_path.relative_to(folder).as_posix(): file_path
+                        for file_path in folder.rglob('*') if file_path.is_file()}
+        file_sizes = [(relative_path, file_path.stat().st_size) for relative_path, file_path in source_files.items()]
+        if progress:
+            progress.set_totals(len(file_sizes), sum(size for _, size in file_sizes))
+        
+        def read_file(relative_path):
+            with open(source_files[relative_path], 'rb') as f:
+                return f.read()
+        
+        # Mesma versão do "Novo PAK" em arquivo único (pak.version = 9)
+        self.do_write_chunks(file_sizes, output_path, read_file, chunk_size,
+                             dict(version=PakVersion.V8B, backup=backup), job, progress)
+
+    def estimate_compression(self):
+        """Amostrar uma pasta ou o PAK aberto e estimar cada método de compressão"""
+        from pak_estimate import open_folder_source, open_pak_source
+        
+        use_pak = False
+        if self.current_pak:
+            use_pak = messagebox.askyesnocancel(
+                "Estimar compressão",
+                "Analisar o PAK aberto?\n\n"
+                "Sim: amostras do PAK aberto\n"
+                "Não: escolher uma pasta (antes de criar um PAK)"
+            )
+            if use_pak is None:
+                return
+        
+        if use_pak:
+            name = Path(self.current_pak_path).name
+            pak, pak_path = self.current_pak, self.current_pak_path
+            source = lambda: open_pak_source(pak, pak_path)
+        else:
+            folder_path = filedialog.askdirectory(title="Selecione a pasta a analisar")
+            if not folder_path:
+                return
+            name = Path(folder_path).name
+            source = lambda: open_folder_source(folder_path)
+        
+        self.log(f"📊 Estimando compressão de {name}...")
+        progress = self.start_progress("Testando compressão...")
+        progress.job = self.submit_job(f"Estimar compressão {name}",
+                                       lambda job: self.do_estimate_compression(source, job, progress),
+                                       priority=PRIORITY_BULK, progress=progress)
+    
+    def do_estimate_compression(self, open_source, job=None, progress=None):
+        """Testar os métodos nas amostras (executado em segundo plano)"""
+        from pak_estimate import estimate_compression, pick_samples
+        
+        try:
+            file_sizes, read_range, close = open_source()
+            try:
+                if progress:
+                    samples = pick_samples(file_sizes)
+                    progress.set_totals(len(samples), sum(sample[3] for sample in samples))
+                    progress.restart_clock()
+                estimate = estimate_compression(file_sizes, read_range, cancel_event=job.token if job else None,
+                                                on_progress=progress.add if progress else None)
+            finally:
+                close()
+            if estimate is None:
+                self.root.after(0, lambda: self.status_var.set("Estimativa cancelada"))
+                return
+            
+            self.log(estimate.format())
+            self.root.after(0, lambda: self.status_var.set("Estimativa de compressão no log"))
+            self.root.after(0, lambda: self.notebook.select(2))
+        except Exception as e:
+            message = str(e)
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao estimar compressão:\n{message}"))
+            self.root.after(0, lambda: self.status_var.set("Erro ao estimar compressão"))
+            self.log(f"ERRO: {message}")
+        finally:
+            if progress:
+                progress.finish()
+    
+    def toggle_watch_folder(self):
+        """Iniciar/parar o reempacotamento automático de uma pasta"""
+        if self.watch_stop is not None:
+            self.watch_stop.set()
+            self.watch_button.config(text="👁️ Observar Pasta")
+            self.status_var.set("Observação encerrada")
+            return
+        
+        folder_path = filedialog.askdirectory(title="Selecione a pasta a observar")
+        if not folder_path:
+            return
+        
+        output_path = filedialog.asksaveasfilename(
+            title="PAK gerado a cada mudança",
+            defaultextension=".pak",
+            initialfile=f"{Path(folder_path).name}_P.pak",
+            filetypes=[("PAK files", "*.pak"), ("All files", "*.*")]
+        )
+        if not output_path:
+            return
+        
+        # Thread própria: a observação dura a sessão inteira e não deve ocupar um worker do agendador
+        self.watch_stop = threading.Event()
+        self.watch_button.config(text="⏹️ Parar Observação")
+        self.log(f"👁️ Observando {folder_path} -> {Path(output_path).name}")
+        self.watch_thread = threading.Thread(target=self.do_watch_folder,
+                                             args=(folder_path, output_path, self.watch_stop), daemon=True)
+        self.watch_thread.start()
+    
+    def do_watch_folder(self, folder_path, output_path, stop_event):
+        """Reempacotar a pasta a cada lote de mudanças (thread do modo observação)"""
+        from pyuepak.version import PakVersion
+        from pak_watch import PakWatcher
+        
+        def on_rebuild(stats, changed, deleted):
+            names = ", ".join(sorted(changed)[:3])
+            more = len(changed) - 3
+            self.log(f"🔁 {Path(output_path).name}: {stats.format()}"
+                     + (f" | {names}" if names else "") + (f" (+{more})" if more > 0 else ""))
+            self.root.after(0, lambda: self.status_var.set(f"PAK atualizado em {stats.seconds * 1000:.0f} ms"))
+            
+            self.root.after(0, lambda: self.reload_watched_pak(output_path))
+        
+        def on_error(error):
+            self.log(f"ERRO ao reempacotar (nova tentativa na próxima mudança): {str(error)}")
+        
+        try:
+            # Mesma versão do "Novo PAK" (pak.version = 9)
+            watcher = PakWatcher(folder_path, output_path, PakVersion.V8B)
+            watcher.run(cancel_event=stop_event, on_rebuild=on_rebuild, on_error=on_error)
+        except Exception as e:
+            message = str(e)
+            self.log(f"ERRO no modo observação: {message}")
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro no modo observação:\n{message}"))
+        finally:
+            self.root.after(0, lambda: self.finish_watch(stop_event))
+    
+    def reload_watched_pak(self, output_path):
+        """Recarregar o PAK aberto se ele for o gerado pela observação (sem perder alterações pendentes)"""
+        if not self.current_pak_path or os.path.abspath(output_path) != os.path.abspath(self.current_pak_path):
+            return
+        if self.added_files or self.modified_files or self.deleted_files:
+            self.log("⚠️ PAK observado atualizado no disco: alterações pendentes mantidas, recarregue manualmente")
+            return
+        self.reload_after_overwrite(output_path)
+    
+    def finish_watch(self, stop_event):
+        """Restaurar o botão quando a observação termina (parada ou erro)"""
+        if self.watch_stop is stop_event:
+            self.watch_stop = None
+            self.watch_button.config(text="👁️ Observar Pasta")
+    
+    def toggle_pak_server(self):
+        """Iniciar/parar o servidor HTTP local sobre o PAK aberto ou os paks montados"""
+        from pak_server import PakServer, SnapshotSource, MountedSource, DEFAULT_PORT
+        
+        if self.pak_server is not None:
+            self.pak_server.stop()
+            self.pak_server = None
+            self.server_button.config(text="🌐 Servidor HTTP")
+            self.log("🌐 Servidor HTTP encerrado")
+            self.status_var.set("Servidor HTTP encerrado")
+            return
+        
+        if not self.current_pak and not self.mounted_set:
+            messagebox.showinfo("Informação", "Abra um PAK ou monte uma pasta de paks antes de iniciar o servidor")
+            return
+        
+        use_mounted = bool(self.mounted_set)
+        if self.current_pak and self.mounted_set:
+            use_mounted = messagebox.askyesnocancel(
+                "Servidor HTTP",
+                "Servir os paks montados?\n\n"
+                "Sim: paks montados (ordem de prioridade)\n"
+                "Não: PAK aberto (com as alterações pendentes)"
+            )
+            if use_mounted is None:
+                return
+        
+        port = tk.simpledialog.askinteger("Servidor HTTP", "Porta (somente 127.0.0.1):",
+                                          initialvalue=DEFAULT_PORT, minvalue=0, maxvalue=65535,
+                                          parent=self.root)
+        if port is None:
+            return
+        
+        if use_mounted:
+            source = MountedSource(self.mounted_set)
+        else:
+            source = SnapshotSource(self.snapshot(), Path(self.current_pak_path).name)
+        
+        def on_request(method, path, status, sent):
+            if status >= 400:
+                self.log(f"🌐 {method} {path} -> {status}")
+        
+        server = PakServer(source, port=port, on_request=on_request)
+        try:
+            server.start()
+        except OSError as e:
+            source.close()
+            messagebox.showerror("Erro", f"Não foi possível iniciar o servidor na porta {port}:\n{str(e)}")
+            return
+        
+        self.pak_server = server
+        self.server_button.config(text="⏹️ Parar Servidor")
+        self.log(f"🌐 Servidor HTTP em {server.url} (lista: {server.url}files)")
+        self.status_var.set(f"Servindo em {server.url}")
+    
+    def search_content(self):
+        """Buscar texto dentro do conteúdo dos arquivos do PAK"""
+        if not self.current_pak:
+            messagebox.showinfo("Informação", "Nenhum arquivo .pak carregado")
+            return
+        
+        options = ContentSearchDialog(self.root).result
+        if not options:
+            return
+        
+        # Cancelar busca anterior ainda em andamento
+        if self.search_job:
+            self.scheduler.cancel(self.search_job)
+        
+        # Limpar árvore e criar pasta de resultados
+        for item in self.files_tree.get_children():
+            self.files_tree.delete(item)
+        self.tree_dir_items = {}
+        self.tree_dir_paths = {}
+        self.tree_pending = set()
+        self.search_results_node = self.files_tree.insert(
+            "", tk.END, text=f"Resultados para \"{options['pattern']}\" (buscando...)",
+            values=("Pasta", "", ""), open=True
+        )
+        self.search_results_count = 0
+        
+        self.status_var.set(f"Buscando conteúdo: {options['pattern']}...")
+        self.log(f"🔎 Busca de conteúdo: \"{options['pattern']}\" em {' '.join(sorted(options['extensions'])) or 'todas as extensões'}")
+        
+        # Buscar em segundo plano
+        snapshot = self.snapshot()
+        self.search_job = self.submit_job(f"Buscar \"{options['pattern']}\"",
+                                          lambda job: self.do_search_content(options, snapshot, job),
+                                          priority=PRIORITY_BULK, snapshot=snapshot)
+    
+    def do_search_content(self, options, snapshot, job):
+        """Buscar conteúdo (executado em segundo plano)"""
+        try:
+            # Arquivos alterados em memória têm prioridade sobre o pak
+            all_files = snapshot.all_files()
+            
+            index = None
+            if options["use_index"] and snapshot.pak_path:
+                fingerprint = get_pak_fingerprint(snapshot.pak_path)
+                index = NgramIndex.load(fingerprint) or NgramIndex(fingerprint)
+            indexed_before = len(index.filters) if index else 0
+            
+            def on_match(match):
+                job.report(done=search.scanned + search.skipped, total=search.candidates)
+                self.root.after(0, lambda: self.add_search_result(match, job))
+            
+            search = ContentSearch(snapshot.read, head_func=snapshot.entry_reader.read_head)
+            matches = search.search(
+                sorted(all_files),
+                options["pattern"],
+                extensions=options["extensions"],
+                case_sensitive=options["case_sensitive"],
+                index=index,
+                volatile_paths=set(snapshot.added_files) | set(snapshot.modified_files),
+                on_match=on_match,
+                cancel_event=job.token
+            )
+            job.report(done=search.scanned + search.skipped, total=search.candidates)
+            
+            if index and len(index.filters) != indexed_before:
+                index.save()
+                self.log(f"Índice de busca atualizado: {len(index.filters)} arquivos indexados")
+            
+            cancelled = job.token.cancelled
+            summary = (f"{len(matches)} arquivo(s) encontrados | {search.candidates} candidatos, "
+                       f"{search.scanned} varridos, {search.skipped} incompressíveis ignorados, {search.errors} erros")
+            self.root.after(0, lambda: self.finish_search_content(options["pattern"], summary, cancelled, job))
+            
+        except Exception as e:
+            message = str(e)
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro na busca de conteúdo:\n{message}"))
+            self.root.after(0, lambda: self.status_var.set("Erro na busca de conteúdo"))
+            self.log(f"ERRO: {message}")
+        finally:
+            snapshot.close()
+    
+    def add_search_result(self, match, job):
+        """Adicionar resultado da busca à árvore assim que encontrado"""
+        # Ignorar resultados de uma busca que já foi substituída
+        if job is not self.search_job or not self.files_tree.exists(self.search_results_node):
+            return
+        
+        ext = self.entry_table.get_extension(match.file_path) or "sem extensão"
+        status = self.get_file_status(match.file_path)
+        self.files_tree.insert(self.search_results_node, tk.END, text=match.file_path,
+                               values=(ext, f"{match.count}x", status), tags=(match.file_path,))
+        self.search_results_count += 1
+        self.status_var.set(f"Buscando conteúdo... {self.search_results_count} arquivo(s) encontrados")
+    
+    def finish_search_content(self, pattern, summary, cancelled, job):
+        """Finalizar busca de conteúdo"""
+        if job is not self.search_job:
+            return
+        
+        if self.files_tree.exists(self.search_results_node):
+            self.files_tree.item(self.search_results_node,
+                                 text=f"Resultados para \"{pattern}\" ({self.search_results_count} arquivos)")
+        
+        self.status_var.set(("Busca cancelada: " if cancelled else "Busca concluída: ") + summary)
+        self.log(f"✓ Busca de conteúdo {'cancelada' if cancelled else 'concluída'}: {summary}")
+    
+    def add_lazy_tab(self, text, builder):
+        """Adicionar uma aba vazia cujo conteúdo é criado por builder(frame) quando aberta"""
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text=text)
+        self.lazy_tabs[str(frame)] = (frame, builder)
+        return frame
+
+    def build_tab(self, tab):
+        """Criar o conteúdo da aba se ainda não foi criado"""
+        pending = self.lazy_tabs.pop(str(tab), None)
+        if pending:
+            frame, builder = pending
+            builder(frame)
+
+    def create_mount_tab(self, mount_frame):
+        """Criar aba de paks montados (sistema de arquivos virtual)"""
+        mount_frame.columnconfigure(0, weight=1)
+        mount_frame.rowconfigure(1, weight=1)
+        mount_frame.rowconfigure(3, weight=2)
+
+        # Barra de ferramentas
+        toolbar = ttk.Frame(mount_frame)
+        toolbar.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        toolbar.columnconfigure(1, weight=1)
+
+        ttk.Button(toolbar, text="🗂️ Montar Pasta", command=self.mount_pak_folder).grid(row=0, column=0, padx=(0, 10))
+        self.mount_label = ttk.Label(toolbar, text="Nenhum pak montado", foreground="#888888")
+        self.mount_label.grid(row=0, column=1, sticky=tk.W)
+        ttk.Button(toolbar, text="💾 Exportar Índice", command=self.export_mount_index).grid(row=0, column=2, padx=5)
+        ttk.Button(toolbar, text="📦 Mesclar em um PAK", command=self.merge_mounted_paks).grid(row=0, column=3, padx=5)
+
+        # Paks montados em ordem de prioridade
+        self.mount_tree = ttk.Treeview(mount_frame, columns=("order", "files", "winning", "overridden"), show="tree headings", height=8)
+        self.mount_tree.heading("#0", text="Pak (maior prioridade primeiro)")
+        self.mount_tree.heading("order", text="Prioridade")
+        self.mount_tree.heading("files", text="Arquivos")
+        self.mount_tree.heading("winning", text="Efetivos")
+        self.mount_tree.heading("overridden", text="Sobrescritos")
+        self.mount_tree.column("#0", width=400)
+        for column in ("order", "files", "winning", "overridden"):
+            self.mount_tree.column(column, width=100)
+        self.mount_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        # Resolução de caminhos
+        resolve_frame = ttk.Frame(mount_frame)
+        resolve_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=10)
+        resolve_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(resolve_frame, text="🔍 Resolver caminho:").grid(row=0, column=0, padx=(0, 10))
+        self.mount_search_var = tk.StringVar()
+        self.mount_search_var.trace('w', self.filter_mount_view)
+        ttk.Entry(resolve_frame, textvariable=self.mount_search_var).grid(row=0, column=1, sticky=(tk.W, tk.E))
+
+        resolved_frame = ttk.Frame(mount_frame)
+        resolved_frame.grid(row=3, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        resolved_frame.columnconfigure(0, weight=1)
+        resolved_frame.rowconfigure(0, weight=1)
+
+        self.resolved_tree = ttk.Treeview(resolved_frame, columns=("pak", "overrides"), show="tree headings")
+        self.resolved_tree.heading("#0", text="Caminho virtual")
+        self.resolved_tree.heading("pak", text="Fornecido por")
+        self.resolved_tree.heading("overrides", text="Sobrescreve")
+        self.resolved_tree.column("#0", width=500)
+        self.resolved_tree.column("pak", width=220)
+        self.resolved_tree.column("overrides", width=220)
+
+        scrollbar = ttk.Scrollbar(resolved_frame, orient=tk.VERTICAL, command=self.resolved_tree.yview)
+        self.resolved_tree.configure(yscrollcommand=scrollbar.set)
+        self.resolved_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+    def mount_pak_folder(self):
+        """Montar todos os .pak de uma pasta como um sistema de arquivos virtual"""
+        folder_path = filedialog.askdirectory(title="Selecione a pasta com os arquivos .pak")
+
+        if not folder_path:
+            return
+
+        self.status_var.set("Montando paks...")
+        self.log(f"Montando paks da pasta: {folder_path}")
+
+        # Montar em segundo plano
+        self.scheduler.submit(f"Montar {Path(folder_path).name}",
+                              lambda job: self.do_mount_folder(folder_path, job),
+                              priority=PRIORITY_NORMAL)
+
+    def do_mount_folder(self, folder_path, job=None):
+        """Montar paks (executado em segundo plano)"""
+        from pak_mount import MountedPakSet
+        
+        try:
+            mounted_set = MountedPakSet()
+
+            def on_progress(index, total, name):
+                if job:
+                    job.token.raise_if_cancelled()
+                    job.report(done=index, total=total, message=name)
+                self.root.after(0, lambda i=index, n=name: self.status_var.set(f"Montando {i + 1}/{total}: {n}"))
+
+            mounted_set.mount_directory(folder_path, progress_callback=on_progress, get_key=self.get_mount_key)
+
+            for pak_path, error in mounted_set.errors:
+                self.log(f"ERRO ao montar {pak_path}: {error}")
+
+            self.root.after(0, lambda: self.update_mount_view(mounted_set))
+
+        except JobCancelled:
+            self.root.after(0, lambda: self.status_var.set("Montagem cancelada"))
+            raise
+        except Exception as e:
+            message = str(e)
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao montar paks:\n{message}"))
+            self.root.after(0, lambda: self.status_var.set("Erro ao montar paks"))
+            self.log(f"ERRO: {message}")
+
+    def read_mount_crypto(self, pak_path):
+        """Informações de criptografia de um pak ou contêiner IoStore (None se ilegível)"""
+        from pak_iostore import is_iostore_path, read_toc_encryption_info
+        
+        try:
+            if is_iostore_path(pak_path):
+                return read_toc_encryption_info(pak_path)
+            return read_encryption_info(pak_path)
+        except Exception:
+            return None  # O erro aparece na montagem
+
+    def get_mount_key(self, pak_path):
+        """Chave salva para o GUID do pak montado (sem perguntar: roda em segundo plano)"""
+        crypto = self.read_mount_crypto(pak_path)
+        return self.key_store.get(crypto.guid) if crypto else None
+
+    def update_mount_view(self, mounted_set):
+        """Atualizar aba de montagem após montar os paks"""
+        self.mounted_set = mounted_set
+        self.build_tab(self.mount_frame)
+
+        for item in self.mount_tree.get_children():
+            self.mount_tree.delete(item)
+
+        for mounted in mounted_set.by_priority():
+            self.mount_tree.insert("", tk.END, text=mounted.name,
+                                   values=(mounted.order, len(mounted.files), mounted.winning_count, mounted.overridden_count))
+
+        self.mount_label.config(
+            text=f"{len(mounted_set.mounts)} paks | {mounted_set.count} arquivos efetivos | {len(mounted_set.overridden)} sobrescritos",
+            foreground="#2ecc71"
+        )
+        self.status_var.set(f"{len(mounted_set.mounts)} paks montados")
+        self.log(f"✓ {len(mounted_set.mounts)} paks montados: {mounted_set.count} arquivos efetivos, {len(mounted_set.overridden)} caminhos sobrescritos")
+
+        self.filter_mount_view()
+        self.notebook.select(self.mount_frame)
+
+    def filter_mount_view(self, *args):
+        """Mostrar quais paks fornecem os caminhos buscados"""
+        for item in self.resolved_tree.get_children():
+            self.resolved_tree.delete(item)
+
+        if not self.mounted_set:
+            return
+
+        search_term = self.mount_search_var.get().lower()
+        max_results = 5000
+
+        # Sem busca: mostrar apenas os caminhos com conflito
+        if search_term:
+            paths = (p for p in self.mounted_set.index if search_term in p.lower())
+        else:
+            paths = iter(self.mounted_set.overridden)
+
+        shown = 0
+        for virtual_path in paths:
+            mounted = self.mounted_set.index[virtual_path]
+            overrides = ", ".join(m.name for m in self.mounted_set.overridden.get(virtual_path, []))
+            self.resolved_tree.insert("", tk.END, text=virtual_path, values=(mounted.name, overrides))
+            shown += 1
+            if shown >= max_results:
+                self.resolved_tree.insert("", tk.END, text=f"... (mostrando os primeiros {max_results})", values=("", ""))
+                break
+
+    def export_mount_index(self):
+        """Exportar índice mesclado dos paks montados"""
+        if not self.mounted_set:
+            messagebox.showinfo("Informação", "Nenhum pak montado")
+            return
+
+        output_path = filedialog.asksaveasfilename(
+            title="Exportar índice mesclado",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("All files", "*.*")]
+        )
+
+        if not output_path:
+            return
+
+        try:
+            self.mounted_set.export_index(output_path)
+            self.log(f"✓ Índice mesclado exportado: {output_path}")
+            messagebox.showinfo("Sucesso", f"Índice exportado:\n{output_path}")
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao exportar índice:\n{str(e)}")
+
+    def merge_mounted_paks(self):
+        """Gravar os arquivos efetivos dos paks montados em um único PAK"""
+        from pak_io import get_pak_entries
+        
+        if not self.mounted_set or not self.mounted_set.mounts:
+            messagebox.showinfo("Informação", "Nenhum pak montado")
+            return
+
+        output_path = filedialog.asksaveasfilename(
+            title="Salvar PAK mesclado como",
+            defaultextension=".pak",
+            initialfile="Merged_P.pak",
+            filetypes=[("PAK files", "*.pak"), ("All files", "*.*")]
+        )
+        if not output_path:
+            return
+
+        backup = self.ask_backup(output_path)
+        if backup is None:
+            return
+
+        # Entradas criptografadas só são copiadas sem decriptar se o resultado usar a mesma chave
+        encrypted = [mounted for mounted in self.mounted_set.by_priority() if mounted.pak.key != ZERO_KEY]
+        key = encrypted[0].pak.key if encrypted else None
+        encrypt = bool(encrypted) and messagebox.askyesno(
+            "Criptografia",
+            "Há paks criptografados entre os montados.\n\n"
+            f"Criptografar o PAK mesclado com a chave de {encrypted[0].name}?"
+        )
+        options = dict(key=key if encrypt else None, encrypt=encrypt, backup=backup)
+        if encrypt:
+            crypto = self.read_mount_crypto(encrypted[0].path)
+            options["guid"] = bytes.fromhex(crypto.guid if crypto else DEFAULT_GUID)
+
+        mounted_set = self.mounted_set
+        self.log(f"📦 Mesclando {len(mounted_set.mounts)} paks -> {Path(output_path).name}")
+        entries = {mounted.mount_index: get_pak_entries(mounted.pak) for mounted in mounted_set.mounts}
+        total_bytes = 0
+        for virtual_path, mounted in mounted_set.index.items():
+            entry = entries[mounted.mount_index].get(mounted.files[virtual_path])
+            total_bytes += entry.size if entry is not None else 0
+        progress = self.start_progress("Mesclando...", total_files=mounted_set.count, total_bytes=total_bytes)
+        progress.job = self.submit_job(f"Mesclar em {Path(output_path).name}",
+                                       lambda job: self.do_merge(mounted_set, output_path, options, job, progress),
+                                       priority=PRIORITY_NORMAL, critical=True, progress=progress)
+
+    def do_merge(self, mounted_set, output_path, options, job=None, progress=None):
+        """Mesclar paks montados (executado em segundo plano)"""
+        from pak_merge import merge_paks
+
+        try:
+            stats = merge_paks(mounted_set, output_path, cancel_event=job.token if job else None,
+                               on_progress=progress.add if progress else None, **options)
+            if stats is None:
+                self.root.after(0, lambda: self.status_var.set("Mesclagem cancelada"))
+                self.log(f"⏹️ Mesclagem cancelada: {output_path}")
+                return
+
+            self.log(f"✓ PAK mesclado: {output_path}")
+            self.log(f"   {stats.format()}")
+            self.root.after(0, lambda: self.status_var.set(f"PAK mesclado: {stats.format()}"))
+
+            # O PAK aberto foi sobrescrito: recarregar o índice
+            if self.current_pak_path and os.path.abspath(output_path) == os.path.abspath(self.current_pak_path):
+                self.root.after(0, lambda: self.reload_after_overwrite(output_path))
+        except Exception as e:
+            message = str(e)
+            self.root.after(0, lambda: messagebox.showerror("Erro", f"Erro ao mesclar paks:\n{message}"))
+            self.root.after(0, lambda: self.status_var.set("Erro ao mesclar paks"))
+            self.log(f"ERRO: {message}")
+        finally:
+            if progress:
+                progress.finish()
+
+    def create_jobs_tab(self, jobs_frame):
+        """Criar aba de tarefas em segundo plano"""
+        jobs_frame.columnconfigure(0, weight=1)
+        jobs_frame.rowconfigure(1, weight=1)
+
+        toolbar = ttk.Frame(jobs_frame)
+        toolbar.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+
+        ttk.Button(toolbar, text="⏹️ Cancelar", command=self.cancel_selected_jobs).grid(row=0, column=0, padx=(0, 5))
+        ttk.Button(toolbar, text="🧹 Limpar Concluídas", command=self.clear_finished_jobs).grid(row=0, column=1, padx=5)
+
+        tree_frame = ttk.Frame(jobs_frame)
+        tree_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        tree_frame.columnconfigure(0, weight=1)
+        tree_frame.rowconfigure(0, weight=1)
+
+        self.jobs_tree = ttk.Treeview(tree_frame, columns=("state", "progress", "speed", "elapsed"), show="tree headings")
+        self.jobs_tree.heading("#0", text="Tarefa")
+        self.jobs_tree.heading("state", text="Estado")
+        self.jobs_tree.heading("progress", text="Progresso")
+        self.jobs_tree.heading("speed", text="Velocidade")
+        self.jobs_tree.heading("elapsed", text="Tempo")
+        self.jobs_tree.column("#0", width=350)
+        self.jobs_tree.column("state", width=100)
+        self.jobs_tree.column("progress", width=150)
+        self.jobs_tree.column("speed", width=200)
+        self.jobs_tree.column("elapsed", width=80)
+
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.jobs_tree.yview)
+        self.jobs_tree.configure(yscrollcommand=scrollbar.set)
+        self.jobs_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+    def refresh_jobs_view(self):
+        """Atualizar a aba de tarefas (a cada 500 ms)"""
+        if str(self.jobs_frame) in self.lazy_tabs:
+            # Aba ainda não aberta: nada para desenhar
+            self.root.after(500, self.refresh_jobs_view)
+            return
+        
+        existing = set(self.jobs_tree.get_children())
+
+        for job in list(self.scheduler.jobs):
+            item_id = f"job{job.id}"
+            existing.discard(item_id)
+
+            if job.total:
+                progress = f"{job.done}/{job.total} ({job.done * 100 // job.total}%)"
+            elif job.done:
+                progress = f"{job.done}"
+            else:
+                progress = job.message
+
+            if job.state == STATE_QUEUED or not job.elapsed:
+                speed = ""
+            else:
+                speed = f"{job.items_per_second:.0f} arq/s | {job.bytes_per_second / (1024 * 1024):.1f} MB/s"
+
+            values = (job.state, progress, speed, f"{job.elapsed:.1f}s")
+            if self.jobs_tree.exists(item_id):
+                self.jobs_tree.item(item_id, values=values)
+            else:
+                self.jobs_tree.insert("", tk.END, iid=item_id, text=job.name, values=values)
+
+        # Tarefas removidas por "Limpar Concluídas"
+        for item_id in existing:
+            self.jobs_tree.delete(item_id)
+
+        self.root.after(500, self.refresh_jobs_view)
+
+    def cancel_selected_jobs(self):
+        """Cancelar as tarefas selecionadas"""
+        selected = set(self.jobs_tree.selection())
+        for job in self.scheduler.active_jobs():
+            if f"job{job.id}" in selected:
+                self.scheduler.cancel(job)
+                self.log(f"⏹️ Cancelamento solicitado: {job.name}")
+
+    def clear_finished_jobs(self):
+        """Remover tarefas concluídas da lista"""
+        self.scheduler.clear_finished()
+
+    def measure_startup(self, imports_done, window_done, exit_after=False):
+        """Registrar a primeira pintura da janela (depois dos redesenhos pendentes)"""
+        self.root.after(0, lambda: self.root.after_idle(
+            lambda: self.on_first_paint(imports_done, window_done, exit_after)))
+
+    def on_first_paint(self, imports_done, window_done, exit_after):
+        """Informar os tempos de inicialização e carregar os módulos pesados em segundo plano"""
+        painted = time.perf_counter()
+        summary = (f"⏱️ Inicialização: módulos {(imports_done - STARTUP_START) * 1000:.0f} ms | "
+                   f"interface {(window_done - imports_done) * 1000:.0f} ms | "
+                   f"primeira pintura {(painted - STARTUP_START) * 1000:.0f} ms")
+        self.log(summary)
+
+        if exit_after:
+            print(summary)
+            print(self.preload_heavy_modules())
+            self.root.destroy()
+            return
+
+        threading.Thread(target=lambda: self.log(self.preload_heavy_modules()), daemon=True).start()
+
+    def preload_heavy_modules(self):
+        """Importar pyuepak/cryptography antes do primeiro uso; devolve a linha para o log"""
+        start = time.perf_counter()
+        try:
+            preload_modules()
+        except ImportError as e:
+            return f"⚠️ Dependência ausente: {str(e)}"
+        return f"📦 Módulos de leitura carregados em segundo plano: {(time.perf_counter() - start) * 1000:.0f} ms"
+
+    def on_close(self):
+        """Fechar aplicação sem interromper gravações em andamento"""
+        writing = [job for job in self.scheduler.active_jobs() if job.critical]
+
+        if writing:
+            result = messagebox.askyesno(
+                "Gravação em andamento",
+                f"{len(writing)} gravação(ões) de PAK em andamento.\n\n"
+                "A janela será fechada assim que terminarem. Continuar?"
+            )
+            if not result:
+                return
+
+        # Tarefas de leitura podem ser interrompidas; gravações terminam normalmente
+        self.scheduler.cancel_all(include_critical=False)
+        if self.watch_stop is not None:
+            self.watch_stop.set()
+        if self.pak_server is not None:
+            self.pak_server.stop()
+            self.pak_server = None
+        self.status_var.set("Aguardando gravações em andamento...")
+        self.wait_writes_and_close()
+
+    def wait_writes_and_close(self):
+        """Fechar a janela quando não houver mais gravações"""
+        # O modo observação descarta o pak temporário ao ser interrompido; só é preciso esperar a thread
+        watching = self.watch_thread is not None and self.watch_thread.is_alive()
+        if watching or any(job.critical for job in self.scheduler.active_jobs()):
+            self.root.after(200, self.wait_writes_and_close)
+            return
+
+        self.scheduler.shutdown(wait=False)
+        self.root.destroy()
 
 
 def main():
+    imports_done = time.perf_counter()
     root = tk.Tk()
     app = PakToolGUI(root)
+    # --startup-report: imprimir os tempos de inicialização e fechar (medir o executável)
+    app.measure_startup(imports_done, time.perf_counter(), exit_after="--startup-report" in sys.argv)
     root.mainloop()
 
 
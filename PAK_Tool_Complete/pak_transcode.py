@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Conversão direta de pak para pak (versão, compressão e criptografia)
+Cada entrada passa por ler -> descomprimir -> recomprimir em paralelo e é gravada em fluxo,
+sem extrair nada para o disco; só um número limitado de entradas fica na memória
+"""
+
+from pathlib import Path
+import time
+
+from pyuepak import PakFile
+from pyuepak.utils import COMPRESSION
+from pyuepak.version import PakVersion
+
+from pak_io import PakEntryReader, get_pak_mount_point, get_pak_version, parallel_map, DEFAULT_WORKERS
+from pak_iostore import IoStoreFile, is_iostore_path
+from pak_profiling import profiler, CATEGORY_COMPRESS
+from pak_writer import PakWriter, compress_entry, DEFAULT_BLOCK_SIZE
+
+
+# Manter o método de compressão de cada entrada de origem
+KEEP_COMPRESSION = None
+
+COMPRESSION_CHOICES = {
+    "manter": KEEP_COMPRESSION,
+    "nenhuma": COMPRESSION.NONE,
+    "zlib": COMPRESSION.ZLIB,
+    "gzip": COMPRESSION.GZIP,
+    "oodle": COMPRESSION.OODLE,
+}
+
+
+class TranscodeStats:
+    """Totais da conversão"""
+    def __init__(self):
+        self.files = 0
+        self.bytes_in = 0  # Conteúdo descomprimido processado
+        self.bytes_out = 0  # Bytes gravados no novo pak (dados comprimidos)
+        self.compressed_files = 0
+        self.seconds = 0.0
+
+    @property
+    def mb_per_second(self):
+        return self.bytes_in / (1024 * 1024) / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def ratio(self):
+        return self.bytes_out / self.bytes_in if self.bytes_in else 1.0
+
+    def format(self):
+        return (f"{self.files} arquivos | {self.bytes_in / (1024 * 1024):.1f} MB -> "
+                f"{self.bytes_out / (1024 * 1024):.1f} MB ({self.ratio * 100:.0f}%) | "
+                f"{self.seconds:.1f}s | {self.mb_per_second:.1f} MB/s")
+
+
+def open_source(source_path, key=None):
+    """Abrir o pak (ou contêiner IoStore) de origem"""
+    pak = IoStoreFile() if is_iostore_path(source_path) else PakFile()
+    if key:
+        pak.set_key(key)
+    pak.read(str(source_path))
+    return pak
+
+
+def transcode_pak(source, output_path, version=None, compression=KEEP_COMPRESSION,
+                  block_size=DEFAULT_BLOCK_SIZE, key=None, encrypt=False, encrypt_index=None,
+                  guid=None, source_path=None, workers=None, cancel_event=None,
+                  on_progress=None, backup=False):
+    """Converter um pak em outro sem passar pelo disco
+
+    source: caminho do pak de origem ou um PakFile/IoStoreFile já aberto (com source_path).
+    version: versão do novo pak (None = a mesma da origem).
+    compression: COMPRESSION.* ou KEEP_COMPRESSION para manter a de cada entrada.
+    on_progress(arquivos, bytes) é chamado na thread da conversão a cada entrada gravada.
+    """
+    if isinstance(source, (str, Path)):
+        source_path = str(source)
+        pak = open_source(source_path, key)
+    else:
+        pak = source
+
+    version = PakVersion(version or get_pak_version(pak))
+    reader = PakEntryReader(pak, source_path)
+    entries = reader.entries
+    stats = TranscodeStats()
+    start = time.perf_counter()
+
+    writer = PakWriter(output_path, version, get_pak_mount_point(pak), key=key, encrypt=encrypt,
+                       encrypt_index=encrypt_index, guid=guid, backup=backup)
+    try:
+        def target_compression(file_path):
+            if compression is not KEEP_COMPRESSION:
+                return compression
+            entry = entries.get(file_path)
+            return entry.compression if entry is not None else COMPRESSION.NONE
+
+        if compression is not KEEP_COMPRESSION:
+            writer.check_compression(compression)
+
+        def prepare(file_path):
+            # Executado nos workers: ler, descomprimir e recomprimir
+            data = reader.read(file_path)
+            method = target_compression(file_path)
+            if method == COMPRESSION.NONE:
+                return len(data), data, None
+            writer.check_compression(method)
+            with profiler.span("recompress", CATEGORY_COMPRESS):
+                payload = compress_entry(data, method, block_size)
+            # Com o bloco comprimido pronto o conteúdo original não precisa mais ficar na memória
+            return len(data), (data if payload is None else None), payload
+
+        for file_path, result, error in parallel_map(prepare, sorted(pak.list_files()),
+                                                     workers or DEFAULT_WORKERS, cancel_event):
+            if error is not None:
+                raise RuntimeError(f"{file_path}: {error}") from error
+
+            size, data, payload = result
+            if payload is not None:
+                record = writer.add_payload(file_path, payload)
+                stats.compressed_files += 1
+            else:
+                record = writer.add_file(file_path, data)
+
+            stats.files += 1
+            stats.bytes_in += size
+            stats.bytes_out += record.compressed_size
+            if on_progress:
+                on_progress(1, size)
+
+        # Liberar a origem antes do rename (no Windows não é possível substituir um arquivo aberto)
+        reader.close()
+
+        # Cancelado: parallel_map para de enviar entradas, o destino não é alterado
+        if cancel_event is not None and cancel_event.is_set():
+            writer.discard()
+            return None
+
+        writer.close()
+    except BaseException:
+        writer.discard()
+        raise
+    finally:
+        reader.close()
+
+    stats.seconds = time.perf_counter() - start
+    return stats
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Árvore de diretórios dos arquivos de um .pak
+Trie compacta com contagem e tamanho agregados por pasta
+"""
+
+import sys
+
+
+def split_path(file_path):
+    """Separar 'Content/Maps/A.umap' em (['Content', 'Maps'], 'A.umap')"""
+    parts = [part for part in file_path.replace("\\", "/").split("/") if part]
+    if not parts:
+        return [], file_path
+    return parts[:-1], parts[-1]
+
+
+def format_size(size):
+    """Tamanho legível (B, KB, MB, GB)"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+
+class DirectoryNode:
+    """Pasta da árvore: subpastas, arquivos diretos e totais da subárvore"""
+    __slots__ = ("name", "parent", "children", "files", "file_count", "total_size")
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.children = {}  # nome -> DirectoryNode
+        self.files = {}  # nome -> (caminho completo, tamanho)
+        self.file_count = 0  # Arquivos na subárvore inteira
+        self.total_size = 0
+
+    @property
+    def path(self):
+        """Caminho da pasta ('' para a raiz)"""
+        names = []
+        node = self
+        while node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return "/".join(reversed(names))
+
+    def sorted_children(self):
+        return [self.children[name] for name in sorted(self.children, key=str.lower)]
+
+    def sorted_files(self):
+        return [self.files[name] for name in sorted(self.files, key=str.lower)]
+
+
+class DirectoryTree:
+    """Trie de pastas construída uma vez a partir da lista de arquivos"""
+    def __init__(self):
+        self.root = DirectoryNode("")
+
+    @classmethod
+    def build(cls, file_sizes):
+        """Criar a árvore a partir de pares (caminho, tamanho)"""
+        tree = cls()
+        for file_path, size in file_sizes:
+            tree.add_file(file_path, size)
+        return tree
+
+    @property
+    def file_count(self):
+        return self.root.file_count
+
+    def _walk(self, folders, create=False):
+        node = self.root
+        for name in folders:
+            child = node.children.get(name)
+            if child is None:
+                if not create:
+                    return None
+                # Nomes de pasta se repetem muito: internar economiza memória
+                child = DirectoryNode(sys.intern(name), node)
+                node.children[child.name] = child
+            node = child
+        return node
+
+    def _propagate(self, node, count, size):
+        while node is not None:
+            node.file_count += count
+            node.total_size += size
+            node = node.parent
+
+    def add_file(self, file_path, size=0):
+        """Incluir (ou atualizar) um arquivo"""
+        folders, name = split_path(file_path)
+        node = self._walk(folders, create=True)
+        previous = node.files.get(name)
+        node.files[name] = (file_path, size)
+        if previous is None:
+            self._propagate(node, 1, size)
+        else:
+            self._propagate(node, 0, size - previous[1])
+
+    def remove_file(self, file_path):
+        """Remover um arquivo (pastas vazias também saem)"""
+        folders, name = split_path(file_path)
+        node = self._walk(folders)
+        if node is None or name not in node.files:
+            return False
+        _, size = node.files.pop(name)
+        self._propagate(node, -1, -size)
+        self._prune(node)
+        return True
+
+    def _prune(self, node):
+        while node.parent is not None and node.file_count == 0:
+            del node.parent.children[node.name]
+            node = node.parent
+
+    def find(self, dir_path):
+        """Pasta pelo caminho (None se não existir)"""
+        folders = [part for part in dir_path.replace("\\", "/").split("/") if part]
+        return self._walk(folders)
+
+    def iter_files(self, node=None):
+        """Caminhos completos de todos os arquivos da subárvore"""
+        stack = [node or self.root]
+        while stack:
+            current = stack.pop()
+            for file_path, _ in current.files.values():
+                yield file_path
+            stack.extend(current.children.values())
+
+    def remove_subtree(self, dir_path):
+        """Remover uma pasta inteira e devolver os caminhos dos arquivos removidos"""
+        node = self.find(dir_path)
+        if node is None:
+            return []
+        removed = list(self.iter_files(node))
+        if node.parent is None:
+            self.root = DirectoryNode("")
+            return removed
+
+        # Só os ancestrais precisam ser ajustados, não cada arquivo
+        parent = node.parent
+        del parent.children[node.name]
+        self._propagate(parent, -node.file_count, -node.total_size)
+        self._prune(parent)
+        return removed
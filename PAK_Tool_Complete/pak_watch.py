@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Modo observação: reempacota uma pasta sempre que os arquivos mudam
+A pasta é varrida periodicamente (só stat, sem ler conteúdo) e as mudanças são agrupadas
+até ficarem estáveis pelo intervalo de debounce. Em cada lote só as entradas alteradas são
+lidas do disco; as demais são copiadas como estão do pak gerado na rodada anterior.
+
+Uso:
+    python pak_watch.py PastaDoMod -o Mod_P.pak [--mount-point ../../../Jogo/Content/]
+"""
+
+from pathlib import Path
+import argparse
+import os
+import sys
+import threading
+import time
+
+from pyuepak.utils import COMPRESSION
+from pyuepak.version import PakVersion
+
+from pak_io import parallel_map, COPY_CHUNK_SIZE, DEFAULT_WORKERS
+from pak_profiling import profiler, CATEGORY_COMPRESS
+from pak_writer import PakWriter, RawEntry, compress_entry, header_size, DEFAULT_BLOCK_SIZE
+
+
+ROOT_MOUNT_POINT = "../../../"
+
+# Varredura a cada 250 ms; o lote é gravado depois de 300 ms sem novas mudanças
+POLL_INTERVAL = 0.25
+DEBOUNCE_SECONDS = 0.3
+
+# Arquivos temporários de editores que não entram no pak
+IGNORED_SUFFIXES = ("~", ".tmp", ".swp", ".swx", ".part", ".bak")
+
+
+def is_ignored(name):
+    """Arquivos ocultos e temporários de editores"""
+    return name.startswith(".") or name.lower().endswith(IGNORED_SUFFIXES)
+
+
+def scan_folder(folder, exclude=()):
+    """Estado da pasta: caminho relativo -> (tamanho, mtime em ns), só com stat"""
+    folder = os.path.abspath(folder)
+    exclude = {os.path.abspath(path) for path in exclude}
+    state = {}
+    pending = [folder]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue  # Pasta removida durante a varredura
+        for entry in entries:
+            if is_ignored(entry.name) or entry.path in exclude:
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    relative = os.path.relpath(entry.path, folder).replace(os.sep, "/")
+                    state[relative] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                continue  # Arquivo removido durante a varredura
+    return state
+
+
+def diff_states(old, new):
+    """Caminhos novos ou alterados e caminhos removidos entre duas varreduras"""
+    changed = {path for path, stat in new.items() if old.get(path) != stat}
+    deleted = set(old) - set(new)
+    return changed, deleted
+
+
+class RepackStats:
+    """Resultado de uma rodada de reempacotamento"""
+    def __init__(self):
+        self.files = 0
+        self.rebuilt = 0  # Lidas da pasta (novas ou alteradas)
+        self.copied = 0  # Copiadas do pak anterior
+        self.deleted = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+
+    def format(self):
+        return (f"{self.files} arquivos ({self.rebuilt} atualizados, {self.copied} copiados, "
+                f"{self.deleted} removidos) | {self.bytes_written / (1024 * 1024):.1f} MB | "
+                f"{self.seconds * 1000:.0f} ms")
+
+
+class PakWatcher:
+    """Mantém um pak sincronizado com uma pasta
+
+    O primeiro build grava tudo; os seguintes usam os registros do build anterior
+    (posição e blocos de cada entrada) para copiar o que não mudou sem descomprimir.
+    """
+    def __init__(self, folder, output_path, version=PakVersion.V11, mount_point=ROOT_MOUNT_POINT,
+                 compression=COMPRESSION.NONE, block_size=DEFAULT_BLOCK_SIZE, workers=None,
+                 poll_interval=POLL_INTERVAL, debounce=DEBOUNCE_SECONDS):
+        self.folder = os.path.abspath(folder)
+        self.output_path = os.path.abspath(output_path)
+        self.version = PakVersion(version)
+        self.mount_point = mount_point
+        self.compression = compression
+        self.block_size = block_size
+        self.workers = workers or DEFAULT_WORKERS
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+
+        self.state = {}  # Estado da pasta no último build
+        self.records = {}  # Caminho -> PakEntryRecord do último build
+        self._built = False
+
+    def scan(self):
+        # O pak de saída pode estar dentro da pasta observada
+        return scan_folder(self.folder, exclude=[self.output_path])
+
+    def _prepare(self, file_path):
+        # Executado nos workers: ler da pasta e comprimir
+        with open(os.path.join(self.folder, file_path), "rb") as f:
+            data = f.read()
+        if self.compression == COMPRESSION.NONE:
+            return data, None
+        with profiler.span("compress", CATEGORY_COMPRESS):
+            payload = compress_entry(data, self.compression, self.block_size)
+        return (data if payload is None else None), payload
+
+    def _raw_entry(self, record):
+        """Entrada do build anterior no formato de add_raw; devolve (RawEntry, posição dos dados)"""
+        data_offset = record.offset + header_size(self.version, record.compression, len(record.blocks))
+        # A partir da v5 os blocos contam do início da entrada; antes, do início do arquivo
+        base = data_offset - record.offset if self.version >= PakVersion.V5 else data_offset
+        blocks = [(start - base, end - base) for start, end in record.blocks]
+        return RawEntry(record.size, record.compressed_size, record.compression, record.block_size,
+                        blocks, record.encrypted, record.sha1), data_offset
+
+    def rebuild(self, state, changed=None, cancel_event=None):
+        """Gravar o pak para o estado dado; changed=None grava todos os arquivos
+
+        Devolve RepackStats ou None se cancelado (o pak anterior fica intacto).
+        """
+        start = time.perf_counter()
+        stats = RepackStats()
+        if changed is None or not self._built or not os.path.exists(self.output_path):
+            changed = set(state)
+        stats.deleted = len(set(self.state) - set(state))
+
+        previous = None
+        writer = PakWriter(self.output_path, self.version, self.mount_point)
+        try:
+            if self.compression != COMPRESSION.NONE:
+                writer.check_compression(self.compression)
+            copied = sorted(set(state) - changed, key=lambda path: self.records[path].offset)
+            if copied:
+                previous = open(self.output_path, "rb")
+
+            # Entradas inalteradas: bytes copiados na ordem em que estão no pak anterior
+            for file_path in copied:
+                raw, data_offset = self._raw_entry(self.records[file_path])
+                writer.add_raw(file_path, raw, self._iter_copy(previous, data_offset, raw.stored_size))
+                stats.copied += 1
+                stats.bytes_written += raw.stored_size
+
+            # Entradas novas ou alteradas: lidas (e comprimidas) em paralelo
+            for file_path, result, error in parallel_map(self._prepare, sorted(changed),
+                                                         self.workers, cancel_event):
+                if error is not None:
+                    raise RuntimeError(f"{file_path}: {error}") from error
+                data, payload = result
+                record = writer.add_payload(file_path, payload) if payload is not None \
+                    else writer.add_file(file_path, data)
+                stats.rebuilt += 1
+                stats.bytes_written += record.compressed_size
+
+            # Liberar o pak anterior antes do rename (no Windows não é possível substituir um arquivo aberto)
+            if previous is not None:
+                previous.close()
+
+            if cancel_event is not None and cancel_event.is_set():
+                writer.discard()
+                return None
+            writer.close()
+        except BaseException:
+            writer.discard()
+            raise
+        finally:
+            if previous is not None:
+                previous.close()
+
+        self.records = dict(writer.records)
+        self.state = state
+        self._built = True
+        stats.files = len(self.records)
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def _iter_copy(self, f, position, size):
+        f.seek(position)
+        while size > 0:
+            data = f.read(min(COPY_CHUNK_SIZE, size))
+            if not data:
+                raise IOError(f"Pak anterior truncado em {position}")
+            size -= len(data)
+            yield data
+
+    def wait_for_changes(self, cancel_event=None, baseline=None):
+        """Esperar mudanças em relação a baseline (padrão: o último build) e devolver o
+        estado estável (sem mudanças por debounce segundos); None se cancelado
+        """
+        baseline = self.state if baseline is None else baseline
+        state = self.scan()
+        while state == baseline:
+            if _wait(cancel_event, self.poll_interval):
+                return None
+            state = self.scan()
+
+        # Agrupar: editores e cópias costumam gerar várias mudanças seguidas
+        stable_since = time.monotonic()
+        while time.monotonic() - stable_since < self.debounce:
+            if _wait(cancel_event, min(self.poll_interval, self.debounce)):
+                return None
+            current = self.scan()
+            if current != state:
+                state = current
+                stable_since = time.monotonic()
+        return state
+
+    def run(self, cancel_event=None, on_rebuild=None, on_error=None):
+        """Build inicial e depois um rebuild a cada lote de mudanças, até cancelar
+
+        on_rebuild(stats, alterados, removidos) e on_error(exceção) são chamados nesta thread.
+        """
+        cancel_event = cancel_event or threading.Event()
+        state = self.scan()
+        changed, deleted = set(state), set()
+        while not cancel_event.is_set():
+            try:
+                stats = self.rebuild(state, changed if self._built else None, cancel_event)
+                if stats is not None and on_rebuild:
+                    on_rebuild(stats, changed, deleted)
+            except Exception as e:
+                # Arquivo travado, pak aberto no jogo etc.: tentar de novo na próxima mudança
+                if on_error:
+                    on_error(e)
+
+            # O lote seguinte inclui o que falhou: a diferença é sempre contra o último build
+            state = self.wait_for_changes(cancel_event, baseline=state)
+            if state is None:
+                break
+            changed, deleted = diff_states(self.state, state)
+            if not self._built:
+                changed = set(state)
+
+
+def _wait(cancel_event, seconds):
+    """Dormir até seconds; devolve True se cancelado"""
+    if cancel_event is None:
+        time.sleep(seconds)
+        return False
+    if hasattr(cancel_event, "wait"):
+        return cancel_event.wait(seconds) or cancel_event.is_set()
+    time.sleep(seconds)
+    return cancel_event.is_set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reempacotar uma pasta a cada mudança")
+    parser.add_argument("folder", help="Pasta observada")
+    parser.add_argument("-o", "--output", required=True, help="Pak gerado")
+    parser.add_argument("--mount-point", default=ROOT_MOUNT_POINT)
+    parser.add_argument("--version", choices=[version.name for version in PakVersion], default="V11")
+    parser.add_argument("--zlib", action="store_true", help="Comprimir as entradas com zlib")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Intervalo da varredura (s)")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                        help="Tempo sem mudanças antes de gravar (s)")
+    args = parser.parse_args(argv)
+
+    watcher = PakWatcher(args.folder, args.output, PakVersion[args.version], args.mount_point,
+                         COMPRESSION.ZLIB if args.zlib else COMPRESSION.NONE,
+                         poll_interval=args.interval, debounce=args.debounce)
+
+    def on_rebuild(stats, changed, deleted):
+        names = sorted(changed)[:3] + [f"-{path}" for path in sorted(deleted)[:3]]
+        more = len(changed) + len(deleted) - len(names)
+        print(f"[{time.strftime('%H:%M:%S')}] {stats.format()}  {', '.join(names)}"
+              + (f" (+{more})" if more > 0 else ""))
+
+    def on_error(error):
+        print(f"[{time.strftime('%H:%M:%S')}] ERRO: {error}", file=sys.stderr)
+
+    print(f"Observando {Path(args.folder)} -> {Path(args.output)} (Ctrl+C para sair)")
+    try:
+        watcher.run(on_rebuild=on_rebuild, on_error=on_error)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Gravação de arquivos .pak em fluxo (uma entrada por vez direto no disco)
+Suporta compressão em blocos, criptografia AES das entradas e do índice; gravação atômica via pak_io
+"""
+
+import gzip
+import hashlib
+import struct
+import zlib
+
+from pyuepak.file_io import Writer
+from pyuepak.index import generate_phi, generate_fdi
+from pyuepak.utils import COMPRESSION
+from pyuepak.version import PakVersion
+
+from pak_crypto import align, pad_blocks, encrypt_blocks, parse_key, ZERO_KEY
+from pak_io import AtomicFileWriter
+from pak_profiling import profiler, CATEGORY_WRITE
+
+
+PAK_MAGIC = 0x5A6F12E1
+UINT32_MAX = 0xFFFFFFFF
+
+# Ordem dos métodos no footer: índice 1 = Zlib, 2 = Gzip, 3 = Oodle (igual ao pyuepak)
+COMPRESSION_NAMES = {COMPRESSION.ZLIB: b"Zlib", COMPRESSION.GZIP: b"Gzip", COMPRESSION.OODLE: b"Oodle"}
+COMPRESSION_INDEX = {COMPRESSION.NONE: 0, COMPRESSION.ZLIB: 1, COMPRESSION.GZIP: 2, COMPRESSION.OODLE: 3}
+
+ENTRY_FLAG_ENCRYPTED = 0x01
+
+# Tamanho de bloco padrão do UnrealPak
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+# Oodle: compressor Kraken, nível Normal (padrão dos paks do UE)
+OODLE_KRAKEN = 8
+OODLE_LEVEL_NORMAL = 4
+
+
+class PakEntryRecord:
+    """Metadados de uma entrada já gravada"""
+    __slots__ = ("path", "offset", "size", "compressed_size", "compression",
+                 "blocks", "block_size", "encrypted", "sha1")
+
+    def __init__(self, path, offset, size, compressed_size, compression=COMPRESSION.NONE,
+                 blocks=(), block_size=0, encrypted=False, sha1=bytes(20)):
+        self.path = path
+        self.offset = offset
+        self.size = size
+        self.compressed_size = compressed_size
+        self.compression = compression
+        self.blocks = list(blocks)  # (início, fim) relativos ao início da entrada
+        self.block_size = block_size
+        self.encrypted = encrypted
+        self.sha1 = sha1
+
+
+def serialize_entry(record, version, in_data=False):
+    """Registro da entrada no formato FPakEntry (cabeçalho dos dados ou índice legado)"""
+    writer = Writer()
+    # Antes dos dados o UnrealPak grava offset 0
+    writer.uint64(0 if in_data else record.offset)
+    writer.uint64(record.compressed_size)
+    writer.uint64(record.size)
+
+    compression = COMPRESSION_INDEX[record.compression]
+    if version == PakVersion.V8A:
+        writer.uint8(compression)
+    else:
+        writer.uint32(compression)
+
+    if version == PakVersion.V1:
+        writer.uint64(0)  # timestamp
+
+    writer.write(record.sha1)
+
+    if version >= PakVersion.V3:
+        if record.compression != COMPRESSION.NONE:
+            writer.uint32(len(record.blocks))
+            for start, end in record.blocks:
+                writer.uint64(start)
+                writer.uint64(end)
+        writer.uint8(ENTRY_FLAG_ENCRYPTED if record.encrypted else 0)
+        writer.uint32(record.block_size)
+
+    return writer.getvalue()
+
+
+def header_size(version, compression, block_count):
+    """Tamanho do cabeçalho gravado antes dos dados"""
+    probe = PakEntryRecord("", 0, 0, 0, compression, [(0, 0)] * block_count)
+    return len(serialize_entry(probe, version, in_data=True))
+
+
+def serialize_encoded_entry(record):
+    """Registro compacto usado no índice das versões 10+"""
+    block_size_field = record.block_size >> 11
+    if (block_size_field << 11) != record.block_size or block_size_field >= 0x3F:
+        block_size_field = 0x3F
+
+    offset_32 = record.offset <= UINT32_MAX
+    size_32 = record.size <= UINT32_MAX
+    compressed_32 = record.compressed_size <= UINT32_MAX
+
+    flags = (block_size_field
+             | (len(record.blocks) << 6)
+             | (int(record.encrypted) << 22)
+             | (COMPRESSION_INDEX[record.compression] << 23)
+             | (int(compressed_32) << 29)
+             | (int(size_32) << 30)
+             | (int(offset_32) << 31))
+
+    data = bytearray(struct.pack("<I", flags))
+    if block_size_field == 0x3F:
+        data += struct.pack("<I", record.block_size)
+    data += struct.pack("<I" if offset_32 else "<Q", record.offset)
+    data += struct.pack("<I" if size_32 else "<Q", record.size)
+    if record.compression != COMPRESSION.NONE:
+        data += struct.pack("<I" if compressed_32 else "<Q", record.compressed_size)
+
+        # Um único bloco sem criptografia é implícito
+        if len(record.blocks) > 1 or record.encrypted:
+            for start, end in record.blocks:
+                data += struct.pack("<I", end - start)
+
+    return bytes(data)
+
+
+def compress_block(data, compression, level=None):
+    """Comprimir um bloco com o método do pak (level=None = nível padrão do método)"""
+    if compression == COMPRESSION.ZLIB:
+        return zlib.compress(data) if level is None else zlib.compress(data, level)
+    if compression == COMPRESSION.GZIP:
+        return gzip.compress(data) if level is None else gzip.compress(data, compresslevel=level)
+    if compression == COMPRESSION.OODLE:
+        from pyuepak.entry import oodle_comp
+        return oodle_comp.compress(data, OODLE_KRAKEN, OODLE_LEVEL_NORMAL if level is None else level)
+    raise ValueError(f"Compressão não suportada: {compression}")
+
+
+class CompressedPayload:
+    """Entrada já comprimida em blocos, pronta para o PakWriter"""
+    __slots__ = ("size", "compression", "block_size", "blocks")
+
+    def __init__(self, size, compression, block_size, blocks):
+        self.size = size
+        self.compression = compression
+        self.block_size = block_size
+        self.blocks = blocks  # Bytes comprimidos de cada bloco
+
+    @property
+    def compressed_size(self):
+        return sum(len(block) for block in self.blocks)
+
+
+def compress_entry(data, compression, block_size=DEFAULT_BLOCK_SIZE, level=None):
+    """Comprimir o conteúdo em blocos (seguro em qualquer thread)
+
+    Devolve None quando a compressão não reduz o tamanho: a entrada é gravada sem compressão,
+    como faz o UnrealPak.
+    """
+    if compression == COMPRESSION.NONE or not data:
+        return None
+
+    view = memoryview(data)
+    blocks = [compress_block(view[start:start + block_size], compression, level)
+              for start in range(0, len(data), block_size)]
+    payload = CompressedPayload(len(data), compression, min(block_size, len(data)), blocks)
+    if payload.compressed_size >= len(data):
+        return None
+    return payload
+
+
+class RawEntry:
+    """Entrada copiada de outro pak sem descomprimir nem decriptar"""
+    __slots__ = ("size", "compressed_size", "compression", "block_size", "blocks", "encrypted", "sha1")
+
+    def __init__(self, size, compressed_size, compression, block_size, blocks, encrypted, sha1):
+        self.size = size
+        self.compressed_size = compressed_size
+        self.compression = compression
+        self.block_size = block_size
+        self.blocks = blocks  # (início, fim) relativos ao início dos dados
+        self.encrypted = encrypted
+        self.sha1 = sha1 or bytes(20)
+
+    @property
+    def stored_size(self):
+        """Bytes gravados após o cabeçalho (criptografado = alinhado a 16)"""
+        return align(self.compressed_size) if self.encrypted else self.compressed_size
+
+
+class PakWriter:
+    """Grava um .pak entrada por entrada, sem manter o conteúdo na memória
+
+    Uso:
+        with PakWriter(caminho, version, mount_point, key=chave, encrypt=True) as writer:
+            writer.add_file("Content/A.uasset", dados)
+    """
+    def __init__(self, output_path, version=PakVersion.V11, mount_point="../../../",
+                 key=None, encrypt=False, encrypt_index=None, guid=None,
+                 path_hash_seed=0, backup=False):
+        self.output_path = output_path
+        self.version = PakVersion(version)
+        self.mount_point = mount_point
+        self.key = parse_key(key) if key else None
+        self.encrypt = encrypt
+        self.encrypt_index = encrypt if encrypt_index is None else encrypt_index
+        self.guid = guid or bytes(16)
+        self.path_hash_seed = path_hash_seed
+
+        if (self.encrypt or self.encrypt_index) and (self.key is None or self.key == ZERO_KEY):
+            raise ValueError("Chave AES necessária para criptografar")
+        if self.encrypt_index and self.version < PakVersion.V4:
+            raise ValueError("Índice criptografado exige pak versão 4 ou superior")
+
+        self.records = {}
+        self.backup_path = None
+        self._atomic = AtomicFileWriter(output_path, backup=backup)
+        self._file = self._atomic.open()
+        self._pos = 0
+
+    def _write(self, data):
+        self._file.write(data)
+        self._pos += len(data)
+
+    def check_compression(self, compression):
+        """Validar se a versão do pak aceita o método de compressão"""
+        if compression == COMPRESSION.NONE:
+            return
+        if self.version < PakVersion.V3:
+            raise ValueError("Compressão em blocos exige pak versão 3 ou superior")
+        if compression == COMPRESSION.OODLE and self.version < PakVersion.V8A:
+            raise ValueError("Oodle exige pak versão 8 ou superior")
+
+    def add_file(self, path, data, compression=COMPRESSION.NONE, block_size=DEFAULT_BLOCK_SIZE):
+        """Gravar uma entrada (substitui caminho repetido no índice)"""
+        if compression != COMPRESSION.NONE:
+            self.check_compression(compression)
+            payload = compress_entry(data, compression, block_size)
+            if payload is not None:
+                return self.add_payload(path, payload)
+
+        record = PakEntryRecord(path, self._pos, len(data), len(data),
+                                encrypted=self.encrypt, sha1=hashlib.sha1(data).digest())
+
+        if self.encrypt:
+            with profiler.span("encrypt", CATEGORY_WRITE):
+                payload = encrypt_blocks(self.key, pad_blocks(data))
+        else:
+            payload = data
+
+        with profiler.span("write_entry", CATEGORY_WRITE):
+            self._write(serialize_entry(record, self.version, in_data=True))
+            self._write(payload)
+        profiler.count("bytes_written", len(payload))
+
+        self.records[path] = record
+        return record
+
+    def add_payload(self, path, payload):
+        """Gravar uma entrada comprimida por compress_entry (em outra thread, se preferir)"""
+        self.check_compression(payload.compression)
+
+        # Blocos com posição relativa à entrada a partir da v5 (antes, posição absoluta)
+        base = header_size(self.version, payload.compression, len(payload.blocks))
+        if self.version < PakVersion.V5:
+            base += self._pos
+
+        blocks = []
+        stored = []
+        cursor = 0
+        for block in payload.blocks:
+            blocks.append((base + cursor, base + cursor + len(block)))
+            # Criptografado: cada bloco começa alinhado a 16 bytes
+            block = pad_blocks(block) if self.encrypt else block
+            stored.append(block)
+            cursor += len(block)
+        stored = b"".join(stored)
+
+        record = PakEntryRecord(path, self._pos, payload.size, len(stored), payload.compression,
+                                blocks, payload.block_size, self.encrypt, hashlib.sha1(stored).digest())
+
+        if self.encrypt:
+            with profiler.span("encrypt", CATEGORY_WRITE):
+                stored = encrypt_blocks(self.key, stored)
+
+        with profiler.span("write_entry", CATEGORY_WRITE):
+            self._write(serialize_entry(record, self.version, in_data=True))
+            self._write(stored)
+        profiler.count("bytes_written", len(stored))
+
+        self.records[path] = record
+        return record
+
+    def add_raw(self, path, raw, chunks):
+        """Gravar os bytes de outra entrada como estão (chunks: fatias dos dados gravados)
+
+        Só o cabeçalho é refeito: as posições dos blocos mudam com a versão e com o
+        lugar da entrada no novo pak. A criptografia precisa ser a mesma do destino.
+        """
+        self.check_compression(raw.compression)
+        if raw.encrypted != self.encrypt:
+            raise ValueError(f"{path}: criptografia diferente da do pak de destino")
+
+        base = header_size(self.version, raw.compression, len(raw.blocks))
+        if self.version < PakVersion.V5:
+            base += self._pos
+        record = PakEntryRecord(path, self._pos, raw.size, raw.compressed_size, raw.compression,
+                                [(base + start, base + end) for start, end in raw.blocks],
+                                raw.block_size, raw.encrypted, raw.sha1)
+
+        written = 0
+        with profiler.span("copy_entry", CATEGORY_WRITE):
+            self._write(serialize_entry(record, self.version, in_data=True))
+            for chunk in chunks:
+                self._write(chunk)
+                written += len(chunk)
+        profiler.count("bytes_written", written)
+        if written != raw.stored_size:
+            raise IOError(f"{path}: {written} bytes copiados, esperado {raw.stored_size}")
+
+        self.records[path] = record
+        return record
+
+    def _finalize_block(self, data):
+        """Alinhar e (se configurado) criptografar um bloco do índice; devolve (bytes, sha1)"""
+        if self.encrypt_index:
+            data = pad_blocks(data)
+            return encrypt_blocks(self.key, data), hashlib.sha1(data).digest()
+        return data, hashlib.sha1(data).digest()
+
+    def _build_primary_index(self, phi_info, fdi_info, encoded):
+        writer = Writer()
+        writer.string(self.mount_point)
+        writer.uint32(len(self.records))
+        writer.uint64(self.path_hash_seed)
+        for offset, size, sha1 in (phi_info, fdi_info):
+            writer.uint32(1)
+            writer.uint64(offset)
+            writer.uint64(size)
+            writer.write(sha1)
+        writer.uint32(len(encoded))
+        writer.write(encoded)
+        writer.uint32(0)  # entradas não codificadas
+        return writer.getvalue()
+
+    def _write_index(self):
+        """Gravar o índice e devolver (offset, tamanho, sha1) do índice principal"""
+        index_offset = self._pos
+
+        if self.version < PakVersion.V10:
+            writer = Writer()
+            writer.string(self.mount_point)
+            writer.uint32(len(self.records))
+            for path, record in self.records.items():
+                writer.string(path)
+                writer.write(serialize_entry(record, self.version))
+            primary, primary_hash = self._finalize_block(writer.getvalue())
+            self._write(primary)
+            return index_offset, len(primary), primary_hash
+
+        encoded = bytearray()
+        offsets = []
+        for path, record in self.records.items():
+            offsets.append((path, len(encoded)))
+            encoded += serialize_encoded_entry(record)
+        encoded = bytes(encoded)
+
+        phi_writer = Writer()
+        generate_phi(phi_writer, offsets, self.path_hash_seed)
+        phi, phi_hash = self._finalize_block(phi_writer.getvalue())
+
+        fdi_writer = Writer()
+        generate_fdi(fdi_writer, offsets)
+        fdi, fdi_hash = self._finalize_block(fdi_writer.getvalue())
+
+        # O tamanho do índice principal não depende dos offsets: calcular e depois preencher
+        placeholder = self._build_primary_index((0, 0, bytes(20)), (0, 0, bytes(20)), encoded)
+        primary_size = align(len(placeholder)) if self.encrypt_index else len(placeholder)
+        phi_offset = index_offset + primary_size
+        fdi_offset = phi_offset + len(phi)
+
+        primary, primary_hash = self._finalize_block(self._build_primary_index(
+            (phi_offset, len(phi), phi_hash), (fdi_offset, len(fdi), fdi_hash), encoded))
+
+        self._write(primary)
+        self._write(phi)
+        self._write(fdi)
+        return index_offset, len(primary), primary_hash
+
+    def _write_footer(self, index_offset, index_size, index_hash):
+        writer = Writer()
+        if self.version >= PakVersion.V7:
+            writer.write(self.guid)
+        if self.version >= PakVersion.V4:
+            writer.uint8(1 if self.encrypt_index else 0)
+        writer.uint32(PAK_MAGIC)
+        writer.uint32(self.version - 1 if self.version >= PakVersion.V8B else self.version)
+        writer.uint64(index_offset)
+        writer.uint64(index_size)
+        writer.write(index_hash)
+        if self.version == PakVersion.V9:
+            writer.uint8(0)  # frozen
+
+        slots = 0
+        if self.version == PakVersion.V8A:
+            slots = 4
+        elif self.version >= PakVersion.V8B:
+            slots = 5
+        # Nomes sempre na mesma ordem: o índice de cada método é fixo (COMPRESSION_INDEX)
+        names = list(COMPRESSION_NAMES.values())
+        for i in range(slots):
+            name = names[i] if i < len(names) else b""
+            writer.write(name.ljust(32, b"\x00"))
+
+        self._write(writer.getvalue())
+
+    def close(self):
+        """Gravar índice e footer e substituir o destino de forma atômica"""
+        with profiler.span("write_index", CATEGORY_WRITE):
+            index_offset, index_size, index_hash = self._write_index()
+            self._write_footer(index_offset, index_size, index_hash)
+        self._atomic.commit()
+        self.backup_path = self._atomic.backup_path
+        return self.backup_path
+
+    def discard(self):
+        """Abandonar a gravação (o destino não é alterado)"""
+        self._atomic.discard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False